@@ -31,16 +31,16 @@ from starfab.gui.widgets.pages import *
 from .log import getLogger
 from .models import StarCitizenManager
 from .resources import RES_PATH
+from .gui.widgets.task_status import TaskStatusWidget
 from .settings import settings
+from .tasks import get_scheduler
+from .trace import tracer
 from .utils import reload_starfab_modules, parsebool
 
 logger = getLogger(__name__)
 
 
 class StarFab(QMainWindow):
-    task_started = Signal(str, str, int, int)
-    update_status_progress = Signal(str, int, int, int, str)
-    task_finished = Signal(str, bool, str)
     close = Signal()
 
     open_scdir = Signal(str)
@@ -59,9 +59,9 @@ class StarFab(QMainWindow):
         self.settings = settings
         self._refresh_recent()
 
-        self.task_started.connect(self._handle_task_started)
-        self.update_status_progress.connect(self._handle_update_statusbar_progress)
-        self.task_finished.connect(self._handle_task_finished)
+        self.tasks = get_scheduler()
+        self.tasks.tasks_updated.connect(self._update_status_bar)
+        self.tasks.task_finished.connect(self._handle_task_finished)
         self.open_scdir.connect(self._handle_open_scdir)
 
         self.resize(1900, 900)
@@ -87,10 +87,8 @@ class StarFab(QMainWindow):
         )
         self.actionClear_Recent.triggered.connect(self.clear_recent)
 
-        self.status_bar_progress = qtw.QProgressBar(self)
-        self.statusBar.addPermanentWidget(self.status_bar_progress)
-        self.status_bar_progress.setFormat("%v / %m - %p%")
-        self.status_bar_progress.hide()
+        self.status_bar_tasks = TaskStatusWidget(self.tasks, self)
+        self.statusBar.addPermanentWidget(self.status_bar_tasks)
 
         # show/hide menubar toggle, will be obfuscated in release in favor of ribbon bar
         self.menu_toggled = QShortcut(QKeySequence("ALT+M"), self)
@@ -158,6 +156,14 @@ class StarFab(QMainWindow):
             True,
             self.on_license,
         )
+        self._save_trace_action = self.add_action(
+            "Save Trace",
+            "mdi.chart-timeline",
+            "Save the recorded loading and export spans as a Chrome trace",
+            True,
+            self.save_trace,
+        )
+        self.menuTools.addAction(self._save_trace_action)
 
         # -------------      textboxes       -----------------
         self.lineEdit_BlenderPath = RibbonTextbox("", 200, 400)
@@ -186,7 +192,6 @@ class StarFab(QMainWindow):
 
         self.dock_widgets = {}
         self.setup_dock_widgets()
-        self._progress_tasks = {}
 
     def _blender_manager_updated(self):
         self.lineEdit_BlenderPath.setText(str(self.blender_manager.blender))
@@ -250,6 +255,7 @@ class StarFab(QMainWindow):
 
         self.debug_panel = self.home_tab.add_ribbon_pane("Debug")
         self.debug_panel.add_ribbon_widget(RibbonButton(self, self._show_console, True))
+        self.debug_panel.add_ribbon_widget(RibbonButton(self, self._save_trace_action, True))
 
         self.home_tab.add_spacer()
 
@@ -347,7 +353,7 @@ Contributors:
         self.restoreGeometry(settings.value("windowGeometry"))
         self.restoreState(settings.value("windowState"))
 
-        updates.check_and_notify()
+        self.update_checker = updates.check_and_notify(parent=self)
         if os.environ.get("STARFAB_SC_PATH"):
             self.open_scdir.emit(os.environ["STARFAB_SC_PATH"])
         elif len(sys.argv) > 1:
@@ -529,65 +535,33 @@ Contributors:
         else:
             self.dock_widgets["console"].hide()
 
+    def save_trace(self):
+        path, _ = qtw.QFileDialog.getSaveFileName(
+            self,
+            "Save Trace",
+            str(Path(self.settings.value("exportDirectory")) / f"starfab-trace-{time.strftime('%Y%m%d-%H%M%S')}.json"),
+            "Chrome Trace (*.json)",
+        )
+        if path:
+            tracer.dump(path)
+            self.statusBar.showMessage(f"Saved {len(tracer)} spans to {path}")
+
     def _update_status_bar(self):
         if self.splash is not None:
-            self.splash.update_status_bar(self._progress_tasks)
-
-        min = 0
-        max = 0
-        value = 0
-        msgs = []
-        for task in self._progress_tasks.values():
-            if task["msg"]:
-                msgs.append(task["msg"])
-            value += task["value"]
-            min += task["min"]
-            max += task["max"]
-
-        msg = ", ".join(msgs).strip()
-        self.status_bar_progress.setFormat(
-            f"{msg} - %v / %m - %p%" if msg else "%v / %m - %p%"
-        )
-        if min != max:
-            self.status_bar_progress.setRange(min, max)
-            self.status_bar_progress.setValue(value)
-            if self.status_bar_progress.isHidden():
-                self.status_bar_progress.show()
-        elif self.status_bar_progress.isVisible():
-            self.status_bar_progress.hide()
+            self.splash.update_status_bar(self.tasks.tasks)
 
     def _handle_datacore_loaded(self):
         self.actionExportEntity.setEnabled(True)
         self.show()
 
-    @Slot(str, str, int, int)
-    def _handle_task_started(self, task, msg, min=0, max=0):
-        self._progress_tasks[task] = {"msg": msg, "value": min, "min": min, "max": max}
-        self._update_status_bar()
-
-    @Slot(str, int, int, int, str)
-    def _handle_update_statusbar_progress(self, task, value, min=0, max=0, msg=""):
-        if task not in self._progress_tasks:
-            self._handle_task_started(task, msg, min, max)
-        self._progress_tasks[task]["value"] = value
-        if min:
-            self._progress_tasks[task]["min"] = min
-        if max:
-            self._progress_tasks[task]["max"] = max
-        if msg:
-            self._progress_tasks[task]["msg"] = msg
-        self._update_status_bar()
-
-    @Slot(str, bool, str)
-    def _handle_task_finished(self, task, success=True, msg=""):
-        if task in self._progress_tasks:
-            if msg:
-                QMessageBox.information(None, "Task Completed", msg)
-                self._progress_tasks[task]["msg"] = msg
-            elif not success:
-                msg = msg if msg else f'{self._progress_tasks[task]["msg"]} failed'
-                QMessageBox.warning(None, "Task Failed", msg)
-            del self._progress_tasks[task]
+    @Slot(object)
+    def _handle_task_finished(self, task):
+        if task.cancelled:
+            pass
+        elif not task.success:
+            QMessageBox.warning(None, "Task Failed", task.result_message or f"{task.title} failed")
+        elif task.result_message:
+            QMessageBox.information(None, "Task Completed", task.result_message)
         self._update_status_bar()
 
     @Slot(qtc.QPoint)
@@ -735,7 +709,6 @@ Contributors:
             self.dock_widgets = {}
             self.setup_dock_widgets()
             self.setWindowTitle("StarFab")
-            self.status_bar_progress.hide()
             self.sc_manager.unload.emit()
             self.actionClose.setEnabled(False)
             qtg.QGuiApplication.processEvents()
@@ -0,0 +1,27 @@
+"""
+Headless benchmarks for StarFab's loading and model code. Each module can be run directly, e.g.
+
+    python -m starfab.benchmarks.tree_models
+
+Benchmarks run under the Qt `offscreen` platform unless `QT_QPA_PLATFORM` is already set.
+"""
+import os
+import sys
+import time
+from contextlib import contextmanager
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+
+def qt_app():
+    """Returns the running `QApplication`, creating one if needed. Must be called before importing `starfab.models`"""
+    from qtpy.QtWidgets import QApplication
+
+    return QApplication.instance() or QApplication(sys.argv[:1])
+
+
+@contextmanager
+def timed(results: dict, name: str):
+    start = time.perf_counter()
+    yield
+    results[name] = time.perf_counter() - start
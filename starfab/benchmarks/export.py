@@ -0,0 +1,81 @@
+"""
+Benchmark for exporting DataCore records.
+
+Exports the records of a synthetic datacore written by `starfab.benchmarks.fixtures`, or of an existing install with
+`--install`, with `export_records`, once in this thread and once in worker processes, and reports the throughput of
+each. Fails if a record couldn't be exported, or if the two exports didn't write exactly the same files.
+"""
+import argparse
+import filecmp
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from starfab.benchmarks import qt_app
+
+
+def compare_trees(left: Path, right: Path) -> list:
+    """Returns the relative paths that differ between the files under `left` and `right`"""
+    left_files = {_.relative_to(left) for _ in left.rglob("*") if _.is_file()}
+    right_files = {_.relative_to(right) for _ in right.rglob("*") if _.is_file()}
+    differing = sorted(left_files ^ right_files)
+    differing.extend(
+        _ for _ in sorted(left_files & right_files) if not filecmp.cmp(left / _, right / _, shallow=False)
+    )
+    return differing
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--install", type=Path, help="export the records of an existing install")
+    parser.add_argument("--records", type=int, default=20_000, help="records in the synthetic datacore")
+    parser.add_argument("--limit", type=int, default=0, help="only export this many records")
+    parser.add_argument("--format", choices=["xml", "json"], default="xml")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes, one per CPU by default")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    qt_app()
+
+    from scdatatools.sc import StarCitizen
+    from starfab.models.datacore import RECORDS_ROOT_PATH
+    from starfab.models.record_export import export_records
+
+    with tempfile.TemporaryDirectory(prefix="starfab-bench-") as tmp:
+        tmp = Path(tmp)
+        install = args.install
+        if install is None:
+            from starfab.benchmarks.fixtures import generate_install
+
+            install = generate_install(
+                tmp / "StarCitizen", entries=100, records=args.records, tags=100, loc_keys=100, seed=args.seed
+            )
+        start = time.perf_counter()
+        datacore = StarCitizen(install).datacore
+        print(f"opened {len(datacore.records):,} records in {time.perf_counter() - start:.2f}s")
+
+        records = [(_.id.value, _.filename.replace(RECORDS_ROOT_PATH, "")) for _ in datacore.records]
+        if args.limit:
+            records = records[: args.limit]
+
+        failed = False
+        results = {}
+        for name, workers in (("serial", 1), ("parallel", args.workers)):
+            outdir = tmp / name
+            stats = export_records(datacore, records, outdir, fmt=args.format, workers=workers)
+            results[name] = stats
+            print(f"{name:<10}{stats}")
+            for guid, error in stats.errors[:10]:
+                print(f"FAIL: {name} could not export {guid}: {error}")
+                failed = True
+
+        if (differing := compare_trees(tmp / "serial", tmp / "parallel")):
+            print(f"FAIL: {len(differing)} files differ between the exports, e.g. {differing[:5]}")
+            failed = True
+        print(f"speedup {results['serial'].elapsed / max(results['parallel'].elapsed, 1e-9):.2f}x")
+        return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
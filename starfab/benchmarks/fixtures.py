@@ -0,0 +1,445 @@
+"""
+Synthetic Star Citizen installs for benchmarking StarFab's loading code without the real game.
+
+`generate_install` writes a directory with a build manifest and a `Data.p4k` that scdatatools opens like the real
+thing. The archive contains:
+
+- filler files spread over a configurable directory fan-out
+- a `Data/Game.dcb` DataCore with records of several types, which reference each other and carry tags from a tag
+  database
+- `global.ini` localization files for the keys the records use, plus filler keys
+- CryXmlB GameAudio files with ATL triggers
+- `.wem` files
+
+Files are stored uncompressed and are only a few bytes each, so the entry counts can match a real install without
+taking up 100 GB. Everything is derived from `seed`, so the same arguments always produce the same install.
+
+    python -m starfab.benchmarks.fixtures /tmp/synthetic-sc --entries 500000 --records 200000
+"""
+import argparse
+import json
+import random
+import struct
+import sys
+import time
+import zipfile
+from pathlib import Path
+
+from scdatatools.engine.cryxml import CRYXMLB_SIGNATURE
+from scdatatools.forge.dftypes import DCB_NO_PARENT, ConversionTypes, DataCoreHeader, DataTypes
+
+RECORD_TYPES = [
+    "EntityClassDefinition",
+    "SCItemManufacturer",
+    "AmmoParams",
+    "MissionBrokerEntry",
+    "LootGenerationRecord",
+    "AudioMusicLogic",
+    "ResourceType",
+    "JurisdictionBase",
+]
+RECORDS_ROOT = "libs/foundry/records/"
+ENTITY_CATEGORIES = ["spaceships", "groundvehicles", "scitem", "characters", "doors", "weapons"]
+FILE_SUFFIXES = [".dds", ".xml", ".cgf", ".mtl", ".chr", ".skin", ".dds.1", ".cga"]
+LANGUAGES = ["english", "german_(germany)", "french_(france)", "spanish_(spain)"]
+WORDS = "alpha bravo charlie delta echo foxtrot golf hotel india juliet kilo lima mike november oscar papa".split()
+
+# the instance index of a record is 16 bits, larger types are split over several structures of the same name
+MAX_INSTANCES_PER_STRUCTURE = 0xFFFF
+
+# value pools in the order `DataCoreBinary` reads them
+_VALUE_POOLS = [
+    DataTypes.Int8, DataTypes.Int16, DataTypes.Int32, DataTypes.Int64, DataTypes.UInt8, DataTypes.UInt16,
+    DataTypes.UInt32, DataTypes.UInt64, DataTypes.Boolean, DataTypes.Float, DataTypes.Double, DataTypes.GUID,
+    DataTypes.StringRef, DataTypes.Locale, DataTypes.EnumChoice, DataTypes.StrongPointer, DataTypes.WeakPointer,
+    DataTypes.Reference, DataTypes.EnumValueName,
+]
+_HEADER_COUNTS = {
+    DataTypes.Boolean: "boolean_count", DataTypes.Int8: "int8_count", DataTypes.Int16: "int16_count",
+    DataTypes.Int32: "int32_count", DataTypes.Int64: "int64_count", DataTypes.UInt8: "uint8_count",
+    DataTypes.UInt16: "uint16_count", DataTypes.UInt32: "uint32_count", DataTypes.UInt64: "uint64_count",
+    DataTypes.Float: "float_count", DataTypes.Double: "double_count", DataTypes.GUID: "guid_count",
+    DataTypes.StringRef: "string_count", DataTypes.Locale: "locale_count", DataTypes.EnumChoice: "enum_count",
+    DataTypes.StrongPointer: "strong_value_count", DataTypes.WeakPointer: "weak_value_count",
+    DataTypes.Reference: "reference_count", DataTypes.EnumValueName: "enum_option_name_count",
+}
+_ATTRIBUTE_FORMATS = {
+    DataTypes.Boolean: "<?",
+    DataTypes.Int32: "<i",
+    DataTypes.UInt32: "<I",
+    DataTypes.Float: "<f",
+    DataTypes.Double: "<d",
+    DataTypes.StringRef: "<I",
+    DataTypes.Locale: "<I",
+}
+NULL_GUID = bytes(16)
+
+
+class DataCoreWriter:
+    """Builds a DataCore binary (`Game.dcb`) that `scdatatools.forge.DataCoreBinary` can read.
+
+    Structures are declared with their properties as `(name, data_type, conversion_type)` tuples, records are added
+    with a dict of their property values. Strings and locales are passed as `str`, references as the raw 16 byte GUID
+    of the referenced record (or `NULL_GUID`), and arrays as lists of those values."""
+
+    def __init__(self):
+        self._text = bytearray()
+        self._strings = {}
+        self._structures = []  # (name, first property, property count)
+        self._properties = []  # (name, data type, conversion type)
+        self._instances = []  # list of instance data per structure
+        self._pools = {_: [] for _ in _VALUE_POOLS}
+        self._records = []
+
+    def string(self, value: str) -> int:
+        if (offset := self._strings.get(value)) is None:
+            offset = self._strings[value] = len(self._text)
+            self._text += value.encode("utf-8") + b"\0"
+        return offset
+
+    def structure(self, name, properties) -> int:
+        self.string(name)
+        self._structures.append((name, len(self._properties), len(properties)))
+        for prop_name, data_type, conversion in properties:
+            self.string(prop_name)
+            self._properties.append((prop_name, data_type, conversion))
+        self._instances.append([])
+        return len(self._structures) - 1
+
+    def _value(self, data_type, value) -> bytes:
+        if data_type == DataTypes.Reference:
+            return struct.pack("<I", 0 if value != NULL_GUID else DCB_NO_PARENT) + value
+        if data_type == DataTypes.GUID:
+            return value
+        if data_type in (DataTypes.StringRef, DataTypes.Locale):
+            value = self.string(value)
+        return struct.pack(_ATTRIBUTE_FORMATS[data_type], value)
+
+    def record(self, structure, name, filename, guid: bytes, values) -> int:
+        """Add a record of `structure` with the property `values`, returns the record's index"""
+        type_name, first, count = self._structures[structure]
+        data = bytearray()
+        for prop_name, data_type, conversion in self._properties[first : first + count]:
+            value = values[prop_name]
+            if conversion == ConversionTypes.Attribute:
+                data += self._value(data_type, value)
+            else:
+                pool = self._pools[data_type]
+                data += struct.pack("<II", len(value), len(pool))
+                pool.extend(self._value(data_type, _) for _ in value)
+        instances = self._instances[structure]
+        instances.append(bytes(data))
+        self._records.append(
+            struct.pack(
+                "<III16sHH",
+                self.string(f"{type_name}.{name}"),
+                self.string(filename),
+                structure,
+                guid,
+                len(instances) - 1,
+                0,
+            )
+        )
+        return len(self._records) - 1
+
+    def instance_count(self, structure) -> int:
+        return len(self._instances[structure])
+
+    def tobytes(self) -> bytes:
+        mapped = [i for i, _ in enumerate(self._instances) if _]
+        counts = {
+            "structure_definition_count": len(self._structures),
+            "property_definition_count": len(self._properties),
+            "enum_definition_count": 0,
+            "data_mapping_definition_count": len(mapped),
+            "record_definition_count": len(self._records),
+            "text_length": len(self._text),
+        }
+        counts.update({_HEADER_COUNTS[data_type]: len(pool) for data_type, pool in self._pools.items()})
+        header = DataCoreHeader(version=6, **counts)
+        parts = [bytes(header)]
+        parts += [
+            struct.pack("<IIHHI", self.string(name), DCB_NO_PARENT, count, first, 0)
+            for name, first, count in self._structures
+        ]
+        parts += [
+            struct.pack("<IHHHH", self.string(name), 0, data_type, conversion, 0)
+            for name, data_type, conversion in self._properties
+        ]
+        parts += [struct.pack("<II", len(self._instances[_]), _) for _ in mapped]
+        parts += self._records
+        for data_type in _VALUE_POOLS:
+            parts += self._pools[data_type]
+        parts.append(bytes(self._text))
+        for structure in mapped:
+            parts += self._instances[structure]
+        return b"".join(parts)
+
+
+def cryxmlb(tag, attributes=None, children=()) -> bytes:
+    """Returns the CryXmlB encoding of an element, `children` are `(tag, attributes, children)` tuples"""
+    nodes, attribute_table, child_table = [], [], []
+    text = bytearray()
+    strings = {}
+
+    def string(value):
+        if (offset := strings.get(value)) is None:
+            offset = strings[value] = len(text)
+            text.extend(value.encode("utf-8") + b"\0")
+        return offset
+
+    def add(tag, attributes, children, parent):
+        index = len(nodes)
+        nodes.append(None)
+        first_attribute = len(attribute_table)
+        attribute_table.extend(struct.pack("<II", string(k), string(v)) for k, v in (attributes or {}).items())
+        # the child table lists a node's children consecutively, so reserve their slots before adding grandchildren
+        first_child = len(child_table)
+        child_table.extend([None] * len(children))
+        for i, child in enumerate(children):
+            child_table[first_child + i] = struct.pack("<I", add(*child, parent=index))
+        nodes[index] = struct.pack(
+            "<IIHHIII4x",
+            string(tag),
+            string(""),
+            len(attributes or {}),
+            len(children),
+            parent,
+            first_attribute,
+            first_child,
+        )
+        return index
+
+    add(tag, attributes, list(children), 0xFFFFFFFF)
+    header_size = 44
+    node_offset = header_size
+    attribute_offset = node_offset + len(nodes) * 28
+    child_offset = attribute_offset + len(attribute_table) * 8
+    text_offset = child_offset + len(child_table) * 4
+    size = text_offset + len(text)
+    header = struct.pack(
+        "<8s9I",
+        CRYXMLB_SIGNATURE,
+        size,
+        node_offset,
+        len(nodes),
+        attribute_offset,
+        len(attribute_table),
+        child_offset,
+        len(child_table),
+        text_offset,
+        len(text),
+    )
+    return b"".join([header, *nodes, *attribute_table, *child_table, bytes(text)])
+
+
+def _guid(rand) -> bytes:
+    return rand.getrandbits(128).to_bytes(16, "little")
+
+
+def _fanout_path(index, fanout, depth):
+    parts = []
+    for _ in range(depth):
+        index, digit = divmod(index, fanout)
+        parts.append(f"{WORDS[digit % len(WORDS)]}{digit}")
+    return "/".join(reversed(parts))
+
+
+def generate_datacore(
+    rand, records=50_000, record_types=len(RECORD_TYPES), tags=2_000, fanout=16, loc_keys=None
+) -> bytes:
+    """Returns a `Game.dcb` with `records` records spread over `record_types` types, plus `tags` tags and their tag
+    database. The localization keys the records use are appended to the list `loc_keys` if given."""
+    writer = DataCoreWriter()
+    A, S = ConversionTypes.Attribute, ConversionTypes.SimpleArray
+    tag_struct = writer.structure(
+        "Tag", [("tagName", DataTypes.StringRef, A), ("legacyGUID", DataTypes.GUID, A), ("children", DataTypes.Reference, S)]
+    )
+    tag_db_struct = writer.structure("TagDatabase", [("tags", DataTypes.Reference, S)])
+
+    # a tag tree with `fanout` children per tag
+    tag_guids = [_guid(rand) for _ in range(tags)]
+    tag_children = {}
+    for i in range(1, tags):
+        tag_children.setdefault((i - 1) // fanout, []).append(i)
+    for i, guid in enumerate(tag_guids):
+        writer.record(
+            tag_struct,
+            f"Tag_{i}",
+            f"{RECORDS_ROOT}tagdatabase/tag_{i}.xml",
+            guid,
+            {
+                "tagName": f"{WORDS[i % len(WORDS)]}{i}",
+                "legacyGUID": NULL_GUID,
+                "children": [tag_guids[_] for _ in tag_children.get(i, [])],
+            },
+        )
+    writer.record(
+        tag_db_struct,
+        "TagDatabase",
+        f"{RECORDS_ROOT}tagdatabase/tagdatabase.tagdatabase.xml",
+        _guid(rand),
+        {"tags": tag_guids[:1]},
+    )
+
+    type_names = [RECORD_TYPES[_] if _ < len(RECORD_TYPES) else f"SyntheticRecord{_}" for _ in range(record_types)]
+    properties = [
+        ("className", DataTypes.StringRef, A),
+        ("displayName", DataTypes.Locale, A),
+        ("description", DataTypes.Locale, A),
+        ("manufacturer", DataTypes.Reference, A),
+        ("mass", DataTypes.Float, A),
+        ("size", DataTypes.Int32, A),
+        ("enabled", DataTypes.Boolean, A),
+        ("tags", DataTypes.Reference, S),
+        ("references", DataTypes.Reference, S),
+    ]
+    structures = {name: writer.structure(name, properties) for name in type_names}
+    manufacturers = []
+    guids = []
+    for i in range(records):
+        type_name = type_names[i % len(type_names)]
+        structure = structures[type_name]
+        if writer.instance_count(structure) >= MAX_INSTANCES_PER_STRUCTURE:
+            structure = structures[type_name] = writer.structure(type_name, properties)
+        name = f"{type_name.lower()}_{WORDS[i % len(WORDS)]}_{i}"
+        if type_name == "EntityClassDefinition":
+            directory = f"entities/{ENTITY_CATEGORIES[(i // len(type_names)) % len(ENTITY_CATEGORIES)]}"
+        else:
+            directory = type_name.lower()
+        directory += "/" + _fanout_path(i // fanout, fanout, 2)
+        loc_key = f"{type_name}_{i}"
+        if loc_keys is not None:
+            loc_keys.extend([f"{loc_key}_name", f"{loc_key}_desc"])
+        guid = _guid(rand)
+        writer.record(
+            structure,
+            name,
+            f"{RECORDS_ROOT}{directory}/{name}.xml",
+            guid,
+            {
+                "className": name,
+                "displayName": f"@{loc_key}_name",
+                "description": f"@{loc_key}_desc",
+                "manufacturer": rand.choice(manufacturers) if manufacturers else NULL_GUID,
+                "mass": rand.uniform(0.1, 100_000.0),
+                "size": rand.randrange(0, 12),
+                "enabled": rand.random() < 0.9,
+                "tags": [tag_guids[rand.randrange(tags)] for _ in range(rand.randrange(0, 4))] if tags else [],
+                "references": [rand.choice(guids) for _ in range(rand.randrange(0, 3))] if guids else [],
+            },
+        )
+        guids.append(guid)
+        if type_name == "SCItemManufacturer":
+            manufacturers.append(guid)
+    return writer.tobytes()
+
+
+
+def generate_install(
+    path,
+    entries=100_000,
+    fanout=16,
+    records=50_000,
+    record_types=len(RECORD_TYPES),
+    tags=2_000,
+    loc_keys=50_000,
+    languages=2,
+    audio_files=20,
+    triggers_per_audio_file=200,
+    wems=500,
+    seed=0,
+) -> Path:
+    """Write a synthetic install to the directory `path` and returns its path. `entries` is the number of filler
+    files in the p4k, in directories with `fanout` subdirectories or files each. `loc_keys` is the minimum number of
+    localization keys per language."""
+    rand = random.Random(seed)
+    path = Path(path)
+    path.mkdir(parents=True, exist_ok=True)
+    version = 9_000_000 + seed
+    (path / "build_manifest.id").write_text(
+        json.dumps(
+            {
+                "Data": {
+                    "Branch": "sc-alpha-synthetic",
+                    "BuildDateStamp": "Jan 01 2024",
+                    "BuildTimeStamp": "00:00",
+                    "Config": "shipping",
+                    "RequestedP4ChangeNum": str(version),
+                    "Shelved_Change": "",
+                    "Tag": "synthetic",
+                }
+            }
+        )
+    )
+
+    keys = []
+    dcb = generate_datacore(rand, records, record_types, tags, fanout, keys)
+    keys += [f"synthetic_key_{_}" for _ in range(max(0, loc_keys - len(keys)))]
+
+    timestamp = (2024, 1, 1, 0, 0, 0)
+
+    def write(archive, name, data):
+        archive.writestr(zipfile.ZipInfo(name, date_time=timestamp), data)
+
+    with zipfile.ZipFile(path / "Data.p4k", "w", zipfile.ZIP_STORED, allowZip64=True) as archive:
+        write(archive, "Data/Game.dcb", dcb)
+        for language in LANGUAGES[: max(1, languages)]:
+            ini = "".join(f"{key}={language} {WORDS[i % len(WORDS)]} {i}\r\n" for i, key in enumerate(keys))
+            write(archive, f"Data/Localization/{language}/global.ini", ini.encode("utf-8"))
+        for i in range(audio_files):
+            triggers = [
+                ("ATLTrigger", {"atl_name": f"Play_{WORDS[i % len(WORDS)]}_{i}_{_}"}, [])
+                for _ in range(triggers_per_audio_file)
+            ]
+            write(
+                archive,
+                f"Data/Libs/GameAudio/synthetic_{i}.xml",
+                cryxmlb("ATLConfig", {"atl_name": f"synthetic_{i}"}, [("AudioTriggers", {}, triggers)]),
+            )
+        for i in range(wems):
+            write(archive, f"Data/Sounds/wwise/{rand.getrandbits(31)}.wem", b"RIFF")
+        depth = 1
+        while fanout ** (depth + 1) < entries:
+            depth += 1
+        for i in range(entries):
+            directory = _fanout_path(i // fanout, fanout, depth)
+            suffix = FILE_SUFFIXES[i % len(FILE_SUFFIXES)]
+            write(archive, f"Data/Objects/{directory}/file_{i:07d}{suffix}", bytes(rand.randrange(64)))
+    return path
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("path", type=Path)
+    parser.add_argument("--entries", type=int, default=100_000, help="number of filler files in the p4k")
+    parser.add_argument("--fanout", type=int, default=16, help="subdirectories or files per directory")
+    parser.add_argument("--records", type=int, default=50_000)
+    parser.add_argument("--record-types", type=int, default=len(RECORD_TYPES))
+    parser.add_argument("--tags", type=int, default=2_000)
+    parser.add_argument("--loc-keys", type=int, default=50_000, help="minimum localization keys per language")
+    parser.add_argument("--languages", type=int, default=2)
+    parser.add_argument("--audio-files", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    path = generate_install(
+        args.path,
+        entries=args.entries,
+        fanout=args.fanout,
+        records=args.records,
+        record_types=args.record_types,
+        tags=args.tags,
+        loc_keys=args.loc_keys,
+        languages=args.languages,
+        audio_files=args.audio_files,
+        seed=args.seed,
+    )
+    size = (path / "Data.p4k").stat().st_size
+    print(f"Wrote {path} ({size / 1024 / 1024:.1f} MB) in {time.perf_counter() - start:.2f}s")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,96 @@
+"""
+Benchmark for how long importing StarFab takes before its window can be created.
+
+Imports `--module` in a fresh interpreter with `python -X importtime` a few times, and reports the fastest run along
+with the modules that took the longest. Fails if the import took longer than `--budget` seconds, or if it imported one
+of the heavy GUI stacks that StarFab only loads once they're first used, such as QtWebEngine for the editor or VTK for
+the 3D preview.
+"""
+import argparse
+import os
+import subprocess
+import sys
+
+# modules, and their submodules, that must not be imported until the feature that needs them is used
+DEFERRED_MODULES = [
+    "PySide6.QtWebEngineCore",
+    "PySide6.QtWebEngineWidgets",
+    "PySide6.QtMultimedia",
+    "qtconsole",
+    "pyvista",
+    "pyvistaqt",
+    "vtkmodules",
+    "starfab.gui.widgets.editor.ace",
+    "starfab.gui.widgets.markdown",
+    "starfab.gui.widgets.dock_widgets.pyconsole",
+    "starfab.gui.widgets.preview3d",
+    "starfab.gui.widgets.hardpoint_editor",
+    "starfab.gui.widgets.pages.content.vehicle_selector",
+    "starfab.gui.widgets.pages.content.entity_selector",
+    "starfab.gui.widgets.pages.content.prefab_selector",
+    "starfab.gui.widgets.pages.content.soc_selector",
+]
+
+
+def parse_importtime(output: str):
+    """Returns `(name, self_us, cumulative_us, depth)` for every module in the `-X importtime` `output`"""
+    modules = []
+    for line in output.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|", maxsplit=2)
+        if not self_us.strip().isdigit():
+            continue  # the header
+        stripped = name.lstrip()
+        modules.append((stripped, int(self_us), int(cumulative_us), (len(name) - len(stripped) - 1) // 2))
+    return modules
+
+
+def time_import(module: str):
+    """Imports `module` in a new interpreter, returns the parsed timings and the interpreter's stderr"""
+    env = dict(os.environ)
+    env.setdefault("QT_QPA_PLATFORM", "offscreen")
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"], env=env, capture_output=True, text=True
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(proc.stderr.strip().splitlines()[-1] if proc.stderr.strip() else f"exit {proc.returncode}")
+    return parse_importtime(proc.stderr)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--module", default="starfab.app", help="module to import")
+    parser.add_argument("--budget", type=float, default=2.5, help="seconds the import may take")
+    parser.add_argument("--runs", type=int, default=3, help="imports to time, after one to compile bytecode")
+    parser.add_argument("--top", type=int, default=15, help="number of slowest modules to list")
+    args = parser.parse_args(argv)
+
+    try:
+        time_import(args.module)
+        runs = [time_import(args.module) for _ in range(max(1, args.runs))]
+    except RuntimeError as e:
+        print(f"FAIL: importing {args.module} failed: {e}")
+        return 1
+    modules = min(runs, key=lambda m: sum(_[2] for _ in m if _[3] == 0))
+    total = sum(_[2] for _ in modules if _[3] == 0) / 1e6
+
+    print(f"{'module':<60}{'self':>10}{'cumulative':>12}")
+    for name, self_us, cumulative_us, depth in sorted(modules, key=lambda _: _[1], reverse=True)[:args.top]:
+        print(f"{name:<60}{self_us / 1e3:>8.1f}ms{cumulative_us / 1e3:>10.1f}ms")
+    print(f"imported {len(modules)} modules in {total:.3f}s (best of {len(runs)}), budget {args.budget:.3f}s")
+
+    failed = False
+    if total > args.budget:
+        print(f"FAIL: importing {args.module} took {total:.3f}s, over the {args.budget:.3f}s budget")
+        failed = True
+    names = {_[0] for _ in modules}
+    for deferred in DEFERRED_MODULES:
+        if eager := sorted(_ for _ in names if _ == deferred or _.startswith(f"{deferred}.")):
+            print(f"FAIL: {deferred} was imported eagerly ({', '.join(eager[:3])})")
+            failed = True
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
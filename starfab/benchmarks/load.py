@@ -0,0 +1,142 @@
+"""
+End-to-end benchmark for opening a Star Citizen install.
+
+Opens an install with `StarCitizenManager` and waits for its load pipeline to finish. By default the install is a
+synthetic one written by `starfab.benchmarks.fixtures` to a temporary directory, `--install` opens an existing one
+instead. Reports when each loading stage was ready, started and finished, and the peak resident memory of the process
+while it ran. Stages run concurrently, so a stage's peak includes everything else loaded by then. `--trace` saves the
+spans recorded while loading as a Chrome trace. Fails if a stage failed or the install didn't finish loading within
+`--timeout`.
+"""
+import argparse
+import resource
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+from starfab.benchmarks import qt_app
+
+
+class RSSSampler(threading.Thread):
+    """Samples the resident memory of the process every `interval` seconds, from `/proc` where available"""
+
+    def __init__(self, interval=0.01):
+        super().__init__(daemon=True)
+        self.interval = interval
+        self.samples = []
+        self._stopping = threading.Event()
+        self._page_size = resource.getpagesize()
+
+    def rss(self) -> int:
+        try:
+            with open("/proc/self/statm") as f:
+                return int(f.read().split()[1]) * self._page_size
+        except OSError:
+            # the peak so far rather than the current value, in KB on Linux and bytes on macOS
+            peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+            return peak if sys.platform == "darwin" else peak * 1024
+
+    def run(self):
+        while not self._stopping.wait(self.interval):
+            self.samples.append((time.perf_counter(), self.rss()))
+
+    def stop(self):
+        self._stopping.set()
+        self.join()
+
+    def peak(self, start, end) -> int:
+        return max((rss for t, rss in self.samples if start <= t <= end), default=0)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--install", type=Path, help="open an existing install rather than a synthetic one")
+    parser.add_argument("--entries", type=int, default=200_000, help="filler files in the synthetic p4k")
+    parser.add_argument("--records", type=int, default=50_000, help="records in the synthetic datacore")
+    parser.add_argument("--tags", type=int, default=2_000)
+    parser.add_argument("--loc-keys", type=int, default=100_000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--timeout", type=float, default=600)
+    parser.add_argument("--trace", type=Path, help="save a Chrome trace of the load to this path")
+    args = parser.parse_args(argv)
+
+    app = qt_app()
+
+    from starfab.gui import qtc
+    from starfab.models.sc import StarCitizenManager
+
+    with tempfile.TemporaryDirectory(prefix="starfab-bench-") as tmp:
+        install = args.install
+        if install is None:
+            from starfab.benchmarks.fixtures import generate_install
+
+            start = time.perf_counter()
+            install = generate_install(
+                Path(tmp) / "StarCitizen",
+                entries=args.entries,
+                records=args.records,
+                tags=args.tags,
+                loc_keys=args.loc_keys,
+                seed=args.seed,
+            )
+            print(f"generated {install} in {time.perf_counter() - start:.2f}s")
+
+        manager = StarCitizenManager(None)
+        failures = []
+        manager.load_failed.connect(lambda msg, e: failures.append(("open", e)))
+        sampler = RSSSampler()
+        sampler.start()
+        baseline = sampler.rss()
+
+        manager._load_sc(str(install))
+        pipeline = manager.pipeline
+        if pipeline is None:
+            print(f"FAIL: could not open {install}: {failures}")
+            return 1
+        pipeline.stage_failed.connect(lambda name, e: failures.append((name, e)))
+        if not pipeline.is_finished:
+            loop = qtc.QEventLoop()
+            pipeline.finished.connect(loop.quit)
+            qtc.QTimer.singleShot(int(args.timeout * 1000), loop.quit)
+            loop.exec()
+        sampler.stop()
+
+        print(f"{manager.sc.version_label}: {len(manager.p4k_model.nodes) - 1} p4k nodes")
+        print(f"{'stage':<24}{'ready':>9}{'started':>9}{'finished':>10}{'duration':>10}{'peak RSS':>12}")
+        origin = pipeline.start_time
+        for stage in sorted(pipeline.stages.values(), key=lambda _: (_.started is None, _.started or 0)):
+            if stage.finished is None:
+                print(f"{stage.name:<24}{'':>9}{'':>9}{'-':>10}")
+                continue
+            peak = sampler.peak(origin + stage.started, origin + stage.finished)
+            print(
+                f"{stage.name:<24}{stage.ready:>8.2f}s{stage.started:>8.2f}s{stage.finished:>9.2f}s"
+                f"{stage.duration:>9.2f}s{peak / 1024 / 1024:>9.1f} MB" + (" FAILED" if stage.error else "")
+            )
+        print(f"critical path: {' > '.join(_.name for _ in pipeline.critical_path())}")
+        print(
+            f"peak RSS {sampler.peak(0, float('inf')) / 1024 / 1024:.1f} MB, "
+            f"{baseline / 1024 / 1024:.1f} MB before opening"
+        )
+
+        if args.trace is not None:
+            from starfab.trace import tracer
+
+            tracer.dump(args.trace)
+            print(f"saved {len(tracer)} spans to {args.trace}")
+
+        failed = False
+        if not pipeline.is_finished:
+            print(f"FAIL: loading did not finish within {args.timeout}s")
+            failed = True
+        for name, error in failures:
+            print(f"FAIL: {name} failed: {error!r}")
+            failed = True
+        manager._unload()
+        return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,140 @@
+"""
+Stress test for progressive loading of the P4K tree model.
+
+Loads synthetic archives through `P4KModelLoader` while a sorted proxy and a `QTreeView` are attached to the model and
+the view keeps expanding newly published directories. A small archive (`--checked-files`) is published after every
+directory with `QAbstractItemModelTester`s attached, any inconsistency between the rows the model reports and its
+insert signals aborts the process. A large archive (`--files`) is loaded at the normal publish rate. For both, the test
+checks that every node is reachable through the proxy once loading finishes and reports how long it took before the
+first rows were visible.
+"""
+import argparse
+import sys
+import time
+
+from starfab.benchmarks import qt_app
+
+
+class SyntheticInfo:
+    __slots__ = ("filename", "file_size", "date_time")
+
+    def __init__(self, filename, file_size, date_time):
+        self.filename = filename
+        self.file_size = file_size
+        self.date_time = date_time
+
+
+class SyntheticArchive:
+    def __init__(self, files, files_per_dir=20):
+        self.filelist = []
+        for i in range(files):
+            d = i // files_per_dir
+            self.filelist.append(
+                SyntheticInfo(
+                    f"Data/Objects/dir{d % 11}/group{d % 97}/set{d}/file_{i:07d}.dds",
+                    i,
+                    (2023, 1 + i % 12, 1 + i % 28, 0, 0, 0),
+                )
+            )
+
+    def expand_subarchives(self):
+        pass
+
+
+def count_rows(model, parent=None):
+    from starfab.gui import qtc
+
+    parent = parent or qtc.QModelIndex()
+    rows = model.rowCount(parent)
+    return rows + sum(count_rows(model, model.index(row, 0, parent)) for row in range(rows))
+
+
+def run_load(files, publish_interval, timeout, model_testers):
+    from qtpy.QtTest import QAbstractItemModelTester
+
+    from starfab.gui import qtc, qtw
+    from starfab.models.p4k import P4KModel, P4KModelLoader, P4KSortFilterProxyModelArchive
+
+    P4KModelLoader.publish_interval = publish_interval
+    owner = qtc.QObject()
+    model = P4KModel(owner)
+    model.loader_task_status_msg = ""
+
+    proxy = P4KSortFilterProxyModelArchive()
+    proxy.setSourceModel(model)
+    proxy.sort(0, qtc.Qt.AscendingOrder)
+    testers = []
+    if model_testers:
+        testers = [
+            QAbstractItemModelTester(_, QAbstractItemModelTester.FailureReportingMode.Fatal)
+            for _ in (model, proxy)
+        ]
+    view = qtw.QTreeView()
+    view.setModel(proxy)
+    view.resize(800, 600)
+    view.show()
+
+    results = {"files": files, "batches": 0, "first_rows": None}
+    start = time.perf_counter()
+
+    def _on_rows_visible():
+        if results["first_rows"] is None and model.rowCount():
+            results["first_rows"] = time.perf_counter() - start
+
+    def _on_nodes_available(count):
+        results["batches"] += 1
+        view.expandToDepth(2)
+
+    model.rowsInserted.connect(_on_rows_visible)
+    model.modelReset.connect(_on_rows_visible)
+    model.loading.connect(
+        lambda: model._loader.signals.nodes_available.connect(_on_nodes_available)
+    )
+
+    loop = qtc.QEventLoop()
+    model.loaded.connect(loop.quit)
+    qtc.QTimer.singleShot(int(timeout * 1000), loop.quit)
+    model.load(SyntheticArchive(files))
+    loop.exec()
+    results["loaded"] = time.perf_counter() - start
+    results["is_loaded"] = model.is_loaded
+
+    del testers
+    results["nodes"] = len(model.nodes) - 1
+    results["visible"] = count_rows(proxy)
+    view.close()
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--files", type=int, default=50_000)
+    parser.add_argument("--checked-files", type=int, default=300)
+    parser.add_argument("--timeout", type=float, default=300)
+    args = parser.parse_args(argv)
+
+    app = qt_app()
+    failed = False
+    # the model testers re-walk the whole model on every change, so they only run against a small archive that is
+    # published after every directory. The large archive checks the end result and the time to the first rows.
+    for files, publish_interval, model_testers in (
+        (args.checked_files, 0, True),
+        (args.files, 0.25, False),
+    ):
+        results = run_load(files, publish_interval, args.timeout, model_testers)
+        print(
+            f"{results['files']:>8} files {'(model testers)' if model_testers else '':<16}"
+            f"{results['batches']:>6} batches  first rows after {results['first_rows'] or 0:.3f}s  "
+            f"loaded after {results['loaded']:.3f}s  {results['visible']}/{results['nodes']} rows visible"
+        )
+        if not results["is_loaded"]:
+            print(f"FAIL: model did not finish loading within {args.timeout}s")
+            failed = True
+        elif results["visible"] != results["nodes"]:
+            print("FAIL: not every node is reachable through the proxy")
+            failed = True
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
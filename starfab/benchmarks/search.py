@@ -0,0 +1,118 @@
+"""
+Benchmark for filtering the P4K tree through its search index.
+
+Loads a synthetic archive into a `P4KModel` and applies a set of filters to a sorted proxy, once resolved through the
+model's `PathSearchIndex` and once with the per-row path test and recursive filtering. Indexed searches run in the
+thread pool, so the time the GUI thread is blocked is reported separately from the time until the result is shown.
+Fails if the two proxies don't show exactly the same rows, or if a burst of queries doesn't end up showing the result of
+the last one.
+"""
+import argparse
+import sys
+import time
+
+from starfab.benchmarks import qt_app
+from starfab.benchmarks.progressive_load import SyntheticArchive
+
+QUERIES = [
+    "file_00012", "set12", "et1/file_00", "group4/set", "dir1/group", "a/objects/dir3/", ".dds", "DIR10", "missing",
+    "ext:dds size>20KB", "date>2023-06 path:dir1/", "date:2023-03-05 -set1", "name:file_0001 size<=1.5kb",
+    "ext:xml,DDS date<2023-02", "size>big",
+]
+
+
+def visible_nodes(proxy, parent=None):
+    from starfab.gui import qtc
+
+    parent = parent or qtc.QModelIndex()
+    nodes = set()
+    for row in range(proxy.rowCount(parent)):
+        index = proxy.index(row, 0, parent)
+        nodes.add(proxy.mapToSource(index).internalPointer().node)
+        nodes |= visible_nodes(proxy, index)
+    return nodes
+
+
+def apply_filter(proxy, text, timeout):
+    """Set the filter `text` and wait for it to be applied, returns the time spent in `setFilterText`"""
+    from starfab.gui import qtc
+
+    start = time.perf_counter()
+    proxy.setFilterText(text)
+    blocked = time.perf_counter() - start
+    if proxy.is_searching:
+        loop = qtc.QEventLoop()
+        proxy.searching.connect(loop.quit)
+        qtc.QTimer.singleShot(int(timeout * 1000), loop.quit)
+        loop.exec()
+        proxy.searching.disconnect(loop.quit)
+    proxy.rowCount()
+    return blocked
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--files", type=int, default=100_000)
+    parser.add_argument("--timeout", type=float, default=300)
+    args = parser.parse_args(argv)
+
+    app = qt_app()
+
+    from starfab.gui import qtc
+    from starfab.models.p4k import P4KModel, P4KSortFilterProxyModelArchive
+
+    owner = qtc.QObject()
+    model = P4KModel(owner)
+    model.loader_task_status_msg = ""
+    loop = qtc.QEventLoop()
+    model.loaded.connect(loop.quit)
+    qtc.QTimer.singleShot(int(args.timeout * 1000), loop.quit)
+    model.load(SyntheticArchive(args.files))
+    loop.exec()
+    if not model.is_loaded:
+        print(f"FAIL: model did not finish loading within {args.timeout}s")
+        return 1
+
+    proxies = {}
+    for indexed in (True, False):
+        proxy = P4KSortFilterProxyModelArchive()
+        proxy.use_search_index = indexed
+        proxy.setSourceModel(model)
+        proxy.sort(0, qtc.Qt.AscendingOrder)
+        proxies[indexed] = proxy
+
+    print(f"{len(model.nodes) - 1} nodes")
+    failed = False
+    for case_sensitivity in (qtc.Qt.CaseInsensitive, qtc.Qt.CaseSensitive):
+        for proxy in proxies.values():
+            proxy.setFilterCaseSensitivity(case_sensitivity)
+        for query in QUERIES:
+            timings = {}
+            for indexed, proxy in proxies.items():
+                start = time.perf_counter()
+                blocked = apply_filter(proxy, query, args.timeout)
+                timings[indexed] = (blocked, time.perf_counter() - start)
+            indexed_nodes, scanned_nodes = (visible_nodes(proxies[_]) for _ in (True, False))
+            print(
+                f"{query!r:>30} {'' if case_sensitivity == qtc.Qt.CaseInsensitive else '(case)':<6} "
+                f"{len(indexed_nodes):>8} rows  indexed {timings[True][1]:.4f}s "
+                f"(blocked {timings[True][0]:.4f}s)  scanned {timings[False][1]:.4f}s"
+            )
+            if indexed_nodes != scanned_nodes:
+                print(f"FAIL: {query!r} shows {len(indexed_nodes ^ scanned_nodes)} different rows through the index")
+                failed = True
+
+    # only the result of the last query of a burst should be applied, the others are cancelled or discarded
+    burst = QUERIES[:4]
+    for query in burst[:-1]:
+        proxies[True].setFilterText(query)
+    for proxy in proxies.values():
+        apply_filter(proxy, burst[-1], args.timeout)
+    if proxies[True]._filter != burst[-1] or visible_nodes(proxies[True]) != visible_nodes(proxies[False]):
+        print("FAIL: a burst of queries did not end with the last query applied")
+        failed = True
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
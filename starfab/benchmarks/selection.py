@@ -0,0 +1,83 @@
+"""
+Benchmark for resolving tree selections into the files below them.
+
+Loads a synthetic archive into a `P4KModel` and resolves selections of directories into their leaf items with
+`leafItems`, once in the source tree through the filter's mask and once by walking the proxy, for a set of filters.
+Fails if the two don't return the same items.
+"""
+import argparse
+import sys
+import time
+
+from starfab.benchmarks import qt_app
+from starfab.benchmarks.progressive_load import SyntheticArchive
+from starfab.benchmarks.search import apply_filter
+
+FILTERS = ["", "set1", "ext:dds size>20KB", "dir3/group", "missing"]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--files", type=int, default=100_000)
+    parser.add_argument("--timeout", type=float, default=300)
+    args = parser.parse_args(argv)
+
+    app = qt_app()
+
+    from starfab.gui import qtc
+    from starfab.models.p4k import P4KModel, P4KSortFilterProxyModelArchive
+
+    class WalkingSortFilterProxyModel(P4KSortFilterProxyModelArchive):
+        def acceptedNodes(self):
+            return None
+
+    owner = qtc.QObject()
+    model = P4KModel(owner)
+    model.loader_task_status_msg = ""
+    loop = qtc.QEventLoop()
+    model.loaded.connect(loop.quit)
+    qtc.QTimer.singleShot(int(args.timeout * 1000), loop.quit)
+    model.load(SyntheticArchive(args.files))
+    loop.exec()
+    if not model.is_loaded:
+        print(f"FAIL: model did not finish loading within {args.timeout}s")
+        return 1
+
+    proxies = {"source": P4KSortFilterProxyModelArchive(), "proxy": WalkingSortFilterProxyModel()}
+    for proxy in proxies.values():
+        proxy.setSourceModel(model)
+        proxy.sort(0, qtc.Qt.AscendingOrder)
+
+    def selections(proxy):
+        """The top level directory, and the first few directories two levels further down"""
+        objects = proxy.index(0, 0, proxy.index(0, 0, qtc.QModelIndex()))
+        dirs = [proxy.index(_, 0, objects) for _ in range(min(3, proxy.rowCount(objects)))]
+        return {
+            "Data": [proxy.index(0, 0, qtc.QModelIndex())],
+            "3 dirs": [_ for _ in dirs if _.isValid()],
+        }
+
+    print(f"{len(model.nodes) - 1} nodes")
+    failed = False
+    for text in FILTERS:
+        for proxy in proxies.values():
+            apply_filter(proxy, text, args.timeout)
+        for name in selections(proxies["source"]):
+            timings, leaves = {}, {}
+            for kind, proxy in proxies.items():
+                selection = selections(proxy)[name]
+                start = time.perf_counter()
+                leaves[kind] = {_.node for _ in proxy.leafItems(selection)}
+                timings[kind] = time.perf_counter() - start
+            print(
+                f"{text!r:>22} {name:>7} {len(leaves['source']):>8} items  source {timings['source']:.4f}s  "
+                f"proxy {timings['proxy']:.4f}s"
+            )
+            if leaves["source"] != leaves["proxy"]:
+                print(f"FAIL: {name} with {text!r} resolves to {len(leaves['source'] ^ leaves['proxy'])} different items")
+                failed = True
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
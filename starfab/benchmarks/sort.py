@@ -0,0 +1,93 @@
+"""
+Benchmark for sorting the P4K tree by precomputed ranks.
+
+Loads a synthetic archive into a `P4KModel` and sorts a proxy by every column and order, once through the model's sort
+ranks and once by comparing the rows' data. The directories down to `--depth` are mapped so their children are sorted
+too. Fails if the two proxies don't show the sorted column's values in the same order, rows with equal values may be
+shown in a different order.
+"""
+import argparse
+import sys
+import time
+
+from starfab.benchmarks import qt_app
+from starfab.benchmarks.progressive_load import SyntheticArchive
+
+
+def visible_order(proxy, depth, parent=None, order=None):
+    """Returns the source nodes of the rows down to `depth` in the order they are shown, by their parent's node"""
+    from starfab.gui import qtc
+
+    parent = parent or qtc.QModelIndex()
+    order = {} if order is None else order
+    children = order[proxy.mapToSource(parent).internalPointer().node if parent.isValid() else 0] = []
+    for row in range(proxy.rowCount(parent)):
+        index = proxy.index(row, 0, parent)
+        children.append(proxy.mapToSource(index).internalPointer().node)
+        if depth > 1:
+            visible_order(proxy, depth - 1, index, order)
+    return order
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--files", type=int, default=100_000)
+    parser.add_argument("--depth", type=int, default=6)
+    parser.add_argument("--timeout", type=float, default=300)
+    args = parser.parse_args(argv)
+
+    app = qt_app()
+
+    from starfab.gui import qtc
+    from starfab.models.p4k import P4KModel, P4KSortFilterProxyModelArchive
+
+    class DataSortFilterProxyModel(P4KSortFilterProxyModelArchive):
+        def sortRanks(self):
+            return None
+
+    owner = qtc.QObject()
+    model = P4KModel(owner)
+    model.loader_task_status_msg = ""
+    loop = qtc.QEventLoop()
+    model.loaded.connect(loop.quit)
+    qtc.QTimer.singleShot(int(args.timeout * 1000), loop.quit)
+    model.load(SyntheticArchive(args.files))
+    loop.exec()
+    if not model.is_loaded:
+        print(f"FAIL: model did not finish loading within {args.timeout}s")
+        return 1
+
+    proxies = {"ranked": P4KSortFilterProxyModelArchive(), "data": DataSortFilterProxyModel()}
+    for proxy in proxies.values():
+        proxy.setSourceModel(model)
+        visible_order(proxy, args.depth)
+
+    print(f"{len(model.nodes) - 1} nodes")
+    failed = False
+    for column, name in enumerate(model.columns):
+        for order in (qtc.Qt.AscendingOrder, qtc.Qt.DescendingOrder):
+            timings, orders = {}, {}
+            for kind, proxy in proxies.items():
+                start = time.perf_counter()
+                proxy.sort(column, order)
+                timings[kind] = time.perf_counter() - start
+                orders[kind] = visible_order(proxy, args.depth)
+            print(
+                f"{name:>15} {order.name:<16} {sum(map(len, orders['ranked'].values())):>8} rows  ranked {timings['ranked']:.4f}s  "
+                f"data {timings['data']:.4f}s"
+            )
+            shown = {
+                kind: {
+                    parent: [model.itemForNode(_).data(column, qtc.Qt.DisplayRole) for _ in children]
+                    for parent, children in order_by_parent.items()
+                }
+                for kind, order_by_parent in orders.items()
+            }
+            if shown["ranked"] != shown["data"]:
+                print(f"FAIL: sorting by {name} ({order.name}) shows the rows in a different order through the ranks")
+                failed = True
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
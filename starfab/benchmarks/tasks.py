@@ -0,0 +1,86 @@
+"""
+Benchmark for the isolation of the task scheduler's lanes.
+
+Queues more bulk work than the bulk lane has threads, then measures how long short interactive tasks wait before they
+start, once through the scheduler's interactive lane and once through a single shared thread pool. Also counts how
+often progress reported for every item reaches the GUI. Fails if interactive tasks wait for the bulk work in their
+lane, or if progress isn't coalesced.
+"""
+import argparse
+import sys
+import time
+
+from starfab.benchmarks import qt_app
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--bulk", type=int, default=0, help="number of queued bulk tasks, 4 per bulk thread by default")
+    parser.add_argument("--bulk-duration", type=float, default=0.25, help="seconds each bulk task takes")
+    parser.add_argument("--interactive", type=int, default=10, help="number of interactive tasks")
+    args = parser.parse_args(argv)
+
+    app = qt_app()
+
+    from starfab.gui import qtc
+    from starfab.tasks import Lane, TaskScheduler, UPDATE_INTERVAL
+
+    def bulk_work(task, duration, items=1000):
+        for _ in range(items):
+            task.token.check()
+            time.sleep(duration / items)
+            task.advance()
+
+    def latencies(start_interactive, count):
+        waits = []
+        while len(waits) < count:
+            expected = len(waits) + 1
+            queued = time.perf_counter()
+            start_interactive(lambda *_, q=queued: waits.append(time.perf_counter() - q))
+            while len(waits) < expected:
+                app.processEvents(qtc.QEventLoop.AllEvents, 10)
+        return waits
+
+    def saturate(scheduler):
+        pool = scheduler.pool(Lane.BULK)
+        count = args.bulk or 4 * pool.maxThreadCount()
+        return [scheduler.run("bulk", bulk_work, args.bulk_duration, lane=Lane.BULK) for _ in range(count)]
+
+    scheduler = TaskScheduler()
+    updates = []
+    scheduler.tasks_updated.connect(lambda: updates.append(1))
+
+    # separate lanes, while the bulk tasks report progress for every item
+    bulk = saturate(scheduler)
+    start = time.perf_counter()
+    lane_waits = latencies(lambda fn: scheduler.run("interactive", fn, lane=Lane.INTERACTIVE), args.interactive)
+    while scheduler.tasks:
+        app.processEvents(qtc.QEventLoop.AllEvents, 10)
+    elapsed = time.perf_counter() - start
+    reported = sum(_.value for _ in bulk)
+    scheduler.wait()
+
+    # one pool shared by everything, as with `QThreadPool.globalInstance()`, a single task shows the wait
+    shared = TaskScheduler()
+    saturate(shared)
+    shared_waits = latencies(lambda fn: shared.run("interactive", fn, lane=Lane.BULK), 1)
+    shared.wait()
+
+    print(
+        f"bulk lane {shared.pool(Lane.BULK).maxThreadCount()} threads, {len(bulk)} x {args.bulk_duration}s queued\n"
+        f"interactive lane  max wait {max(lane_waits):.4f}s\n"
+        f"shared pool       max wait {max(shared_waits):.4f}s\n"
+        f"{reported} progress reports, {len(updates)} GUI updates in {elapsed:.2f}s"
+    )
+    failed = False
+    if max(lane_waits) >= args.bulk_duration:
+        print("FAIL: interactive tasks waited for bulk work")
+        failed = True
+    if len(updates) > elapsed * 1000 / UPDATE_INTERVAL + 2:
+        print(f"FAIL: progress reached the GUI more than every {UPDATE_INTERVAL}ms")
+        failed = True
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
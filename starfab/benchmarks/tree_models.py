@@ -0,0 +1,70 @@
+"""
+Regression benchmark for row/parent resolution in the tree models.
+
+Builds a synthetic directory with `--children` entries (50k by default) and a directory with a tenth as many, then
+times `index()`, `parent()`, `row()` and `indexForPath()` for every child of both. The per-call cost has to stay flat
+as the directory grows, the benchmark fails if the large directory is more than `--max-ratio` times slower per call
+than the small one.
+"""
+import argparse
+import sys
+
+from starfab.benchmarks import qt_app, timed
+
+
+def build_model(children):
+    from starfab.models.common import PathArchiveTreeModel, ROOT_NODE
+
+    model = PathArchiveTreeModel(None)
+    parent = model.appendNode(model.appendNode(ROOT_NODE, "Data"), "Textures")
+    model._parent_cache["data/textures"] = parent
+    for i in range(children):
+        model.appendNode(parent, f"texture_{i:06d}.dds")
+    return model
+
+
+def run_benchmark(children):
+    model = build_model(children)
+    directory = model.indexForPath("Data/Textures")
+    results = {"children": children}
+
+    with timed(results, "index"):
+        indexes = [model.index(row, 0, directory) for row in range(children)]
+    with timed(results, "parent"):
+        for index in indexes:
+            model.parent(index)
+    with timed(results, "row"):
+        for index in indexes:
+            index.internalPointer().row()
+    with timed(results, "indexForPath"):
+        for row in range(children):
+            model.indexForPath(f"Data/Textures/texture_{row:06d}.dds")
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--children", type=int, default=50_000)
+    parser.add_argument("--max-ratio", type=float, default=3.0)
+    args = parser.parse_args(argv)
+
+    app = qt_app()
+    small = run_benchmark(max(1, args.children // 10))
+    large = run_benchmark(args.children)
+
+    failed = False
+    print(f"{'operation':<16}{small['children']:>12} children{large['children']:>12} children{'ratio':>10}")
+    for op in ("index", "parent", "row", "indexForPath"):
+        small_per_call = small[op] / small["children"]
+        large_per_call = large[op] / large["children"]
+        ratio = large_per_call / small_per_call if small_per_call else 0
+        failed |= ratio > args.max_ratio
+        print(
+            f"{op:<16}{small_per_call * 1e6:>12.2f} us/call{large_per_call * 1e6:>12.2f} us/call{ratio:>10.2f}"
+            f"{'  FAIL' if ratio > args.max_ratio else ''}"
+        )
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,140 @@
+"""
+Benchmark for the update check made at startup.
+
+Serves a release from a local stub of the GitLab releases API and checks it with `UpdateChecker`: once without a cached
+result, once with a fresh one, once with an expired one, and once against a server that responds slower than the
+timeout. Reports how long each check blocked the GUI thread and how long its result took. Fails if a check blocked the
+GUI thread, if the cache didn't prevent a request or the expired cache did, or if the slow check outlived its timeout.
+Uses Qt's test mode settings, so the real settings aren't touched.
+"""
+import argparse
+import json
+import sys
+import threading
+import time
+from datetime import timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from starfab.benchmarks import qt_app
+
+
+class StubReleasesServer(ThreadingHTTPServer):
+    """Answers every GET with `releases` as JSON after `delay` seconds, and counts the requests"""
+
+    daemon_threads = True
+
+    def __init__(self, releases, delay=0.0):
+        super().__init__(("127.0.0.1", 0), _StubReleasesHandler)
+        self.releases = releases
+        self.delay = delay
+        self.requests = 0
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.server_address[1]}/api/v4/projects/0/releases"
+
+
+class _StubReleasesHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        self.server.requests += 1
+        time.sleep(self.server.delay)
+        body = json.dumps(self.server.releases).encode("utf-8")
+        try:
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+        except OSError:
+            pass  # the client gave up waiting
+
+    def log_message(self, format, *args):
+        pass
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--latency", type=float, default=0.2, help="seconds the stub server takes to respond")
+    parser.add_argument("--timeout", type=float, default=1.0, help="update check timeout in seconds")
+    parser.add_argument("--max-block", type=float, default=0.05, help="seconds a check may block the GUI thread")
+    args = parser.parse_args(argv)
+
+    app = qt_app()
+
+    from starfab.gui import qtc
+
+    # keep the cached result out of the user's settings
+    qtc.QStandardPaths.setTestModeEnabled(True)
+
+    from starfab import __version__
+    from starfab.settings import settings
+    from starfab.updates import UPDATE_CHECK_TTL, UpdateChecker
+
+    # the running version, so no dialog is shown
+    releases = [{"tag_name": __version__, "_links": {"self": "http://127.0.0.1/release"}, "description": "stub"}]
+
+    def check(server, ttl=UPDATE_CHECK_TTL):
+        results = []
+        checker = UpdateChecker(url=server.url, ttl=ttl, timeout=args.timeout)
+        checker.checked.connect(results.append)
+        before = server.requests
+        start = time.perf_counter()
+        checker.check()
+        blocked = time.perf_counter() - start
+        while not results and time.perf_counter() - start < args.timeout + args.latency + 5:
+            app.processEvents(qtc.QEventLoop.AllEvents, 10)
+        elapsed = time.perf_counter() - start
+        return {
+            "blocked": blocked,
+            "elapsed": elapsed,
+            "release": results[0] if results else None,
+            "answered": bool(results),
+            "requests": server.requests - before,
+        }
+
+    results = {}
+    server = StubReleasesServer(releases, delay=args.latency)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        settings.setValue("updateCheckCache", "")
+        results["uncached"] = check(server)
+        results["cached"] = check(server)
+        results["expired"] = check(server, ttl=timedelta(0))
+    finally:
+        server.shutdown()
+
+    slow = StubReleasesServer(releases, delay=args.timeout * 2)
+    threading.Thread(target=slow.serve_forever, daemon=True).start()
+    try:
+        results["timed out"] = check(slow)
+    finally:
+        slow.shutdown()
+    settings.setValue("updateCheckCache", "")
+    settings.sync()
+
+    print(f"{'check':<12}{'blocked':>10}{'result':>10}{'requests':>10}  release")
+    for name, r in results.items():
+        release = r["release"]["tag_name"] if r["release"] else "-"
+        print(f"{name:<12}{r['blocked'] * 1000:>8.1f}ms{r['elapsed']:>9.3f}s{r['requests']:>10}  {release}")
+
+    failed = False
+    for name, r in results.items():
+        if r["blocked"] > args.max_block:
+            print(f"FAIL: the {name} check blocked the GUI thread for {r['blocked']:.3f}s")
+            failed = True
+        if not r["answered"]:
+            print(f"FAIL: the {name} check never finished")
+            failed = True
+    for name, requests in (("uncached", 1), ("cached", 0), ("expired", 1)):
+        if results[name]["requests"] != requests or results[name]["release"] is None:
+            print(f"FAIL: the {name} check made {results[name]['requests']} requests, expected {requests}")
+            failed = True
+    timed_out = results["timed out"]
+    if timed_out["release"] is not None or timed_out["elapsed"] > args.timeout * 1.5 + 0.5:
+        print(f"FAIL: the check against the slow server took {timed_out['elapsed']:.3f}s, timeout {args.timeout}s")
+        failed = True
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
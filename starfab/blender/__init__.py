@@ -15,6 +15,7 @@ from scdatatools.blender import addon as scdt_blender_addon
 from scdatatools.blender.utils import available_blender_installations
 from starfab.gui import qtc, qtw, qtg
 from starfab.log import getLogger
+from starfab.tasks import Lane, get_scheduler
 from . import addon as starfab_blender_addon
 from .conf import LINK_SECRET_LEN, LINK_TOKEN_LEN, BLENDERLINK_CONFIG
 from .status_dialog import BlenderLinkStatusDialog
@@ -201,14 +202,14 @@ class BlenderManager(QObject):
         self.blender = ''
         self.preferred_blender = blender.as_posix() if isinstance(blender, Path) else str(blender)
         self.starfab.settings.setValue("external_tools/blender/preferred", self.preferred_blender)
-        qtc.QThreadPool.globalInstance().start(CheckBlenderVersions(self))
+        get_scheduler().start(CheckBlenderVersions(self), Lane.BACKGROUND)
 
     @qtc.Slot(list)
     def _handle_set_additional_paths(self, blender_paths, init=False):
         self.additional_blender_paths = [p.as_posix() if isinstance(p, Path) else p for p in blender_paths]
         if not init:
             self.starfab.settings.setValue("external_tools/blender/additional_paths", self.additional_blender_paths)
-            qtc.QThreadPool.globalInstance().start(CheckBlenderVersions(self))
+            get_scheduler().start(CheckBlenderVersions(self), Lane.BACKGROUND)
 
     @qtc.Slot(dict)
     def _handle_update_versions(self, available_versions):
@@ -16,6 +16,7 @@ from starfab.log import getLogger
 from starfab.gui import qtg, qtw, qtc
 from starfab.settings import settings
 from starfab.models.common import ExportRunner
+from starfab.tasks import Lane, get_scheduler
 from starfab.gui.widgets.export_utils import ExportOptionsWidget
 from starfab.models.p4k import P4KItem
 
@@ -64,7 +65,7 @@ class P4KExportDialog(qtw.QDialog):
                 save_to=self.save_to,
                 export_options=options,
             )
-            qtc.QThreadPool.globalInstance().start(export_runner)
+            get_scheduler().start(export_runner, Lane.BULK)
             self.close()
         else:
             return qtw.QMessageBox.warning(
@@ -11,6 +11,7 @@ from starfab.gui import qtw
 from starfab.gui.dialogs import list_dialog
 from starfab.gui.widgets import editor
 from starfab.log import getLogger
+from starfab.models.model_cache import clear_model_cache, model_cache_size
 from starfab.resources import RES_PATH
 
 if typing.TYPE_CHECKING:
@@ -51,6 +52,11 @@ class SettingsDialog(qtw.QDialog):
         self.enableErrorReporting.stateChanged.connect(self._save_settings)
         self.autoOpenMostRecent.stateChanged.connect(self._save_settings)
 
+        # model cache
+        self.modelCacheEnabled.stateChanged.connect(self._save_settings)
+        self.modelCacheMaxSize.valueChanged.connect(self._save_settings)
+        self.clearModelCache.clicked.connect(self._clear_model_cache)
+
         # external tools
         open_dir_icon = qtw.QApplication.style().standardIcon(qtw.QStyle.SP_DirIcon)
         cgfconvfind = self.cgfconverterPath.addAction(open_dir_icon, qtw.QLineEdit.TrailingPosition)
@@ -104,6 +110,11 @@ class SettingsDialog(qtw.QDialog):
         self.enableErrorReporting.setChecked(parse_bool(self.starfab.settings.value("enableErrorReporting")))
         self.autoOpenMostRecent.setChecked(parse_bool(self.starfab.settings.value("autoOpenRecent")))
 
+        # model cache
+        self.modelCacheEnabled.setChecked(parse_bool(self.starfab.settings.value("model_cache/enabled")))
+        self.modelCacheMaxSize.setValue(int(self.starfab.settings.value("model_cache/max_size_mb")))
+        self._sync_model_cache_size()
+
         # external tools
         self.cgfconverterPath.setText(self.starfab.settings.value("external_tools/cgf-converter"))
         self.texconvPath.setText(self.starfab.settings.value("external_tools/texconv"))
@@ -165,6 +176,14 @@ class SettingsDialog(qtw.QDialog):
         width = self.blenderComboBox.minimumSizeHint().width()
         self.blenderComboBox.view().setMinimumWidth(width)
 
+    def _sync_model_cache_size(self):
+        self.modelCacheSize.setText(f"{model_cache_size() / 1024 / 1024:.0f} MB used")
+
+    def _clear_model_cache(self):
+        freed = clear_model_cache()
+        logger.info(f"Cleared {freed / 1024 / 1024:.0f} MB of cached models")
+        self._sync_model_cache_size()
+
     def _reset_settings(self):
         self.starfab.settings.configure_defaults()
         self.close()
@@ -181,6 +200,10 @@ class SettingsDialog(qtw.QDialog):
         self.starfab.settings.setValue("enableErrorReporting", self.enableErrorReporting.isChecked())
         self.starfab.settings.setValue("autoOpenRecent", self.autoOpenMostRecent.isChecked())
 
+        # model cache
+        self.starfab.settings.setValue("model_cache/enabled", self.modelCacheEnabled.isChecked())
+        self.starfab.settings.setValue("model_cache/max_size_mb", self.modelCacheMaxSize.value())
+
         # external tools
         self.starfab.settings.setValue("external_tools/cgf-converter", self.cgfconverterPath.text())
         self.starfab.settings.setValue("external_tools/texconv", self.texconvPath.text())
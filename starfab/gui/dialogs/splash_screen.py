@@ -13,23 +13,14 @@ class StarFabSplashScreen(qtw.QSplashScreen):
     def mousePressEvent(self, event) -> None:
         return None  # override close on click
 
-    def update_status_bar(self, progress_tasks):
-        min = 0
-        max = 0
-        value = 0
-        msgs = []
-        for task in progress_tasks.values():
-            if task["msg"]:
-                msgs.append(task["msg"])
-            value += task["value"]
-            min += task["min"]
-            max += task["max"]
-
-        msg = ", ".join(msgs).strip()
+    def update_status_bar(self, tasks):
+        value = sum(min(_.value, _.total) for _ in tasks)
+        total = sum(max(_.total, 0) for _ in tasks)
+        msg = ", ".join(_.message or _.title for _ in tasks).strip()
         self.progress_bar.setFormat(
             f"{msg} - %v / %m - %p%" if msg else "%v / %m - %p%"
         )
-        self.progress_bar.setRange(min, max)
+        self.progress_bar.setRange(0, total)
         self.progress_bar.setValue(value)
         if self.progress_bar.isHidden():
             self.progress_bar.show()
@@ -6,7 +6,7 @@ from scdatatools.engine.chunkfile import chunks, load_chunk_file, GeometryChunkF
 from starfab import get_starfab
 from starfab.gui import qtc, qtw
 from starfab.gui.widgets.common import CollapsableWidget
-from starfab.gui.widgets.editor import Editor
+from starfab.gui.widgets import editor
 from starfab.hooks import COLLAPSABLE_GEOMETRY_PREVIEW_WIDGET
 from starfab.models.common import ContentItem
 from starfab.plugins import plugin_manager
@@ -32,7 +32,7 @@ def widget_for_chunk(info, obj, chunk, inline=False):
     layout = qtw.QHBoxLayout()
 
     if isinstance(chunk, (chunks.CryXMLBChunk, chunks.JSONChunk)):
-        e = Editor(
+        e = editor.Editor(
             ContentItem(
                 f"{info.path.name}:{chunk.chunk_header.id}.json",
                 info.path,
@@ -43,7 +43,7 @@ def widget_for_chunk(info, obj, chunk, inline=False):
         e.setMinimumHeight(600)
         layout.addWidget(e)
     elif isinstance(chunk, chunks.SourceInfoChunk):
-        e = Editor(
+        e = editor.Editor(
             ContentItem(
                 f"{info.path.name}:{chunk.chunk_header.id}.txt",
                 info.path,
@@ -11,13 +11,18 @@ from starfab import get_starfab
 from starfab.gui import qtw, qtc, qtg
 from starfab.resources import RES_PATH
 from starfab.models.common import ContentItem
-from starfab.gui.widgets.editor import Editor
+from starfab.models.record_cache import record_cache, serialized_record
+from starfab.gui.widgets import editor
 from starfab.gui.widgets.common import CollapsableWidget
 from starfab.plugins import plugin_manager
 from starfab.hooks import COLLAPSABLE_GEOMETRY_PREVIEW_WIDGET
+from starfab.tasks import Lane, get_scheduler
+from starfab.trace import span
 
 
 DCB_OBJ_WIDGETS_HOOK = "starfab.gui.widgets.dcbrecord.dcbobjview"
+# the most records listed in a record's "Referenced by" section
+MAX_REFERENCED_BY = 1000
 
 
 def _handle_open_record(guid):
@@ -124,6 +129,9 @@ class DCBLazyCollapsableObjWidget(CollapsableWidget):
         except Exception as e:
             get_starfab().statusBar.showMessage(f"Failed to copy object: {e}")
 
+    def _contents(self) -> str:
+        return serialized_record(get_starfab().sc.datacore, self.obj, "json", depth=1).decode("utf-8")
+
     def expand(self):
         if not self._loaded:
             r = DCBObjWidget(self.obj)
@@ -135,19 +143,48 @@ class DCBLazyCollapsableObjWidget(CollapsableWidget):
         if not text:
             _ = True
         elif ignore_case:
-            _ = (
-                super().filter(text, ignore_case)
-                or text.lower()
-                in get_starfab().sc.datacore.dump_record_json(self.obj, depth=1).lower()
-            )
+            _ = super().filter(text, ignore_case) or text.lower() in self._contents().lower()
         else:
-            _ = super().filter(
-                text, ignore_case
-            ) or text in get_starfab().sc.datacore.dump_record_json(self.obj, depth=1)
+            _ = super().filter(text, ignore_case) or text in self._contents()
         self.setVisible(_)
         return _
 
 
+class DCBReferencedByWidget(CollapsableWidget):
+    """Lists the records that reference a record, built once it's first expanded"""
+
+    def __init__(self, guids, *args, **kwargs):
+        super().__init__(f"Referenced by ({len(guids)})", expand=False, *args, **kwargs)
+        self.guids = guids
+        self._loaded = False
+
+    def expand(self):
+        if not self._loaded:
+            self._loaded = True
+            records_by_guid = get_starfab().sc.datacore.records_by_guid
+            layout = self.content.layout()
+            records = sorted(
+                (records_by_guid[_] for _ in self.guids if _ in records_by_guid), key=lambda _: (_.type, _.name)
+            )
+            for record in records[:MAX_REFERENCED_BY]:
+                widget = qtw.QWidget()
+                row = qtw.QHBoxLayout()
+                row.setContentsMargins(0, 0, 0, 0)
+                l = qtw.QLineEdit(f"{record.name} ({record.id.value})", parent=self)
+                l.setCursorPosition(0)
+                l.setReadOnly(True)
+                row.addWidget(l)
+                b = qtw.QPushButton("→", parent=self)
+                b.setFixedSize(24, 24)
+                b.clicked.connect(partial(_handle_open_record, record.id.value))
+                row.addWidget(b)
+                widget.setLayout(row)
+                layout.addRow(record.type, widget)
+            if len(records) > MAX_REFERENCED_BY:
+                layout.addRow(qtw.QLabel(f"… and {len(records) - MAX_REFERENCED_BY} more", parent=self))
+        super().expand()
+
+
 class DCBObjWidget(qtw.QWidget):
     def __init__(self, obj, *args, **kwargs):
         super().__init__(*args, **kwargs)
@@ -204,6 +241,9 @@ class DCBObjWidget(qtw.QWidget):
 
 
 class DCBRecordItemView(qtw.QWidget):
+    # emitted with the format and contents of the record once it has been serialized in the background
+    record_serialized = qtc.Signal(str, object)
+
     def __init__(self, record_item, starfab, *args, **kwargs):
         super().__init__(*args, **kwargs)
 
@@ -229,13 +269,15 @@ class DCBRecordItemView(qtw.QWidget):
         l.setReadOnly(True)
         self.record_info.addRow("Path", l)
 
-        b = qtw.QPushButton("View XML")
+        self.view_buttons = {}
+        b = self.view_buttons["xml"] = qtw.QPushButton("View XML")
         b.clicked.connect(self._on_view_xml)
         self.record_actions.insertWidget(self.record_actions.count() - 1, b)
 
-        b = qtw.QPushButton("View JSON")
+        b = self.view_buttons["json"] = qtw.QPushButton("View JSON")
         b.clicked.connect(self._on_view_json)
         self.record_actions.insertWidget(self.record_actions.count() - 1, b)
+        self.record_serialized.connect(self._open_viewer)
 
         self.scrollArea.setWidgetResizable(True)
         self.record_widget = DCBObjWidget(self.record_item.record, parent=self)
@@ -264,18 +306,60 @@ class DCBRecordItemView(qtw.QWidget):
 
         self.record_widget.show()
 
+        # the references between records are indexed in the background after the datacore has loaded
+        self.referenced_by_widget = None
+        datacore_model = self.starfab.sc_manager.datacore_model
+        if datacore_model.reference_graph is not None:
+            self._add_referenced_by()
+        else:
+            datacore_model.record_indexes_loaded.connect(self._add_referenced_by)
+
         self.record_filter.editingFinished.connect(self._on_filter_changed)
 
+    @qtc.Slot()
+    def _add_referenced_by(self):
+        if self.referenced_by_widget is not None:
+            return
+        graph = self.starfab.sc_manager.datacore_model.reference_graph
+        self.referenced_by_widget = DCBReferencedByWidget(graph.referenced_by(self.record_item.guid), parent=self)
+        self.record_widgets.addWidget(self.referenced_by_widget)
+
     def _on_filter_changed(self):
         self.record_widget.filter(self.record_filter.text())
 
     def _on_view(self, mode):
-        content_item = ContentItem(
-            f'{self.record_item.name}.{mode}',
-            self.record_item.path,
-            self.record_item.contents(mode=mode),
+        if (contents := record_cache.cached(self.record_item.guid, mode)) is not None:
+            self._open_viewer(mode, contents)
+            return
+        # large records take a while to serialize, do it in the background and open the viewer once it's done
+        self.view_buttons[mode].setEnabled(False)
+        get_scheduler().run(
+            f"Serializing {self.record_item.name} as {mode.upper()}",
+            self._serialize,
+            mode,
+            lane=Lane.INTERACTIVE,
+            cancellable=False,
         )
-        widget = Editor(content_item)
+
+    def _serialize(self, task, mode):
+        contents = None
+        try:
+            with span(f"record {mode}", "view"):
+                contents = self.record_item.contents(mode=mode).getvalue()
+        finally:
+            try:
+                self.record_serialized.emit(mode, contents)
+            except RuntimeError:
+                pass  # the view was closed in the meantime
+
+    @qtc.Slot(str, object)
+    def _open_viewer(self, mode, contents):
+        self.view_buttons[mode].setEnabled(True)
+        if contents is None:
+            return
+        content_item = ContentItem(f'{self.record_item.name}.{mode}', self.record_item.path, contents)
+        with span("open viewer", "view"):
+            widget = editor.Editor(content_item)
         if widget is not None:
             self.starfab.add_tab_widget(
                 f"{self.record_item.path}:{mode}_editor",
@@ -1,5 +1,13 @@
-from .pyconsole import PyConsoleDockWidget
 from .file_view import FileViewDock
 from .datacore_widget import DCBTreeWidget
 from .tagdatabase_widget import TagDatabaseView
 from .p4k_widget import P4KView
+
+
+def __getattr__(name):
+    # qtconsole and its kernel are only imported once the console is first opened
+    if name == "PyConsoleDockWidget":
+        from .pyconsole import PyConsoleDockWidget
+
+        return PyConsoleDockWidget
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -4,7 +4,6 @@ import shutil
 import time
 from functools import partial
 from pathlib import Path
-from qtpy import QtMultimedia
 from qtpy.QtCore import Signal, Slot
 
 from starfab.gui import qtc, qtw, qtg
@@ -18,8 +17,9 @@ from starfab.models.audio import (
     AudioTreeLoader,
     AudioTreeItem,
 )
-from starfab.models.common import AudioConverter
+from starfab.models.common import AudioConverter, NO_NODE
 from starfab.resources import RES_PATH
+from starfab.tasks import Lane, get_scheduler
 from starfab.utils import show_file_in_filemanager
 
 logger = getLogger(__name__)
@@ -60,15 +60,11 @@ class AudioTreeWidget(StarFabSearchableTreeWidget):
         self._auto_play = True
         self._audio_buffer = None
         self._audio_tmp = None
-        self._media_player = QtMultimedia.QMediaPlayer()
-        self._media_audio_output = QtMultimedia.QAudioOutput()
-        self._media_player.setAudioOutput(self._media_audio_output)
+        self._media_player = None
+        self._media_audio_output = None
+        self._volume = 0
 
         self._should_play = False
-        self._media_player.durationChanged.connect(self._handle_duration_changed)
-        self._media_player.positionChanged.connect(self._handle_position_changed)
-        self._media_player.playbackStateChanged.connect(self._handle_state_changed)
-        self._media_player.mediaStatusChanged.connect(self._handle_media_status_changed)
 
         self.audio_conversion_complete.connect(self._handle_audio_conversion)
 
@@ -117,13 +113,30 @@ class AudioTreeWidget(StarFabSearchableTreeWidget):
         extract = self.ctx_manager.menus[""].addAction("Extract to...")
         extract.triggered.connect(partial(self.ctx_manager.handle_action, "extract"))
 
+    @property
+    def media_player(self):
+        """The `QMediaPlayer`, created the first time it's used so QtMultimedia isn't loaded until then"""
+        if self._media_player is None:
+            from qtpy import QtMultimedia
+
+            self._media_player = QtMultimedia.QMediaPlayer()
+            self._media_audio_output = QtMultimedia.QAudioOutput()
+            self._media_audio_output.setVolume(self._volume)
+            self._media_player.setAudioOutput(self._media_audio_output)
+
+            self._media_player.durationChanged.connect(self._handle_duration_changed)
+            self._media_player.positionChanged.connect(self._handle_position_changed)
+            self._media_player.playbackStateChanged.connect(self._handle_state_changed)
+            self._media_player.mediaStatusChanged.connect(self._handle_media_status_changed)
+        return self._media_player
+
     def destroy(self, *args, **kwargs) -> None:
         if self._audio_tmp is not None:
             self._audio_tmp.unlink()
         return super().destroy(*args, **kwargs)
 
     def _handle_playback_released(self):
-        self._media_player.setPosition(self.playbackSlider.value())
+        self.media_player.setPosition(self.playbackSlider.value())
 
     def _handle_duration_changed(self, duration):
         self.durationLabel.setText(seconds_to_str(duration / 1000))
@@ -156,7 +169,7 @@ class AudioTreeWidget(StarFabSearchableTreeWidget):
             else:
                 self.sc_breadcrumbs.setText(f"{self._currently_playing.name}{wem_txt}")
 
-        if state == QtMultimedia.QMediaPlayer.PlaybackState.PlayingState:
+        if state == self._media_player.PlaybackState.PlayingState:
             self.playButton.hide()
             self.pauseButton.show()
             if self._currently_playing is not None:
@@ -168,7 +181,7 @@ class AudioTreeWidget(StarFabSearchableTreeWidget):
             self.pauseButton.hide()
 
         if (
-            state == QtMultimedia.QMediaPlayer.PlaybackState.StoppedState
+            state == self._media_player.PlaybackState.StoppedState
             and self._playlist
             and self._auto_play
         ):
@@ -182,8 +195,8 @@ class AudioTreeWidget(StarFabSearchableTreeWidget):
 
     def _handle_media_status_changed(self, status):
         # print(f'media status changed {status = }')
-        if status == QtMultimedia.QMediaPlayer.LoadedMedia and self._should_play:
-            self._media_player.play()
+        if status == self._media_player.MediaStatus.LoadedMedia and self._should_play:
+            self.media_player.play()
             self._should_play = False
 
     def _change_media(self, item, wem_index):
@@ -205,8 +218,8 @@ class AudioTreeWidget(StarFabSearchableTreeWidget):
         #     logger.error(f'Failed to open new audio buffer')
 
         if self._audio_tmp is not None:
-            self._media_player.setSource(qtc.QUrl())
-            qtc.QThreadPool.globalInstance().start(_AudioCleanup(self._audio_tmp))
+            self.media_player.setSource(qtc.QUrl())
+            get_scheduler().start(_AudioCleanup(self._audio_tmp), Lane.BACKGROUND)
             self._audio_tmp = None
 
         try:
@@ -214,7 +227,7 @@ class AudioTreeWidget(StarFabSearchableTreeWidget):
             self._currently_playing_wem_id = wem_index
             conv = AudioConverter(item.wems[wem_index])
             conv.signals.finished.connect(self._handle_audio_conversion)
-            qtc.QThreadPool.globalInstance().start(conv)
+            get_scheduler().start(conv, Lane.INTERACTIVE)
             # self._audio_tmp = self.starfab.sc.wwise.convert_wem(item.wems[wem_index], return_file=True)
             # self._media_player.setSource(qtc.QUrl.fromLocalFile(str(self._audio_tmp.absolute())))
         except Exception as e:
@@ -229,9 +242,8 @@ class AudioTreeWidget(StarFabSearchableTreeWidget):
         self.stop()
         if item is None:
             # TODO: _fake_item is a hacky hack hack way of just "getting it in", should be fixed
-            item = AudioTreeItem(
-                path=str(wem_id), model=self.sc_tree_model, atl_name=str(wem_id)
-            )
+            item = AudioTreeItem(self.sc_tree_model, NO_NODE)
+            item.name = item.atl_name = str(wem_id)
             item._wems = [wem_id]
             item._wems_loaded = True
         self._playlist = []
@@ -254,18 +266,20 @@ class AudioTreeWidget(StarFabSearchableTreeWidget):
             logger.debug(f'Playing converted audio file {ogg_path}')
             self._audio_tmp = ogg_path
             self._should_play = True
-            self._media_player.setSource(
+            self.media_player.setSource(
                 qtc.QUrl.fromLocalFile(str(self._audio_tmp.absolute()))
             )
             wem_item = self.wem_list.item(self._currently_playing_wem_id)
             self.wem_list.scrollToItem(wem_item)
-            self._media_player.play()
+            self.media_player.play()
         elif ogg_path:
             # we must have started playing a new song, unlink this file
             os.unlink(ogg_path)
 
     def set_volume(self, level):
-        self._media_audio_output.setVolume(level)
+        self._volume = level
+        if self._media_audio_output is not None:
+            self._media_audio_output.setVolume(level)
         self.volumeDial.setValue(level)
 
     def _update_wem_list(self, item):
@@ -294,10 +308,10 @@ class AudioTreeWidget(StarFabSearchableTreeWidget):
         else:
             wem_item = self.wem_list.item(self._currently_playing_wem_id)
             self.wem_list.scrollToItem(wem_item)
-            self._media_player.play()
+            self.media_player.play()
 
     def pause(self):
-        self._media_player.pause()
+        self.media_player.pause()
 
     def play_previous(self):
         # if a playlist and in the first two seconds, play the previous track in the playlist
@@ -322,11 +336,11 @@ class AudioTreeWidget(StarFabSearchableTreeWidget):
                 self.play(self._playlist[playlist_index], wem_index)
         else:
             # just play the same sound again if not playlist
-            self._media_player.play()
+            self.media_player.play()
 
     def stop(self):
         self._auto_play = False
-        self._media_player.stop()
+        self.media_player.stop()
 
     def play_next(self):
         self.stop()
@@ -387,35 +401,35 @@ class AudioTreeWidget(StarFabSearchableTreeWidget):
         if action == "extract":
             edir = qtw.QFileDialog.getExistingDirectory(self.starfab, "Extract to...")
             if edir:
-                total = len(selected_items)
-                self.starfab.task_started.emit(
-                    "extract_audio", f"Extracting Game Audio to {edir}", 0, total
+                get_scheduler().run(
+                    f"Extracting Game Audio to {edir}",
+                    self._extract_audio,
+                    selected_items,
+                    Path(edir),
+                    total=len(selected_items),
+                    lane=Lane.BULK,
                 )
-                for i, item in enumerate(selected_items):
-                    self.starfab.update_status_progress.emit(
-                        "extract_audio",
-                        1,
-                        0,
-                        total,
-                        f"Extracting {item.name} to {edir}",
+
+    def _extract_audio(self, task, items, edir):
+        for item in items:
+            task.token.check()
+            task.progress(message=f"Extracting {item.name} to {edir}")
+            base_out = edir / item.parent.name
+            for wem in item.wems:
+                try:
+                    outfile = base_out / f"{item.atl_name}_{wem}.ogg"
+                    outfile.parent.mkdir(parents=True, exist_ok=True)
+                    tmp = self.starfab.sc.wwise.convert_wem(
+                        wem, return_file=True
+                    )
+                    shutil.move(tmp, outfile)
+                except Exception as e:
+                    logger.exception(
+                        f"Exception extracting wem {item.atl_name}.{wem}",
+                        exc_info=e,
                     )
-                    base_out = Path(edir) / item.parent.name
-                    for wem in item.wems:
-                        try:
-                            outfile = base_out / f"{item.atl_name}_{wem}.ogg"
-                            outfile.parent.mkdir(parents=True, exist_ok=True)
-                            tmp = self.starfab.sc.wwise.convert_wem(
-                                wem, return_file=True
-                            )
-                            shutil.move(tmp, outfile)
-                        except Exception as e:
-                            logger.exception(
-                                f"Exception extracting wem {item.atl_name}.{wem}",
-                                exc_info=e,
-                            )
-
-                self.starfab.task_finished.emit("extract_audio", True, "")
-                show_file_in_filemanager(Path(edir))
+            task.advance()
+        show_file_in_filemanager(edir)
 
     def _on_wem_doubleclick(self, index):
         if self._currently_playing:
@@ -11,7 +11,8 @@ from starfab.gui.widgets.chunked_file_viewer import (
     SUPPORTED_CHUNK_FILE_FORMATS,
     ChunkedObjView,
 )
-from starfab.gui.widgets.editor import SUPPORTED_EDITOR_FORMATS, Editor
+from starfab.gui.widgets import editor
+from starfab.gui.widgets.editor import SUPPORTED_EDITOR_FORMATS
 from starfab.gui.widgets.image_viewer import (
     SUPPORTED_IMG_FORMATS,
     QImageViewer,
@@ -21,6 +22,7 @@ from starfab.log import getLogger
 from starfab.models.common import PathArchiveTreeSortFilterProxyModel
 from starfab.resources import RES_PATH
 from starfab.settings import settings
+from starfab.trace import span
 from starfab.utils import parsebool
 
 logger = getLogger(__name__)
@@ -69,6 +71,7 @@ class StarFabDockWidget(qtw.QDockWidget):
     def _on_ctx_triggered(self, action):
         pass
 
+    @span("open viewer", "view")
     def _handle_item_action(self, item, model, index):
         widget = None
 
@@ -77,7 +80,7 @@ class StarFabDockWidget(qtw.QDockWidget):
             widget = DDSImageViewer(item)
             item = widget.dds_header
         elif item.path.suffix.lower() in SUPPORTED_EDITOR_FORMATS:
-            widget = Editor(item)
+            widget = editor.Editor(item)
         elif item.path.suffix.lower() in SUPPORTED_CHUNK_FILE_FORMATS:
             widget = ChunkedObjView(item)
         elif item.path.suffix.lower() in SUPPORTED_IMG_FORMATS:
@@ -113,6 +116,7 @@ class StarFabStaticWidget(qtw.QWidget):
     def _on_ctx_triggered(self, action):
         pass
 
+    @span("open viewer", "view")
     def _handle_item_action(self, item, model, index):
         widget = None
 
@@ -125,7 +129,7 @@ class StarFabStaticWidget(qtw.QWidget):
             widget = DDSImageViewer(item)
             item = widget.dds_header
         elif item.path.suffix.lower() in SUPPORTED_EDITOR_FORMATS:
-            widget = Editor(item)
+            widget = editor.Editor(item)
         elif item.path.suffix.lower() in SUPPORTED_CHUNK_FILE_FORMATS:
             widget = ChunkedObjView(item)
         elif item.path.suffix.lower() in SUPPORTED_IMG_FORMATS:
@@ -184,12 +188,23 @@ class StarFabSearchableTreeDockWidget(StarFabDockWidget):
         shortcut.activated.connect(self._on_enter_pressed)
 
         self.sc_tree_model = None
+        self._proxy_model = None
         if proxy_model is not None:
             self.proxy_model = proxy_model(parent=self)
         else:
             self.proxy_model = PathArchiveTreeSortFilterProxyModel(parent=self)
         self.sc_tree.setModel(self.proxy_model)
 
+    @property
+    def proxy_model(self):
+        return self._proxy_model
+
+    @proxy_model.setter
+    def proxy_model(self, proxy_model):
+        self._proxy_model = proxy_model
+        if isinstance(proxy_model, PathArchiveTreeSortFilterProxyModel):
+            proxy_model.searching.connect(self._handle_searching)
+
     def _filters_changed(self):
         fl = self.filter_widgets.layout()
         self.proxy_model.setAdditionFilters(
@@ -274,6 +289,8 @@ class StarFabSearchableTreeDockWidget(StarFabDockWidget):
         if not selection and self._ctx_item is not None:
             selection = [self._ctx_item]
 
+        if isinstance(self.proxy_model, PathArchiveTreeSortFilterProxyModel):
+            return self.proxy_model.leafItems(selection)
         _add_indexes(selection)
         return selected_items
 
@@ -301,6 +318,17 @@ class StarFabSearchableTreeDockWidget(StarFabDockWidget):
     def _handle_search_changed(self):
         self.proxy_model.setFilterText(self.sc_tree_search.text())
 
+    @qtc.Slot(bool)
+    def _handle_searching(self, searching):
+        if self.sender() is not self.proxy_model:
+            return
+        if searching:
+            self.sc_search.setIcon(qta.icon("mdi.timer-sand"))
+            self.sc_search.setToolTip("Searching…")
+        else:
+            self.sc_search.setIcon(qta.icon("mdi6.text-search"))
+            self.sc_search.setToolTip("")
+
     def deleteLater(self):
         self.closing.emit()
         super().deleteLater()
@@ -340,12 +368,23 @@ class StarFabSearchableTreeWidget(StarFabStaticWidget):
         shortcut.activated.connect(self._on_enter_pressed)
 
         self.sc_tree_model = None
+        self._proxy_model = None
         if proxy_model is not None:
             self.proxy_model = proxy_model(parent=self)
         else:
             self.proxy_model = PathArchiveTreeSortFilterProxyModel(parent=self)
         self.sc_tree.setModel(self.proxy_model)
 
+    @property
+    def proxy_model(self):
+        return self._proxy_model
+
+    @proxy_model.setter
+    def proxy_model(self, proxy_model):
+        self._proxy_model = proxy_model
+        if isinstance(proxy_model, PathArchiveTreeSortFilterProxyModel):
+            proxy_model.searching.connect(self._handle_searching)
+
     def _sync_tree_header(self):
         settings.beginGroup(f'{self.__class__.__name__}/sc_tree/show_header')
         try:
@@ -455,6 +494,8 @@ class StarFabSearchableTreeWidget(StarFabStaticWidget):
         if not selection and self._ctx_item is not None:
             selection = [self._ctx_item]
 
+        if isinstance(self.proxy_model, PathArchiveTreeSortFilterProxyModel):
+            return self.proxy_model.leafItems(selection)
         _add_indexes(selection)
         return selected_items
 
@@ -482,6 +523,17 @@ class StarFabSearchableTreeWidget(StarFabStaticWidget):
     def _handle_search_changed(self):
         self.proxy_model.setFilterText(self.sc_tree_search.text())
 
+    @qtc.Slot(bool)
+    def _handle_searching(self, searching):
+        if self.sender() is not self.proxy_model:
+            return
+        if searching:
+            self.sc_search.setIcon(qta.icon("mdi.timer-sand"))
+            self.sc_search.setToolTip("Searching…")
+        else:
+            self.sc_search.setIcon(qta.icon("mdi6.text-search"))
+            self.sc_search.setToolTip("")
+
     def deleteLater(self):
         self.closing.emit()
         super().deleteLater()
\ No newline at end of file
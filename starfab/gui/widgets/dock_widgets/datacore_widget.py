@@ -1,10 +1,9 @@
 import operator
 import os
-import shutil
-import time
 import typing
 from functools import partial
-from pathlib import Path
+
+import qtawesome as qta
 
 from scdatatools.forge.dftypes import StructureInstance
 from starfab import get_starfab
@@ -16,30 +15,30 @@ from starfab.gui.widgets.dock_widgets.common import (
     StarFabSearchableTreeFilterWidget,
 )
 from starfab.log import getLogger
+from starfab.models.common import NodeMaskFilter
 from starfab.models.datacore import DCBSortFilterProxyModel, DCBItem
-from starfab.utils import show_file_in_filemanager, reload_starfab_modules
+from starfab.models.record_export import RecordExportRunner
+from starfab.models.type_index import record_type_index
+from starfab.tasks import Lane, get_scheduler
+from starfab.utils import reload_starfab_modules
 
 logger = getLogger(__name__)
 
 
-def _filter_tags(item, method, tags, tdb):
+def _filter_tags(item, method, tags, tdb, include_ancestors=False):
+    """Row by row tag filter, used until the records' tags have been indexed, see `DCBModel.tagMask`"""
     if item.record is None:
         return False
-    tags_to_check = set()
     item_tags = item.record.properties.get("tags", [])
     if isinstance(item_tags, StructureInstance):
-        tags_to_check.update(
-            str(tag)
-            for _ in item_tags.properties.values()
-            if (tag := tdb.tags_by_guid.get(str(_)) is not None)
-        )
-    else:
-        tags_to_check.update(
-            str(tag)
-            for _ in item_tags
-            if (tag := tdb.tags_by_guid.get(_.name)) is not None
-        )
-    return method(tag in tags for tag in tags_to_check)
+        item_tags = item_tags.properties.values()
+    tags_to_check = set()
+    for _ in item_tags:
+        tag = tdb.tags_by_guid.get(str(getattr(_, "value", _)))
+        while tag is not None and tag is not tdb.root_tag:
+            tags_to_check.add(str(tag))
+            tag = tag.parent if include_ancestors else None
+    return method(tag in tags_to_check for tag in tags)
 
 
 class DCBFilterWidget(StarFabSearchableTreeFilterWidget):
@@ -82,14 +81,19 @@ class DCBFilterWidget(StarFabSearchableTreeFilterWidget):
         self.tagbar.tags_updated.connect(self._handle_filter_updated)
         self.h_layout.addWidget(self.tagbar)
 
+        self.inherited_tags = qtw.QCheckBox("Inherited")
+        self.inherited_tags.setToolTip("Also match records tagged with a child of these tags")
+        self.inherited_tags.toggled.connect(self._handle_filter_updated)
+        self.h_layout.addWidget(self.inherited_tags)
+
         starfab = get_starfab()
         if starfab.sc is not None:
             self._tag_completer = qtw.QCompleter(starfab.sc.tag_database.tag_names())
             self._tag_completer.setCaseSensitivity(qtc.Qt.CaseInsensitive)
             self._tag_completer.setFilterMode(qtc.Qt.MatchEndsWith)
-            self._type_completer = qtw.QCompleter(
-                sorted(starfab.sc.datacore.record_types)
-            )
+            self._type_completer = qtw.QCompleter(self._type_completion_model(starfab.sc.datacore))
+            # the popup shows each type with the number of records of it, but only completes the type
+            self._type_completer.setCompletionRole(qtc.Qt.UserRole)
             self._type_completer.setCaseSensitivity(qtc.Qt.CaseInsensitive)
             self._type_completer.setFilterMode(qtc.Qt.MatchStartsWith)
 
@@ -102,27 +106,40 @@ class DCBFilterWidget(StarFabSearchableTreeFilterWidget):
         self._handle_filter_type_changed(None)
         self.show()
 
+    def _type_completion_model(self, datacore):
+        model = qtg.QStandardItemModel(self)
+        type_index = record_type_index(datacore)
+        for record_type in type_index.types:
+            item = qtg.QStandardItem(f"{record_type} ({type_index.count(record_type):,})")
+            item.setData(record_type, qtc.Qt.UserRole)
+            model.appendRow(item)
+        return model
+
     def compile_filter(self) -> (typing.Callable, typing.Callable):
         filter_type = self.filter_type.currentData()
         op = getattr(operator, self.filter_op.currentData())
         starfab = get_starfab()
         if not self.tagbar.tags or starfab.sc is None:
             return None
-        elif filter_type == "has_any_tag":
-            return op, partial(
-                _filter_tags,
-                method=any,
-                tags=self.tagbar.tags,
-                tdb=starfab.sc.tag_database,
+        elif filter_type in ("has_any_tag", "has_all_tags"):
+            match_all = filter_type == "has_all_tags"
+            include_ancestors = self.inherited_tags.isChecked()
+            mask = starfab.sc_manager.datacore_model.tagMask(
+                self.tagbar.tags, match_all=match_all, include_ancestors=include_ancestors
             )
-        elif filter_type == "has_all_tags":
+            if mask is not None:
+                return op, NodeMaskFilter(mask)
             return op, partial(
                 _filter_tags,
-                method=all,
+                method=all if match_all else any,
                 tags=self.tagbar.tags,
                 tdb=starfab.sc.tag_database,
+                include_ancestors=include_ancestors,
             )
         elif filter_type == "type":
+            mask = starfab.sc_manager.datacore_model.typeMask(self.tagbar.tags)
+            if mask is not None:
+                return op, NodeMaskFilter(mask)
             return (
                 op,
                 lambda i, ts=self.tagbar.tags: i.record is not None
@@ -135,11 +152,12 @@ class DCBFilterWidget(StarFabSearchableTreeFilterWidget):
     def _handle_filter_type_changed(self, index):
         filter_type = self.filter_type.currentData()
         self.tagbar.clear()
+        self.inherited_tags.setVisible(filter_type in ["has_any_tag", "has_all_tags"])
         if filter_type in ["has_any_tag", "has_all_tags"]:
             self.tagbar.valid_tags = get_starfab().sc.tag_database.tag_names()
             self.tagbar.line_edit.setCompleter(self._tag_completer)
         elif filter_type == "type":
-            self.tagbar.valid_tags = list(get_starfab().sc.datacore.record_types)
+            self.tagbar.valid_tags = record_type_index(get_starfab().sc.datacore).types
             self.tagbar.line_edit.setCompleter(self._type_completer)
         self.filter_changed.emit()
 
@@ -149,9 +167,23 @@ class DCBTreeWidget(StarFabSearchableTreeWidget):
         super().__init__(proxy_model=DCBSortFilterProxyModel, *args, **kwargs)
 
         self.sc_tree_model = self.starfab.sc_manager.datacore_model
+        # attach as soon as loading starts, the model publishes rows while it loads
+        self.starfab.sc_manager.datacore_model.loading.connect(
+            self._handle_datacore_loaded
+        )
         self.starfab.sc_manager.datacore_model.loaded.connect(
             self._handle_datacore_loaded
         )
+        self.starfab.sc_manager.datacore_model.record_indexes_loaded.connect(
+            self._handle_record_indexes_loaded
+        )
+
+        self._search_contents = self.sc_tree_search.addAction(
+            qta.icon("mdi.text-box-search-outline"), qtw.QLineEdit.TrailingPosition
+        )
+        self._search_contents.setCheckable(True)
+        self._search_contents.setToolTip("Find in record contents")
+        self._search_contents.toggled.connect(self._handle_search_contents_toggled)
 
         self.proxy_model.setFilterKeyColumn(3)
 
@@ -180,6 +212,11 @@ class DCBTreeWidget(StarFabSearchableTreeWidget):
 
     @qtc.Slot()
     def _handle_datacore_loaded(self):
+        if self.proxy_model.sourceModel() is self.sc_tree_model:
+            if self.proxy_model.additional_filters:
+                # type filters added while the model loaded can now be resolved from its type index
+                self._filters_changed()
+            return
         self.proxy_model.setSourceModel(self.sc_tree_model)
         self.sc_tree.setModel(self.proxy_model)
         self.proxy_model.sort(0, qtc.Qt.SortOrder.AscendingOrder)
@@ -189,6 +226,47 @@ class DCBTreeWidget(StarFabSearchableTreeWidget):
         header.setSectionResizeMode(0, qtw.QHeaderView.Stretch)
         self._sync_tree_header()
 
+    @qtc.Slot(bool)
+    def _handle_search_contents_toggled(self, checked):
+        self.proxy_model.search_contents = checked
+        self._update_search_contents_tooltip()
+        self._handle_search_changed()
+
+    @qtc.Slot()
+    def _handle_record_indexes_loaded(self):
+        self._update_search_contents_tooltip()
+        if self.proxy_model.additional_filters:
+            # tag filters can now be resolved from the tag bitsets
+            self._filters_changed()
+        elif self.proxy_model.search_contents and self.sc_tree_search.text():
+            self._handle_search_changed()
+
+    def _update_search_contents_tooltip(self):
+        if self.proxy_model.search_contents and self.sc_tree_model.content_index is None:
+            self._search_contents.setToolTip("Find in record contents (the records are still being indexed)")
+        else:
+            self._search_contents.setToolTip("Find in record contents")
+
+    def _handle_search_changed(self):
+        super()._handle_search_changed()
+        if not self.proxy_model.is_searching:
+            self._select_guid()
+
+    @qtc.Slot(bool)
+    def _handle_searching(self, searching):
+        super()._handle_searching(searching)
+        if self.sender() is self.proxy_model and not searching:
+            self._select_guid()
+
+    def _select_guid(self):
+        """If the search text is the GUID of a record, select and scroll to that record"""
+        if (item := self.sc_tree_model.itemForGUID(self.sc_tree_search.text().strip())) is None:
+            return
+        index = self.proxy_model.mapFromSource(self.sc_tree_model.indexForNode(item.node))
+        if index.isValid():
+            self.sc_tree.setCurrentIndex(index)
+            self.sc_tree.scrollTo(index, qtw.QAbstractItemView.PositionAtCenter)
+
     def _handle_item_action(self, item, model, index):
         if os.environ.get("STARFAB_RELOAD_MODULES"):
             reload_starfab_modules("starfab.gui.widgets.dcbrecord")
@@ -201,40 +279,18 @@ class DCBTreeWidget(StarFabSearchableTreeWidget):
             # TODO: error dialog
 
     def extract_items(self, items):
-        items = [i for i in items if i.guid]
-        edir = Path(qtw.QFileDialog.getExistingDirectory(self.starfab, "Extract to..."))
-        if edir:
-            total = len(items)
-            self.starfab.task_started.emit(
-                "extract_dcb", f"Extracting to {edir.name}", 0, total
-            )
-            t = time.time()
-            for i, item in enumerate(items):
-                if (time.time() - t) > 0.5:
-                    self.starfab.update_status_progress.emit(
-                        "extract_dcb", i, 0, total, f"Extracting records to {edir.name}"
-                    )
-                    t = time.time()
-                try:
-                    mode = get_starfab().settings.value("convert/datacore_fmt", "xml")
-                    outfile = edir / item.path
-                    outfile = outfile.with_suffix(f'.{mode}')
-                    outfile.parent.mkdir(parents=True, exist_ok=True)
-                    if outfile.is_file():
-                        outfile = (
-                            outfile.parent
-                            / f"{outfile.stem}.{item.guid}{outfile.suffix}"
-                        )
-                    with outfile.open("wb") as o:
-                        shutil.copyfileobj(item.contents(mode=mode), o)
-                    qtg.QGuiApplication.processEvents()
-                except Exception as e:
-                    logger.exception(
-                        f"Exception extracting record {item.path}", exc_info=e
-                    )
-
-            self.starfab.task_finished.emit("extract_dcb", True, "")
-            show_file_in_filemanager(Path(edir))
+        records = [(i.guid, i.path) for i in items if i.guid]
+        if not records or not (edir := qtw.QFileDialog.getExistingDirectory(self.starfab, "Extract to...")):
+            return
+        get_scheduler().start(
+            RecordExportRunner(
+                self.sc_tree_model.archive,
+                records,
+                edir,
+                fmt=get_starfab().settings.value("convert/datacore_fmt", "xml"),
+            ),
+            lane=Lane.BULK,
+        )
 
     @qtc.Slot(str)
     def _on_ctx_triggered(self, action):
@@ -245,7 +301,9 @@ class DCBTreeWidget(StarFabSearchableTreeWidget):
                 return
             self.extract_items(selected_items)
         elif action == "extract_all":
-            self.extract_items(self.sc_tree_model._guid_cache.values())
+            if (guid_index := self.sc_tree_model.guid_index) is None:
+                return
+            self.extract_items([self.sc_tree_model.itemForNode(int(_)) for _ in guid_index.nodes])
         elif action == "copy_path":
             qtg.QGuiApplication.clipboard().setText(selected_items[0].path.as_posix())
         else:
@@ -11,6 +11,7 @@ from starfab.gui.widgets.dock_widgets.common import StarFabSearchableTreeWidget
 from starfab.log import getLogger
 from starfab.models.common import AudioConverter
 from starfab.models.p4k import P4KSortFilterProxyModelArchive
+from starfab.tasks import Lane, get_scheduler
 from starfab.utils import show_file_in_filemanager
 
 logger = getLogger(__name__)
@@ -23,6 +24,8 @@ class P4KView(StarFabSearchableTreeWidget):
         self.setWindowTitle(self.tr("Data.p4k"))
 
         self.sc_tree_model = self.starfab.sc_manager.p4k_model
+        # attach as soon as loading starts, the model publishes rows while it loads
+        self.starfab.sc_manager.p4k_model.loading.connect(self._handle_p4k_loaded)
         self.starfab.sc_manager.p4k_model.loaded.connect(self._handle_p4k_loaded)
 
         self.ctx_manager.default_menu.addSeparator()
@@ -65,31 +68,26 @@ class P4KView(StarFabSearchableTreeWidget):
             edir = qtw.QFileDialog.getExistingDirectory(self.starfab, "Save To...")
             if edir:
                 edir = Path(edir)
-                total = len(selected_items)
-                self.starfab.task_started.emit(
-                    "convert_wem", f"Converting to {edir}", 0, total
+                wems = [_ for _ in selected_items if _.path.suffix == ".wem"]
+                get_scheduler().run(
+                    f"Converting to {edir}", self._convert_wems, wems, edir, total=len(wems), lane=Lane.BULK
                 )
-                for i, item in enumerate(selected_items):
-                    if item.path.suffix != ".wem":
-                        continue
-                    self.starfab.update_status_progress.emit(
-                        "convert_wem",
-                        1,
-                        0,
-                        total,
-                        f"Converting {item.path.name} to {edir}",
-                    )
-                    try:
-                        result = AudioConverter(item.path.stem).run()
-                        if result["ogg"]:
-                            shutil.move(result["ogg"], edir / f"{item.path.name}.ogg")
-                    except Exception as e:
-                        logger.exception(
-                            f"Failed to convert wem {item.path}", exc_info=e
-                        )
 
-                self.starfab.task_finished.emit("convert_wem", True, "")
-                show_file_in_filemanager(Path(edir))
+    @staticmethod
+    def _convert_wems(task, items, edir):
+        for item in items:
+            task.token.check()
+            task.progress(message=f"Converting {item.path.name} to {edir}")
+            try:
+                result = AudioConverter(item.path.stem).run()
+                if result["ogg"]:
+                    shutil.move(result["ogg"], edir / f"{item.path.name}.ogg")
+            except Exception as e:
+                logger.exception(
+                    f"Failed to convert wem {item.path}", exc_info=e
+                )
+            task.advance()
+        show_file_in_filemanager(Path(edir))
 
     def _on_doubleclick(self, index):
         if not index.isValid():
@@ -106,10 +104,11 @@ class P4KView(StarFabSearchableTreeWidget):
                     })
                     if ".dds" in item.name:
                         basename = f'{item.name.split(".dds")[0]}.dds'
+                        nodes = self.sc_tree_model.nodes
                         items = [
-                            _
-                            for _ in item.parent.children
-                            if _.path.name.startswith(basename)
+                            self.sc_tree_model.itemForNode(_)
+                            for _ in self.sc_tree_model.childNodes(item.parent.node)
+                            if nodes.name(_).startswith(basename)
                         ]
                         self._handle_item_action(
                             {i.path.as_posix(): i for i in items}, self.sc_tree_model, index
@@ -126,6 +125,8 @@ class P4KView(StarFabSearchableTreeWidget):
                 ScrollMessageBox.critical(self, "Error opening file", f"{e}")
 
     def _handle_p4k_loaded(self):
+        if self.proxy_model.sourceModel() is self.sc_tree_model:
+            return
         self.proxy_model.setSourceModel(self.sc_tree_model)
         self.sc_tree.setModel(self.proxy_model)
         self.proxy_model.sort(0, qtc.Qt.SortOrder.AscendingOrder)
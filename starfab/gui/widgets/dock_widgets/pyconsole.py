@@ -1,3 +1,5 @@
+from functools import partial
+
 import scdatatools
 from qtconsole.rich_jupyter_widget import RichJupyterWidget
 from qtconsole.inprocess import QtInProcessKernelManager
@@ -12,10 +14,21 @@ scdatatools {scdatatools.__version__}
 Local variables:
     starfab       -  The starfab application
     starfab.sc    -  The currently loaded StarCitizen
+    referenced_by -  referenced_by(guid_or_record) lists the DataCore records that reference a record
+    references    -  references(guid_or_record) lists the DataCore records a record references
 
 """
 
 
+def _related_records(starfab, direction, record):
+    """Returns the DataCore records related to `record`, a record or its GUID, in `direction` of the reference graph"""
+    if (graph := starfab.sc_manager.datacore_model.reference_graph) is None:
+        raise RuntimeError("The DataCore records haven't been indexed yet")
+    guid = record.id.value if hasattr(record, "id") else str(record)
+    records_by_guid = starfab.sc.datacore.records_by_guid
+    return [records_by_guid[_] for _ in getattr(graph, direction)(guid) if _ in records_by_guid]
+
+
 class PyConsoleDockWidget(qtw.QDockWidget):
     def __init__(self, starfab, *args, **kwargs):
         super().__init__(parent=starfab, *args, **kwargs)
@@ -35,6 +48,8 @@ class PyConsoleDockWidget(qtw.QDockWidget):
             {
                 "starfab": starfab,
                 "scdatatools": scdatatools,
+                "referenced_by": partial(_related_records, starfab, "referenced_by"),
+                "references": partial(_related_records, starfab, "references"),
             }
         )
 
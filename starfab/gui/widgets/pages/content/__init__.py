@@ -6,18 +6,11 @@ from qtpy import uic
 from starfab.gui import qtw
 from starfab.gui.widgets.dock_widgets.audio_widget import AudioTreeWidget
 from starfab.gui.widgets.export_utils import ExportOptionsWidget
-from starfab.gui.widgets.hardpoint_editor import HardpointEditor
 from starfab.hooks import GEOMETRY_PREVIEW_WIDGET
 from starfab.log import getLogger
 from starfab.plugins import plugin_manager
 from starfab.resources import RES_PATH
-from .character_selector import CharacterSelector
-from .entity_selector import EntitySelector
-from .export_log import BlueprintExportLog, ExtractionItem
-from .prefab_selector import PrefabSelector
-from .soc_selector import SOCSelector
-from .vehicle_selector import VehicleSelector
-from .weapon_selector import WeaponSelector
+from starfab.trace import span
 
 logger = getLogger(__name__)
 
@@ -39,13 +32,8 @@ class ContentView(qtw.QWidget):
         self.buttonBox_Content.accepted.connect(self.handle_extract)
         self.buttonBox_Content.button(qtw.QDialogButtonBox.Save).setText("Export")
 
+        # the selectors and the preview are created when the page is first shown
         self.toolBox = qtw.QToolBox(self.tab_Assets)
-        self.toolBox.addItem(VehicleSelector(content_page=self), "Vehicles")
-        self.toolBox.addItem(WeaponSelector(content_page=self), "Weapons")
-        self.toolBox.addItem(CharacterSelector(content_page=self), "Character")
-        self.toolBox.addItem(SOCSelector(content_page=self), "Object Containers")
-        self.toolBox.addItem(PrefabSelector(content_page=self), "Prefabs")
-        self.toolBox.addItem(EntitySelector(content_page=self), "Entities")
         self.tab_Assets.layout().addWidget(self.toolBox)
 
         clear_selections_btn = qtw.QPushButton('Clear Selections')
@@ -69,6 +57,42 @@ class ContentView(qtw.QWidget):
         self.groupBox_Content_Local_Files.hide()
 
         self.hardpoint_editor = None
+        self.preview = None
+        self._content_created = False
+
+    def showEvent(self, event):
+        if not self._content_created:
+            self._create_content()
+        return super().showEvent(event)
+
+    def _create_content(self):
+        """Creates the selectors and the preview, which pull in the blueprint generators and the 3D preview's
+        dependencies, so they're only loaded once the page is used"""
+        from starfab.gui.widgets.hardpoint_editor import HardpointEditor
+        from .character_selector import CharacterSelector
+        from .common import DCBContentSelector, P4KContentSelector
+        from .entity_selector import EntitySelector
+        from .prefab_selector import PrefabSelector
+        from .soc_selector import SOCSelector
+        from .vehicle_selector import VehicleSelector
+        from .weapon_selector import WeaponSelector
+
+        self._content_created = True
+        sc_manager = self.starfab.sc_manager
+        for selector, label in (
+            (VehicleSelector(content_page=self), "Vehicles"),
+            (WeaponSelector(content_page=self), "Weapons"),
+            (CharacterSelector(content_page=self), "Character"),
+            (SOCSelector(content_page=self), "Object Containers"),
+            (PrefabSelector(content_page=self), "Prefabs"),
+            (EntitySelector(content_page=self), "Entities"),
+        ):
+            self.toolBox.addItem(selector, label)
+            # the install was most likely opened before the page was shown
+            if isinstance(selector, DCBContentSelector) and sc_manager.datacore_model.is_loaded:
+                selector._handle_datacore_loaded()
+            elif isinstance(selector, P4KContentSelector) and sc_manager.p4k_model.is_loaded:
+                selector._handle_p4k_loaded()
 
         prev_handlers = plugin_manager.hooks(GEOMETRY_PREVIEW_WIDGET)
         if prev_handlers:
@@ -85,7 +109,7 @@ class ContentView(qtw.QWidget):
 
     def clear_assets_selections(self):
         for i in range(self.toolBox.count()):
-            widget: EntitySelector = self.toolBox.widget(i)
+            widget = self.toolBox.widget(i)
             widget.deselect_all()
 
     def closeEvent(self, event):
@@ -93,6 +117,7 @@ class ContentView(qtw.QWidget):
             self.preview.deleteLater()
         return super().closeEvent(event)
 
+    @span("preview", "view")
     def preview_chunkfile(self, chunkfile_or_tabs, name=None):
         if self.preview is not None:
             self.hardpoint_editor.clear()
@@ -119,6 +144,8 @@ class ContentView(qtw.QWidget):
         edir = qtw.QFileDialog.getExistingDirectory(self.starfab, "Export To...", edir)
 
         if Path(edir).is_dir():
+            from .export_log import BlueprintExportLog
+
             options = self.export_options.get_options()
 
             dlg = BlueprintExportLog(
@@ -12,16 +12,17 @@ from .export_log import ExtractionItem
 
 
 class EntityExporterSortFilter(DCBSortFilterProxyModel):
+    # folders are only shown for the entities below them
+    use_search_index = False
+
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
         self._geom_cache = {}
 
     def filterAcceptsRow(self, source_row, source_parent: qtc.QModelIndex) -> bool:
-        parent = source_parent.internalPointer() if source_parent.isValid() else self.sourceModel().root_item
-        if parent:
-            try:
-                item: DCBItem = parent.children[source_row]
-            except IndexError:
+        if self.sourceModel().root_item is not None:
+            item: DCBItem = self.sourceItem(source_row, source_parent)
+            if item is None:
                 return False
 
             if item.record is not None:
@@ -12,6 +12,7 @@ from scdatatools.engine.chunkfile.converter import CGF_CONVERTER_MODEL_EXTS
 from scdatatools.utils import parse_bool, log_time
 from starfab.gui import qtc, qtw, qtg
 from starfab.log import getLogger
+from starfab.trace import span
 from starfab.utils import show_file_in_filemanager
 
 ExtractionItem = namedtuple("ExtractionItem", ["name", "object", "bp_generator"])
@@ -120,6 +121,10 @@ class BlueprintExportLog(qtw.QDialog):
         log_file.write(f"{msg}\n")
 
     def extract_entities(self) -> None:
+        with span("export entities", "export", items=len(self.items), outdir=self.outdir):
+            self._extract_entities()
+
+    def _extract_entities(self) -> None:
         overview_tab = qtw.QWidget()
         layout = qtw.QVBoxLayout()
         overview_console = qtw.QTextEdit(overview_tab)
@@ -180,7 +185,7 @@ class BlueprintExportLog(qtw.QDialog):
                         overview_console=overview_console,
                     )
                     try:
-                        with log_time(
+                        with span(f"blueprint {item.name}", "export"), log_time(
                                 f"Generating Blueprint for {item.name}",
                                 partial(monitor, level=logging.CRITICAL),
                         ):
@@ -190,7 +195,7 @@ class BlueprintExportLog(qtw.QDialog):
                             bp_file = (output_dir / item.name).with_suffix(".scbp")
                             with bp_file.open('w') as o:
                                 bp.dump(o)
-                        with log_time(
+                        with span(f"extract {item.name}", "export"), log_time(
                                 "Extracting blueprint",
                                 partial(monitor, level=logging.CRITICAL),
                         ):
@@ -1,5 +1,3 @@
-import operator
-
 from scdatatools.sc.blueprints.generators.object_containers import blueprint_from_socpak
 from starfab.gui import qtc
 from starfab.models.p4k import P4KSortFilterProxyModelArchive
@@ -8,9 +6,7 @@ from .export_log import ExtractionItem
 
 
 class SOCExporterSortFilter(P4KSortFilterProxyModelArchive):
-    def __init__(self, *args, **kwargs):
-        super().__init__(*args, **kwargs)
-        self._filters = [(operator.and_, lambda i: i.path.suffix.lower() == ".socpak")]
+    base_query = "ext:socpak"
 
 
 class SOCSelector(P4KContentSelector):
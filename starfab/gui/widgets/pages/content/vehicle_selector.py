@@ -6,6 +6,7 @@ from starfab.gui import qtc, qtw
 from starfab.gui.widgets.dock_widgets.datacore_widget import DCBSortFilterProxyModel
 from starfab.models.common import CheckableModelWrapper
 from starfab.models.datacore import DCBModel, DCBLoader, RECORDS_ROOT_PATH
+from starfab.models.type_index import record_type_index
 from .common import DCBContentSelector
 from .export_log import ExtractionItem
 
@@ -46,15 +47,15 @@ FILTER_NAME = [
 
 
 class VehiclesLoader(DCBLoader):
+    cache_name = "vehicles"
+
     def items_to_load(self):
         # trigger datacore to load here
         self.model.archive = self.model.archive.datacore
 
         items = []
-        for r in self.model.archive.records:
-            if r.type != 'EntityClassDefinition':
-                continue
-
+        records = self.model.archive.records
+        for r in (records[_] for _ in record_type_index(self.model.archive).record_indices("EntityClassDefinition")):
             category = ""
             if r.filename.startswith(VEHICLES_ROOT):
                 category = VEHICLES_CATEGORY
@@ -82,7 +83,7 @@ class VehiclesLoader(DCBLoader):
 
         return items
 
-    def load_item(self, item):
+    def item_parent_path(self, item):
         category, item = item
         if category == VEHICLES_CATEGORY:
             path = item.filename.replace(VEHICLES_ROOT, "")
@@ -90,16 +91,13 @@ class VehiclesLoader(DCBLoader):
             path = item.filename.replace(SHIPS_ROOT, "")
 
         parent_path, name = path.rsplit("/", maxsplit=1) if "/" in path else ("", path)
-        parent_path = f"{category} / {parent_path}" if parent_path else category
-        parent = self.model.parentForPath(parent_path)
-        # name = name.replace(".xml", "")
-        name = item.name
-        if name in parent.children_by_name:
-            name = f"{name}.{item.id.value}"
-        new_item = self._item_cls(
-            f"{parent_path}/{name}", model=self.model, record=item, parent=parent
-        )
-        self.model._guid_cache[new_item.guid] = new_item
+        return f"{category} / {parent_path}" if parent_path else category
+
+    def load_children(self, parent, items):
+        super().load_children(parent, [item for _, item in items])
+
+    def item_payload(self, item):
+        return item[1]
 
 
 class VehicleSelector(DCBContentSelector):
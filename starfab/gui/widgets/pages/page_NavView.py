@@ -1,7 +1,5 @@
 from qtpy import uic
-from scdatatools.sc.object_container.plotter import ObjectContainerPlotter
 from starfab.gui import qtw
-from starfab.gui.widgets.preview3d import Preview3D
 from starfab.log import getLogger
 from starfab.resources import RES_PATH
 
@@ -22,14 +20,32 @@ class NavView(qtw.QWidget):
         )
 
         self.starmap = None
+        self._starmap_pending = False
+
+    def showEvent(self, event):
+        if self._starmap_pending:
+            self._starmap_pending = False
+            self._create_starmap()
+        return super().showEvent(event)
 
     def _handle_datacore_unloading(self):
+        self._starmap_pending = False
         if self.starmap is not None:
             self.preview_widget_layout.takeAt(0)
             del self.starmap
             self.starmap = None
 
     def _handle_datacore_loaded(self):
+        # the 3D preview is only created, and pyvista loaded, once the page is shown
+        if self.isVisible():
+            self._create_starmap()
+        else:
+            self._starmap_pending = True
+
+    def _create_starmap(self):
+        from scdatatools.sc.object_container.plotter import ObjectContainerPlotter
+        from starfab.gui.widgets.preview3d import Preview3D
+
         megamap_pu = self.starfab.sc.datacore.search_filename(f'libs/foundry/records/megamap/megamap.pu.xml')[0]
         pu_socpak = megamap_pu.properties['SolarSystems'][0].properties['ObjectContainers'][0].value
         try:
@@ -0,0 +1,80 @@
+from functools import partial
+
+from starfab.gui import qtc, qtw
+
+
+def format_eta(seconds):
+    seconds = int(seconds)
+    if seconds >= 3600:
+        return f"{seconds // 3600}:{seconds // 60 % 60:02d}:{seconds % 60:02d}"
+    return f"{seconds // 60}:{seconds % 60:02d}"
+
+
+def task_progress_format(task):
+    """Returns the `QProgressBar` format for `task`"""
+    text = task.message or task.title
+    if task.total <= 0:
+        return text
+    text = f"{text} - %v / %m - %p%"
+    if (eta := task.eta) is not None:
+        text += f" - {format_eta(eta)} left"
+    return text
+
+
+class TaskStatusWidget(qtw.QWidget):
+    """Shows a progress bar with the ETA of every running task of a `TaskScheduler`, e.g. in the status bar.
+    Cancellable tasks can be cancelled from the bar's context menu."""
+
+    def __init__(self, scheduler, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.scheduler = scheduler
+        self._bars = {}
+        layout = qtw.QHBoxLayout(self)
+        layout.setContentsMargins(0, 0, 0, 0)
+        self.setLayout(layout)
+        self.hide()
+
+        scheduler.task_added.connect(self._handle_task_added)
+        scheduler.task_finished.connect(self._handle_task_finished)
+        scheduler.tasks_updated.connect(self._handle_tasks_updated)
+
+    def _handle_task_added(self, task):
+        bar = qtw.QProgressBar(self)
+        bar.setMinimumWidth(250)
+        if task.cancellable:
+            bar.setContextMenuPolicy(qtc.Qt.CustomContextMenu)
+            bar.customContextMenuRequested.connect(partial(self._show_ctx_menu, task, bar))
+        self.layout().addWidget(bar)
+        self._bars[task.id] = (task, bar)
+        self._update_bar(task, bar)
+        self.show()
+
+    def _handle_task_finished(self, task):
+        if (entry := self._bars.pop(task.id, None)) is not None:
+            bar = entry[1]
+            self.layout().removeWidget(bar)
+            bar.deleteLater()
+        if not self._bars:
+            self.hide()
+
+    def _handle_tasks_updated(self):
+        for task, bar in self._bars.values():
+            self._update_bar(task, bar)
+
+    @staticmethod
+    def _update_bar(task, bar):
+        if task.total > 0:
+            bar.setRange(0, task.total)
+            bar.setValue(min(task.value, task.total))
+        else:
+            # busy indicator
+            bar.setRange(0, 0)
+        bar.setFormat(task_progress_format(task))
+        bar.setToolTip(bar.text() or task.title)
+
+    def _show_ctx_menu(self, task, bar, pos):
+        menu = qtw.QMenu(self)
+        cancel = menu.addAction(f"Cancel {task.title}")
+        cancel.setEnabled(not task.cancelled)
+        cancel.triggered.connect(task.cancel)
+        menu.exec_(bar.mapToGlobal(pos))
@@ -1,7 +1,9 @@
-import time
+from array import array
 from functools import cached_property
 from pathlib import Path
 
+import numpy as np
+
 from starfab import get_starfab
 from starfab.gui import qtc, qtg
 from starfab.gui.utils import icon_provider
@@ -12,9 +14,11 @@ from starfab.models.common import (
     PathArchiveTreeItem,
     ContentItem,
     ThreadLoadedPathArchiveTreeModel,
+    NO_NODE,
     SKIP_MODELS,
 )
 from starfab.settings import get_ww2ogg, get_revorb
+from starfab.tasks import Lane, get_scheduler
 
 logger = getLogger(__name__)
 SCAUDIOVIEWW_COLUMNS = ["Name"]
@@ -23,15 +27,50 @@ GAME_AUDIO_P4K_SEARCH = str(GAME_AUDIO_P4K_RELPATH / "GameAudio" / "*.xml")
 GAME_AUDIO_DCB_SEARCH = "libs/foundry/records/musiclogic/*"
 
 
+def preload_game_audio(sc, cancelled=None) -> bool:
+    """Parse the GameAudio files of `sc` into its Wwise manager's preloads. Returns `False` if it was stopped because
+    the optional `cancelled` callable returned `True`."""
+    ga_files = sc.p4k.search(GAME_AUDIO_P4K_SEARCH)
+    task = get_scheduler().task(
+        "Initializing Game Audio", total=len(ga_files), lane=Lane.BACKGROUND, cancellable=False
+    )
+
+    wwise = sc.wwise
+    wwise.ww2ogg = Path(get_ww2ogg())
+    wwise.revorb = Path(get_revorb())
+
+    try:
+        for i, p4kfile in enumerate(ga_files):
+            if cancelled is not None and cancelled():
+                return False
+
+            task.progress(i)
+            wwise.load_game_audio_file(sc.p4k.open(p4kfile))
+    finally:
+        task.finish()
+    return True
+
+
 class AudioTreeSortFilterProxyModel(PathArchiveTreeSortFilterProxyModel):
+    def searchMask(self, search_index, text, case_sensitive, cancelled):
+        # case-insensitive filters only match on names, case-sensitive ones on the full path
+        if case_sensitive or "/" not in text:
+            matched = search_index.match(text, case_sensitive=case_sensitive)
+            wem_id = text if case_sensitive else text.lower()
+            if (nodes := self.sourceModel().wem_nodes.get(wem_id)) is not None:
+                matched[nodes] = True
+        else:
+            matched = np.zeros(len(search_index), dtype=bool)
+        return search_index.expand(matched, descendants=case_sensitive, cancelled=cancelled)
+
     def filterAcceptsRow(self, source_row, source_parent: qtc.QModelIndex) -> bool:
         if not self._filter and not self.additional_filters:
             return True
+        if (accepted := self.acceptsNode(source_row, source_parent)) is not None:
+            return accepted
 
-        if parent := source_parent.internalPointer():
-            try:
-                item = parent.children[source_row]
-            except IndexError:
+        if source_parent.isValid():
+            if (item := self.sourceItem(source_row, source_parent)) is None:
                 return False
             if not self._filter and not self.checkAdditionFilters(item):
                 return False
@@ -47,31 +86,17 @@ class AudioTreeSortFilterProxyModel(PathArchiveTreeSortFilterProxyModel):
 
 
 class AudioTreeLoader(PathArchiveTreeModelLoader):
+    cache_name = "audio"
+
     def items_to_load(self):
         if 'audio' in SKIP_MODELS:
             logger.debug(f'Skipping loading the audio model')
             return []
 
-        ga_files = self.starfab.sc.p4k.search(GAME_AUDIO_P4K_SEARCH)
-        self.starfab.task_started.emit(
-            "init_gameaudio", "Initializing Game Audio", 0, len(ga_files)
-        )
-
-        t = time.time()
         wwise = self.model.archive.wwise
-        wwise.ww2ogg = Path(get_ww2ogg())
-        wwise.revorb = Path(get_revorb())
-
-        for i, p4kfile in enumerate(ga_files):
-            if self._should_cancel:
-                return  # immediately break
-
-            if (time.time() - t) > 0.5:
-                self.starfab.update_status_progress.emit("init_gameaudio", i, 0, 0, "")
-                t = time.time()
-            wwise.load_game_audio_file(self.starfab.sc.p4k.open(p4kfile))
-
-        self.starfab.task_finished.emit("init_gameaudio", True, "")
+        # the game audio is usually preloaded by the `StarCitizenManager` before the tree is loaded
+        if not wwise.preloads and not preload_game_audio(self.model.archive, lambda: self._should_cancel):
+            return []  # immediately break
         return wwise.preloads
 
     def load_item(self, item):
@@ -80,28 +105,48 @@ class AudioTreeLoader(PathArchiveTreeModelLoader):
         atl_names = list(preload["triggers"].keys()) + list(
             preload["external_sources"].keys()
         )
+        parent = self.model.parentNodeForPath(base_path)
         for atl_name in atl_names:
-            self._item_cls(
-                base_path + "/" + atl_name,
-                model=self.model,
-                atl_name=atl_name,
-                parent=self.model.parentForPath(base_path),
-            )
+            self.model.appendNode(parent, atl_name, payload=atl_name)
+
+    def finish_model(self):
+        # the trigger/source nodes of each wem, so filtering by a wem id is a lookup rather than a walk over every node
+        wwise = self.model.archive.wwise
+        wem_nodes = {}
+        for node, atl_name in enumerate(self.model.nodes.payload):
+            if atl_name:
+                for wem_id in wwise.wems_for_atl_name(atl_name):
+                    wem_nodes.setdefault(wem_id, []).append(node)
+        self.model.wem_nodes = {wem_id: np.array(nodes, dtype=np.int64) for wem_id, nodes in wem_nodes.items()}
+        super().finish_model()
+
+    def payload_index(self, items):
+        # the payload of a trigger/source node is its own name
+        return array("q", (NO_NODE if _ is None else 0 for _ in self.model.nodes.payload))
+
+    def restore_payloads(self, items, item_index):
+        nodes = self.model.nodes
+        nodes.payload = [None if index < 0 else nodes.name(node) for node, index in enumerate(item_index)]
 
 
 class AudioTreeItem(PathArchiveTreeItem, ContentItem):
     _cached_properties_ = PathArchiveTreeItem._cached_properties_ + ["wems"]
 
-    def __init__(self, path, model, atl_name=None, parent=None):
-        super().__init__(path, model, parent)
-        self.atl_name = atl_name
+    def __init__(self, model, node):
+        super().__init__(model, node)
         self._background = qtg.QBrush()
         self._wems = []
         self._wems_loaded = False
 
+    @cached_property
+    def atl_name(self):
+        if self.node < 0:
+            return None
+        return self.model.nodes.payload[self.node]
+
     @cached_property
     def icon(self):
-        if self.children:
+        if self.has_children():
             return icon_provider.icon(icon_provider.IconType.Folder)
         return icon_provider.icon(icon_provider.IconType.File)
 
@@ -147,15 +192,16 @@ class AudioTreeModel(ThreadLoadedPathArchiveTreeModel):
             loader_task_name="load_audio_model",
             loader_task_status_msg="Processing Audio",
         )
+        # the nodes of each wem id, set by the loader once the model is complete
+        self.wem_nodes = {}
 
-        self._sc_manager.p4k_model.loaded.connect(self._on_p4k_loaded)
         self._sc_manager.p4k_model.unloading.connect(
             self._on_p4k_unloading,  # qtc.Qt.BlockingQueuedConnection
         )
 
-    @qtc.Slot()
-    def _on_p4k_loaded(self):
-        self.load(self._sc_manager.sc)
+    def clear(self):
+        super().clear()
+        self.wem_nodes = {}
 
     @qtc.Slot()
     def _on_p4k_unloading(self):
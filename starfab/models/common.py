@@ -1,20 +1,29 @@
 import io
+import itertools
 import logging
 import operator
 import os
+import sys
 import time
 import typing
+from array import array
+from collections import Counter
 from datetime import timedelta
 from functools import cached_property
 from pathlib import Path
 
+import numpy as np
 from scdatatools.p4k import P4KInfo
 from scdatatools.utils import parse_bool
 from starfab import get_starfab
 from starfab.gui import qtc, qtg
 from starfab.gui.utils import icon_provider, icon_for_path
 from starfab.log import getLogger
+from starfab.models.model_cache import ModelCache, model_cache_enabled, model_cache_fingerprint, model_cache_key
+from starfab.models.search_index import PathSearchIndex
 from starfab.settings import settings
+from starfab.tasks import Lane, TaskCancelled, get_scheduler
+from starfab.trace import span
 from starfab.utils import show_file_in_filemanager
 
 logger = getLogger(__name__)
@@ -33,7 +42,8 @@ class AudioConverter(qtc.QRunnable):
     def run(self):
         try:
             starfab = get_starfab()
-            oggfile = starfab.sc.wwise.convert_wem(self.wem_id, return_file=True)
+            with span("convert wem", "audio", wem=self.wem_id):
+                oggfile = starfab.sc.wwise.convert_wem(self.wem_id, return_file=True)
             result = {"id": self.wem_id, "ogg": oggfile, "msg": ""}
         except Exception as e:
             msg = f"AudioConverter failed to convert wem {self.wem_id}: {repr(e)}"
@@ -63,34 +73,32 @@ class ExportRunner(qtc.QRunnable):
         logger.debug(f"Exporting {len(self.p4k_files)} file[s] to {self.outdir}")
         logger.debug(f"{self.export_options}")
 
-        task_id = f"export_runner_{hash(self)}"
-        self.starfab.task_started.emit(
-            task_id, f"Extracting to {self.outdir}", 0, len(self.p4k_files)
-        )
+        task = get_scheduler().task(f"Extracting to {self.outdir}", total=len(self.p4k_files), lane=Lane.BULK)
 
-        t = time.time()
         def _monitor(msg, progress=None, total=None, level=logging.INFO, exc_info=None):
-            nonlocal t
             logger.log(level, msg)
-            self.starfab.update_status_progress.emit(task_id, progress, 0, total, "")
-            if (time.time() - t) > 1.0:
-                t = time.time()
-                qtg.QGuiApplication.processEvents()
+            task.token.check()
+            task.progress(progress, total)
 
         try:
-            self.starfab.sc_manager.sc.p4k.extractall(
-                members=self.p4k_files,
-                path=self.outdir,
-                monitor=_monitor,
-                save_to=self.save_to,
-                overwrite=self.export_options.get("overwrite", False),
-                converters=self.export_options.get("converters", []),
-                converter_options=self.export_options,
-            )
+            with span("extract", "export", files=len(self.p4k_files), outdir=self.outdir):
+                self.starfab.sc_manager.sc.p4k.extractall(
+                    members=self.p4k_files,
+                    path=self.outdir,
+                    monitor=_monitor,
+                    save_to=self.save_to,
+                    overwrite=self.export_options.get("overwrite", False),
+                    converters=self.export_options.get("converters", []),
+                    converter_options=self.export_options,
+                )
+        except TaskCancelled:
+            logger.info(f"Export to {self.outdir} cancelled")
+            self.signals.finished.emit({"error": "cancelled"})
+            task.finish(False)
         except Exception as e:
             logger.exception(f"Export failed", exc_info=e)
             self.signals.finished.emit({"error": str(e)})
-            self.starfab.task_finished.emit(task_id, False, f"Error during export: {e}")
+            task.finish(False, f"Error during export: {e}")
         else:
             self.signals.finished.emit({"error": ""})
             open_dir = parse_bool(
@@ -98,90 +106,790 @@ class ExportRunner(qtc.QRunnable):
             )
             if open_dir:
                 show_file_in_filemanager(Path(self.outdir).absolute())
-            self.starfab.task_finished.emit(task_id, True, "")
+            task.finish()
 
 
 class BackgroundRunnerSignals(qtc.QObject):
     cancel = qtc.Signal()
     finished = qtc.Signal(dict)
+    nodes_available = qtc.Signal(int)
+
+
+class NodeMaskFilter:
+    """An additional filter of a `PathArchiveTreeSortFilterProxyModel` given as a boolean mask over the source model's
+    nodes, so it can be combined with the search index for every node at once rather than be called for each row"""
+
+    def __init__(self, mask):
+        self.mask = mask
+
+    def __call__(self, item) -> bool:
+        return item.node < len(self.mask) and bool(self.mask[item.node])
+
+
+class PathSearchRunner(qtc.QRunnable):
+    """Resolves a filter text and `NodeMaskFilter`s into a node mask with `proxy.filterMask` in the thread pool"""
+
+    def __init__(self, proxy, search_index, text, case_sensitive, filters=()):
+        super().__init__()
+        self.signals = BackgroundRunnerSignals()
+        self.proxy = proxy
+        self.search_index = search_index
+        self.text = text
+        self.case_sensitive = case_sensitive
+        self.filters = filters
+        self._should_cancel = False
+        self.signals.cancel.connect(self._handle_cancel)
+        self.setAutoDelete(True)
+
+    def _handle_cancel(self):
+        self._should_cancel = True
+
+    def _cancelled(self):
+        return self._should_cancel
+
+    def run(self):
+        try:
+            mask = self.proxy.filterMask(
+                self.search_index, self.text, self.case_sensitive, self.filters, self._cancelled
+            )
+        except Exception as e:
+            logger.exception(f"Failed to search for {self.text!r}", exc_info=e)
+            mask = None
+        if not self._should_cancel:
+            self.signals.finished.emit({"text": self.text, "mask": mask})
+
+
+class SiblingOrderProxyModel(qtc.QAbstractProxyModel):
+    """Shows the rows of a `PathArchiveTreeModel` in a precomputed order.
+
+    `PathArchiveTreeSortFilterProxyModel` sits on top of this rather than on the tree model itself. Without an order
+    the rows are passed through as the model has them. `setSiblingOrder` takes the children of every node as sorted in
+    one vectorized step by `PathSearchIndex.sibling_order`, so the filter proxy above only has to keep its source's
+    order rather than compare rows in Python. Indexes share their `internalPointer` items with the tree model.
+    """
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        # `(nodes, first child positions, rows)` from `PathSearchIndex.sibling_order`, `None` for the model's own order
+        self._order = None
+        self._layout_persistent = []
+
+    def _source_signals(self, model):
+        return (
+            (model.modelAboutToBeReset, self._source_about_to_be_reset),
+            (model.modelReset, self._source_reset),
+            (model.rowsAboutToBeInserted, self._source_rows_about_to_be_inserted),
+            (model.rowsInserted, self._source_rows_inserted),
+            (model.rowsAboutToBeRemoved, self._source_rows_about_to_be_removed),
+            (model.rowsRemoved, self._source_rows_removed),
+            (model.layoutAboutToBeChanged, self._source_layout_about_to_be_changed),
+            (model.layoutChanged, self._source_layout_changed),
+            (model.dataChanged, self._source_data_changed),
+            (model.headerDataChanged, self.headerDataChanged),
+        )
+
+    def setSourceModel(self, model):
+        self.beginResetModel()
+        if (old_model := self.sourceModel()) is not None:
+            for signal, slot in self._source_signals(old_model):
+                signal.disconnect(slot)
+        self._order = None
+        super().setSourceModel(model)
+        if model is not None:
+            for signal, slot in self._source_signals(model):
+                signal.connect(slot)
+        self.endResetModel()
+
+    @property
+    def is_ordered(self):
+        return self._order is not None
+
+    def setSiblingOrder(self, order):
+        """Show the children of every node in `order`, as returned by `PathSearchIndex.sibling_order`, or in the
+        source model's own order if it's `None`"""
+        if order is None and self._order is None:
+            return
+        self.layoutAboutToBeChanged.emit()
+        persistent = self.persistentIndexList()
+        self._order = order
+        self.changePersistentIndexList(
+            persistent, [self._indexForItem(_.internalPointer(), _.column()) for _ in persistent]
+        )
+        self.layoutChanged.emit()
+
+    def childNode(self, node, row) -> int:
+        """Returns the node shown at `row` of the node index `node`, or `NO_NODE`"""
+        if self._order is None:
+            return self.sourceModel().childNode(node, row)
+        order, first_child, _ = self._order
+        if first_child[node] < 0 or not 0 <= row < self.sourceModel().nodes.child_count[node]:
+            return NO_NODE
+        return int(order[first_child[node] + row])
+
+    def childItem(self, item, row):
+        """Returns the source model's item shown at `row` below `item`, or `None`"""
+        if self._order is None:
+            return item.child(row)
+        return self.sourceModel().itemForNode(self.childNode(item.node, row))
+
+    def _indexForItem(self, item, column):
+        if item is None:
+            return qtc.QModelIndex()
+        row = item.row() if self._order is None else int(self._order[2][item.node])
+        return self.createIndex(row, column, item)
+
+    def mapFromSource(self, source_index):
+        if not source_index.isValid():
+            return qtc.QModelIndex()
+        if self._order is None:
+            return self.createIndex(source_index.row(), source_index.column(), source_index.internalPointer())
+        return self._indexForItem(source_index.internalPointer(), source_index.column())
+
+    def mapToSource(self, proxy_index):
+        if not proxy_index.isValid():
+            return qtc.QModelIndex()
+        item = proxy_index.internalPointer()
+        row = proxy_index.row() if self._order is None else item.row()
+        return self.sourceModel().createIndex(row, proxy_index.column(), item)
+
+    def index(self, row, column, parent=qtc.QModelIndex()):
+        # called for every row the proxy above compares, so the source model checks the bounds
+        if self._order is None:
+            return self.mapFromSource(self.sourceModel().index(row, column, self.mapToSource(parent)))
+        if not 0 <= column < len(self.sourceModel().columns):
+            return qtc.QModelIndex()
+        node = parent.internalPointer().node if parent.isValid() else ROOT_NODE
+        if (item := self.sourceModel().itemForNode(self.childNode(node, row))) is None:
+            return qtc.QModelIndex()
+        return self.createIndex(row, column, item)
+
+    def parent(self, index=qtc.QModelIndex()):
+        if not index.isValid():
+            return qtc.QModelIndex()
+        if self._order is None:
+            return self.mapFromSource(self.sourceModel().parent(self.mapToSource(index)))
+        if (parent := self.sourceModel().nodes.parent[index.internalPointer().node]) <= ROOT_NODE:
+            return qtc.QModelIndex()
+        return self._indexForItem(self.sourceModel().itemForNode(parent), 0)
+
+    def sibling(self, row, column, index):
+        return self.index(row, column, self.parent(index))
+
+    def rowCount(self, parent=qtc.QModelIndex()):
+        return self.sourceModel().rowCount(self.mapToSource(parent)) if self.sourceModel() is not None else 0
+
+    def columnCount(self, parent=qtc.QModelIndex()):
+        return self.sourceModel().columnCount(self.mapToSource(parent)) if self.sourceModel() is not None else 0
+
+    def hasChildren(self, parent=qtc.QModelIndex()):
+        return self.sourceModel() is not None and self.sourceModel().hasChildren(self.mapToSource(parent))
+
+    def headerData(self, section, orientation, role=qtc.Qt.DisplayRole):
+        return self.sourceModel().headerData(section, orientation, role)
+
+    def _source_about_to_be_reset(self):
+        self.beginResetModel()
+        self._order = None
+
+    def _source_reset(self):
+        self.endResetModel()
+
+    def _source_rows_about_to_be_inserted(self, parent, first, last):
+        # rows are only inserted while a model loads, before it has any sort ranks
+        self.setSiblingOrder(None)
+        self.beginInsertRows(self.mapFromSource(parent), first, last)
+
+    def _source_rows_inserted(self, parent, first, last):
+        self.endInsertRows()
+
+    def _source_rows_about_to_be_removed(self, parent, first, last):
+        self.setSiblingOrder(None)
+        self.beginRemoveRows(self.mapFromSource(parent), first, last)
+
+    def _source_rows_removed(self, parent, first, last):
+        self.endRemoveRows()
+
+    def _source_layout_about_to_be_changed(self, parents=(), hint=None):
+        self.layoutAboutToBeChanged.emit()
+        self._layout_persistent = self.persistentIndexList()
+
+    def _source_layout_changed(self, parents=(), hint=None):
+        # the source's rows were reordered, which only moves the rows shown in the model's own order
+        persistent, self._layout_persistent = self._layout_persistent, []
+        self.changePersistentIndexList(
+            persistent, [self._indexForItem(_.internalPointer(), _.column()) for _ in persistent]
+        )
+        self.layoutChanged.emit()
+
+    def _source_data_changed(self, top_left, bottom_right, roles=()):
+        if self._order is not None and top_left.row() != bottom_right.row():
+            # the range isn't contiguous in this order, so it's widened to every row of the parent
+            parent = self.mapFromSource(top_left.parent())
+            top_left = self.index(0, top_left.column(), parent)
+            bottom_right = self.index(self.rowCount(parent) - 1, bottom_right.column(), parent)
+        else:
+            top_left, bottom_right = self.mapFromSource(top_left), self.mapFromSource(bottom_right)
+        self.dataChanged.emit(top_left, bottom_right, roles)
 
 
 class PathArchiveTreeSortFilterProxyModel(qtc.QSortFilterProxyModel):
+    # resolve plain text filters through the source model's `search_index`. Subclasses whose `filterAcceptsRow` does
+    # not start with `acceptsNode` must turn this off, as recursive filtering is disabled while the index is used
+    use_search_index = True
+
+    # emitted with `True` when a filter text is being resolved in the background, and `False` once it's applied
+    searching = qtc.Signal(bool)
+
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
         self._filter = ""
         self._filters = []
         self._dynamic_filters = []
+        # the most recently requested filter text, `_filter` is only updated once it has been applied
+        self._requested_filter = ""
+        self._filter_mask = None
+        self._search_runner = None
+        self._searching = False
+        # `(column, ranks)` of the source model's sort ranks for the current sort, see `sortRanks`
+        self._sort_ranks = None
+        self._folders_first = parse_bool(settings.value("tree_view_folders_first"))
+        # the requested sort, the rows are only compared by the proxy itself while there are no ranks for it
+        self._sort_column = -1
+        self._sort_order = qtc.Qt.AscendingOrder
+        # shows the rows of a tree model in the order of its sort ranks, see `_apply_sort`
+        self._ordered = None
         self.setRecursiveFilteringEnabled(True)
 
     @property
     def additional_filters(self):
         return self._filters + self._dynamic_filters
 
-    def setFilterText(self, text):
+    @property
+    def is_searching(self):
+        return self._searching
+
+    def setSourceModel(self, model):
+        if (old_model := self.sourceModel()) is not None and hasattr(old_model, "loaded"):
+            old_model.loaded.disconnect(self._source_loaded)
+            old_model.unloading.disconnect(self._source_unloading)
+            old_model.modelReset.disconnect(self._source_reset)
+        self._cancel_search()
+        self._filter_mask = None
+        self._sort_ranks = None
+        self.setRecursiveFilteringEnabled(True)
+        if isinstance(model, PathArchiveTreeModel):
+            if self._ordered is None:
+                self._ordered = SiblingOrderProxyModel(self)
+            self._ordered.setSourceModel(model)
+            super().setSourceModel(self._ordered)
+        else:
+            if self._ordered is not None:
+                self._ordered.setSourceModel(None)
+                self._ordered = None
+            super().setSourceModel(model)
+        if model is not None and hasattr(model, "loaded"):
+            model.loaded.connect(self._source_loaded)
+            model.unloading.connect(self._source_unloading)
+            model.modelReset.connect(self._source_reset)
+        if self._sort_column >= 0:
+            self._apply_sort()
+        if self.filterQuery(self._requested_filter):
+            self._apply_filter()
+
+    def sourceModel(self):
+        """The tree model, rather than the `SiblingOrderProxyModel` in between"""
+        model = super().sourceModel()
+        if self._ordered is not None and model is self._ordered:
+            return self._ordered.sourceModel()
+        return model
+
+    def mapFromSource(self, source_index):
+        # indexes of the tree model are mapped through the rows of the `SiblingOrderProxyModel`
+        if self._ordered is not None and source_index.model() is not self._ordered:
+            source_index = self._ordered.mapFromSource(source_index)
+        return super().mapFromSource(source_index)
+
+    def sourceItem(self, source_row, source_parent: qtc.QModelIndex):
+        """Returns the source model's item shown at `source_row` of `source_parent`, the arguments of
+        `filterAcceptsRow`. The source rows are in the order of the current sort rather than the items' own rows."""
+        if (parent := source_parent.internalPointer() or self.sourceModel().root_item) is None:
+            return None
+        if self._ordered is None:
+            return parent.child(source_row)
+        return self._ordered.childItem(parent, source_row)
+
+    def _source_loaded(self):
+        # the search index and sort ranks become available once the model has finished loading
+        self._sort_ranks = None
+        if self._sort_column >= 0:
+            self._apply_sort()
+        if self.filterQuery(self._requested_filter):
+            self._apply_filter()
+
+    def _source_unloading(self):
+        # the current mask and sort ranks belong to the nodes that are about to be cleared
+        self._sort_ranks = None
+        self._cancel_search()
+        self._set_filter(self.filterQuery(self._requested_filter), None)
+        self._set_searching(False)
+
+    def _source_reset(self):
+        # rows are compared by their data while the model (re)loads, which is cheap to set up while it's still empty
+        if self._sort_column >= 0 and super().sortColumn() != self._sort_column:
+            super().sort(self._sort_column, self._sort_order)
+
+    def _set_searching(self, searching):
+        if searching != self._searching:
+            self._searching = searching
+            self.searching.emit(searching)
+
+    def _cancel_search(self):
+        if self._search_runner is not None:
+            self._search_runner.signals.cancel.emit()
+            self._search_runner = None
+
+    def _apply_filter(self):
+        """Filter on the requested text. If the source model has a search index, the text is resolved into a node mask
+        in the thread pool and the current filter stays in place until it's done, otherwise it's applied right away.
+        Additional filters can only be resolved with the text if they're all `NodeMaskFilter`s."""
+        self._cancel_search()
+        text = self.filterQuery(self._requested_filter)
+        search_index = getattr(self.sourceModel(), "search_index", None)
+        filters = self.additional_filters
+        if (
+            self.use_search_index
+            and (text or filters)
+            and search_index is not None
+            and all(isinstance(_, NodeMaskFilter) for op, _ in filters)
+        ):
+            self._search_runner = PathSearchRunner(
+                self, search_index, text, self.filterCaseSensitivity() == qtc.Qt.CaseSensitive, filters
+            )
+            self._search_runner.signals.finished.connect(self._search_finished)
+            self._set_searching(True)
+            get_scheduler().start(self._search_runner, Lane.INTERACTIVE)
+        else:
+            self._set_filter(text, None)
+            self._set_searching(False)
+
+    def _set_filter(self, text, mask):
         self._filter = text
+        self._filter_mask = mask
+        # the mask already contains the ancestors of every match, so there's no need to search through the children
+        # of rejected rows
+        self.setRecursiveFilteringEnabled(mask is None)
         self.invalidateFilter()
 
+    @qtc.Slot(dict)
+    def _search_finished(self, result):
+        # ignore results of searches that have since been superseded
+        if self._search_runner is None or self.sender() is not self._search_runner.signals:
+            return
+        self._search_runner = None
+        self._set_filter(result["text"], result["mask"])
+        self._set_searching(False)
+
+    def filterQuery(self, text) -> str:
+        """Returns the filter that is applied for the filter text `text`"""
+        return text
+
+    def filterMask(self, search_index, text, case_sensitive, filters, cancelled):
+        """Returns the mask of nodes that are accepted for the filter `text` and the `(operator, NodeMaskFilter)`
+        pairs `filters`, combined as in `checkAdditionFilters`. Called from the thread pool like `searchMask`."""
+        mask = self.searchMask(search_index, text, case_sensitive, cancelled) if text else None
+        if not filters or (text and mask is None):
+            return mask
+        accepted = np.ones(len(search_index), dtype=bool)
+        for op, node_filter in filters:
+            if len(node_filter.mask) != len(search_index):
+                raise ValueError("The filter's mask doesn't match the model's nodes")
+            if op == operator.not_:
+                accepted &= ~node_filter.mask
+            else:
+                accepted = op(accepted, node_filter.mask)
+        if mask is not None:
+            accepted &= mask
+        return search_index.expand(accepted, descendants=False, cancelled=cancelled)
+
+    def searchMask(self, search_index, text, case_sensitive, cancelled):
+        """Returns the mask of nodes that are accepted for the filter `text`, see `PathSearchIndex.search`. This is
+        called from the thread pool, so it must not touch the proxy's own state."""
+        return search_index.search(text, case_sensitive=case_sensitive, cancelled=cancelled)
+
+    def acceptsNode(self, source_row, source_parent: qtc.QModelIndex):
+        """Returns whether the row is accepted by the current search index mask, or `None` if there is no mask"""
+        if self._filter_mask is None:
+            return None
+        if (parent := source_parent.internalPointer()) is None:
+            parent = self.sourceModel().root_item
+        node = self._ordered.childNode(parent.node, source_row) if self._ordered is not None else NO_NODE
+        return NO_NODE < node < len(self._filter_mask) and bool(self._filter_mask[node])
+
+    def acceptedNodes(self):
+        """Returns a boolean mask over the source nodes for the rows the current filter accepts, or `None` if rows can
+        only be filtered one at a time"""
+        if not self.use_search_index or (search_index := getattr(self.sourceModel(), "search_index", None)) is None:
+            return None
+        if self._filter_mask is not None:
+            return self._filter_mask
+        if not self._filter and not self.additional_filters:
+            return np.ones(len(search_index), dtype=bool)
+        return None
+
+    def leafItems(self, indexes):
+        """Returns the source items of the rows without any visible children at or below the proxy `indexes`, e.g. the
+        files in the selected directories. Resolved in the source tree with the filter's mask when there is one, rather
+        than by walking the proxy."""
+        if (accepted := self.acceptedNodes()) is None:
+            items = []
+
+            def _add_indexes(indexes):
+                for i in indexes:
+                    if self.hasChildren(i):
+                        _add_indexes([self.index(_, 0, i) for _ in range(self.rowCount(i))])
+                    elif i.isValid():
+                        items.append(self.mapToSource(i).internalPointer())
+
+            _add_indexes(indexes)
+            return items
+
+        model = self.sourceModel()
+        search_index = model.search_index
+        selected = np.zeros(len(search_index), dtype=bool)
+        selected[[
+            self.mapToSource(_).internalPointer().node if _.isValid() else model.root_item.node for _ in indexes
+        ]] = True
+        shown_nodes = np.flatnonzero(accepted)
+        has_shown_children = np.zeros(len(search_index), dtype=bool)
+        has_shown_children[search_index.parent[shown_nodes[shown_nodes > ROOT_NODE]]] = True
+        leaves = search_index.descendants(selected) & accepted & ~has_shown_children
+        leaves[ROOT_NODE] = False
+        return [model.itemForNode(_) for _ in np.flatnonzero(leaves).tolist()]
+
+    def setFilterText(self, text):
+        self._requested_filter = text
+        self._apply_filter()
+
     def setAdditionFilters(self, filters):
         self._dynamic_filters = filters
-        self.invalidateFilter()
+        self._apply_filter()
 
     def checkAdditionFilters(self, item):
         accepted = True
         for op, adfilt in self.additional_filters:
             if op == operator.not_:
-                accepted = op(adfilt(item))
+                accepted = accepted and not adfilt(item)
             else:
                 accepted = op(accepted, adfilt(item))
         return accepted
 
+    def sort(self, column, order=qtc.Qt.AscendingOrder):
+        # read once per sort rather than for every comparison
+        folders_first = parse_bool(settings.value("tree_view_folders_first"))
+        if folders_first != self._folders_first:
+            self._folders_first = folders_first
+            self._sort_ranks = None
+        self._sort_column, self._sort_order = column, order
+        self._apply_sort()
+
+    def sortColumn(self):
+        return self._sort_column
+
+    def sortOrder(self):
+        return self._sort_order
+
+    def _apply_sort(self):
+        """Sort the rows by the source model's ranks for the sort column if it has them, with the children of every
+        node ordered in one argsort by the `SiblingOrderProxyModel` while this proxy keeps its source's order. Otherwise
+        the rows are compared one pair at a time with `lessThan`."""
+        sibling_order = None
+        if self._ordered is not None and self._sort_column >= 0 and (ranks := self.sortRanks()) is not None:
+            with span("sibling order", "sort", column=self._sort_column):
+                sibling_order = self.sourceModel().search_index.sibling_order(
+                    ranks, descending=self._sort_order == qtc.Qt.DescendingOrder
+                )
+        if sibling_order is None:
+            if self._ordered is not None:
+                self._ordered.setSiblingOrder(None)
+            super().sort(self._sort_column, self._sort_order)
+        else:
+            # stop comparing rows first, so the new order isn't sorted again
+            super().sort(-1, self._sort_order)
+            self._ordered.setSiblingOrder(sibling_order)
+
+    def sortRanks(self):
+        """Returns the source model's sort ranks for the current sort column, or `None` if it has none (yet), see
+        `PathArchiveTreeModel.sortRanks`"""
+        column = self.sortColumn()
+        if self._sort_ranks is None or self._sort_ranks[0] != column:
+            if (ranks := getattr(self.sourceModel(), "sortRanks", None)) is None:
+                return None
+            if (ranks := ranks(column, self._folders_first)) is None:
+                return None
+            self._sort_ranks = (column, ranks)
+        return self._sort_ranks[1]
+
     def lessThan(self, source_left, source_right):
-        if settings.value('tree_view_folders_first'):
+        # only used while the source model has no sort ranks for the column, see `_apply_sort`
+        if self._folders_first:
             left_has_children = bool(source_left.internalPointer().has_children())
             right_has_children = bool(source_right.internalPointer().has_children())
             if left_has_children and not right_has_children:
                 return True
             elif right_has_children and not left_has_children:
                 return False
+        return self.dataLessThan(source_left, source_right)
+
+    def dataLessThan(self, source_left, source_right):
+        """Compares two rows by their data, used for columns the source model has no sort ranks for"""
         return super().lessThan(source_left, source_right)
 
     def filterAcceptsRow(self, source_row, source_parent: qtc.QModelIndex) -> bool:
         if not self._filter and not self.additional_filters:
             return True
-
-        if (parent := source_parent.internalPointer()) is None:
-            parent = getattr(self.sourceModel(), 'root_item')
-        if parent:
-            try:
-                item = parent.children[source_row]
-            except IndexError:
-                return False
-            if not self._filter and not self.checkAdditionFilters(item):
-                return False
-            elif self.checkAdditionFilters(item):
-                if self.filterCaseSensitivity() == qtc.Qt.CaseInsensitive:
-                    return self._filter.lower() in item._path.lower()
-                else:
-                    return self._filter in item._path
+        if (accepted := self.acceptsNode(source_row, source_parent)) is not None:
+            return accepted
+
+        if (item := self.sourceItem(source_row, source_parent)) is None:
+            return False
+        if not self._filter and not self.checkAdditionFilters(item):
+            return False
+        elif self.checkAdditionFilters(item):
+            if self.filterCaseSensitivity() == qtc.Qt.CaseInsensitive:
+                return self._filter.lower() in item._path.lower()
+            else:
+                return self._filter in item._path
         return False
 
 
+ROOT_NODE = 0
+NO_NODE = -1
+
+
+class PathArchiveTreeNodes:
+    """Compact, column oriented storage for the nodes of a `PathArchiveTreeModel`.
+
+    Every node is an integer index into a set of parallel arrays. The structure of the tree is kept as parent,
+    first-child, last-child and next-sibling links along with the `row` of each node within its parent, names are
+    interned into a shared table and the `size`/`time` columns hold the values that are needed for display and sorting
+    (`-1` when unknown). `payload` holds the loader specific object for a node (e.g. the `P4KInfo` or DataCore record),
+    if any.
+
+    `PathArchiveTreeItem` objects are only created as lightweight facades over a node when they're requested through
+    the model.
+
+    The store isn't locked. While a `ThreadLoadedPathArchiveTreeModel` is loading, the loader thread appends to it and
+    owns its lookup tables (`children`, `child_named` and `compact`), the GUI thread only reads the rows the model has
+    published, see `ThreadLoadedPathArchiveTreeModel.childNode`.
+    """
+
+    def __init__(self):
+        self.parent = array("q")
+        self.first_child = array("q")
+        self.last_child = array("q")
+        self.next_sibling = array("q")
+        self.child_count = array("q")
+        self.row = array("q")
+        self.name_id = array("q")
+        self.size = array("q")
+        self.time = array("q")
+        self.payload = []
+        self.names = []
+        self._name_ids = {}
+        self._child_rows = {}
+        self._child_names = {}
+        self.append(NO_NODE, "root")
+
+    def __len__(self):
+        return len(self.parent)
+
+    def intern(self, name) -> int:
+        if self._name_ids is None:
+            self._name_ids = {n: i for i, n in enumerate(self.names)}
+        if (name_id := self._name_ids.get(name)) is None:
+            name_id = self._name_ids[name] = len(self.names)
+            self.names.append(name)
+        return name_id
+
+    def append(self, parent, name, size=-1, time=-1, payload=None) -> int:
+        """Append a new node named `name` as the last child of `parent` and return its index"""
+        node = len(self.parent)
+        self.parent.append(parent)
+        self.first_child.append(NO_NODE)
+        self.last_child.append(NO_NODE)
+        self.next_sibling.append(NO_NODE)
+        self.child_count.append(0)
+        self.row.append(0 if parent == NO_NODE else self.child_count[parent])
+        self.name_id.append(self.intern(name))
+        self.size.append(size)
+        self.time.append(time)
+        self.payload.append(payload)
+
+        if parent != NO_NODE:
+            if self.last_child[parent] == NO_NODE:
+                self.first_child[parent] = node
+            else:
+                self.next_sibling[self.last_child[parent]] = node
+            self.last_child[parent] = node
+            self.child_count[parent] += 1
+            if (rows := self._child_rows.get(parent)) is not None:
+                rows.append(node)
+            if (names := self._child_names.get(parent)) is not None:
+                names.setdefault(name, node)
+        return node
+
+    def extend(self, parent, names, sizes=None, times=None, payloads=None) -> range:
+        """Append a new node for each of `names` as the last children of `parent`, see `append`. The optional `sizes`,
+        `times` and `payloads` sequences must be the same length as `names`. Returns the range of the new node indices.
+        """
+        count = len(names)
+        first = len(self.parent)
+        nodes = range(first, first + count)
+        if count == 1:
+            self.append(
+                parent,
+                names[0],
+                size=-1 if sizes is None else sizes[0],
+                time=-1 if times is None else times[0],
+                payload=None if payloads is None else payloads[0],
+            )
+        if count <= 1:
+            return nodes
+
+        self.parent.extend(array("q", [parent]) * count)
+        self.first_child.extend(array("q", [NO_NODE]) * count)
+        self.last_child.extend(array("q", [NO_NODE]) * count)
+        self.next_sibling.extend(nodes[1:])
+        self.next_sibling.append(NO_NODE)
+        self.child_count.extend(array("q", [0]) * count)
+        self.row.extend(range(self.child_count[parent], self.child_count[parent] + count))
+        self.name_id.extend(map(self.intern, names))
+        self.size.extend(array("q", [-1]) * count if sizes is None else sizes)
+        self.time.extend(array("q", [-1]) * count if times is None else times)
+        self.payload.extend([None] * count if payloads is None else payloads)
+
+        if self.last_child[parent] == NO_NODE:
+            self.first_child[parent] = first
+        else:
+            self.next_sibling[self.last_child[parent]] = first
+        self.last_child[parent] = nodes[-1]
+        self.child_count[parent] += count
+        if (rows := self._child_rows.get(parent)) is not None:
+            rows.extend(nodes)
+        if (child_names := self._child_names.get(parent)) is not None:
+            for node, name in zip(nodes, names):
+                child_names.setdefault(name, node)
+        return nodes
+
+    def name(self, node) -> str:
+        return self.names[self.name_id[node]]
+
+    def path(self, node) -> str:
+        parts = []
+        while node > ROOT_NODE:
+            parts.append(self.names[self.name_id[node]])
+            node = self.parent[node]
+        return "/".join(reversed(parts))
+
+    def iter_children(self, node):
+        child = self.first_child[node]
+        while child != NO_NODE:
+            yield child
+            child = self.next_sibling[child]
+
+    def children(self, node) -> array:
+        """Returns the children of `node` in row order. The row lookup is built on first access for a node."""
+        if (rows := self._child_rows.get(node)) is None:
+            rows = self._child_rows[node] = array("q", self.iter_children(node))
+        return rows
+
+    def child(self, node, row) -> int:
+        if 0 <= row < self.child_count[node]:
+            return self.children(node)[row]
+        return NO_NODE
+
+    def child_named(self, node, name) -> int:
+        """Returns the first child of `node` named `name`. The name lookup is built on first access for a node."""
+        if (names := self._child_names.get(node)) is None:
+            names = self._child_names[node] = {}
+            for child in self.iter_children(node):
+                names.setdefault(self.names[self.name_id[child]], child)
+        return names.get(name, NO_NODE)
+
+    def compact(self):
+        """Release the lookup tables that are only needed while nodes are being appended. Called by the loader thread
+        once it's done appending, before the model is marked as loaded, so the GUI thread isn't using them yet."""
+        self._name_ids = None
+        self._child_rows = {}
+        self._child_names = {}
+
+    def sort_children(self, node, key, reverse=False):
+        """Reorder the children of `node` by `key`, a callable taking a child node index. The sibling links and the
+        `row` column are updated to match the new order."""
+        children = sorted(self.iter_children(node), key=key, reverse=reverse)
+        if not children:
+            return
+        self.first_child[node] = children[0]
+        self.last_child[node] = children[-1]
+        for row, child in enumerate(children):
+            self.row[child] = row
+            self.next_sibling[child] = children[row + 1] if row + 1 < len(children) else NO_NODE
+        self._child_rows[node] = array("q", children)
+
+    def set_sibling_order(self, order, first_child, rows):
+        """Relink the children of every node in the order returned by `PathSearchIndex.sibling_order`"""
+        parents = np.frombuffer(self.parent, dtype=np.int64)[order]
+        ends = np.ones(len(order), dtype=bool)
+        ends[:-1] = parents[1:] != parents[:-1]
+        next_sibling = np.full(len(self), NO_NODE, dtype=np.int64)
+        next_sibling[order[:-1][~ends[:-1]]] = order[1:][~ends[:-1]]
+        first = np.full(len(self), NO_NODE, dtype=np.int64)
+        first[first_child >= 0] = order[first_child[first_child >= 0]]
+        last = np.full(len(self), NO_NODE, dtype=np.int64)
+        last[parents[ends]] = order[ends]
+        self.first_child = array("q", first.tobytes())
+        self.last_child = array("q", last.tobytes())
+        self.next_sibling = array("q", next_sibling.tobytes())
+        self.row = array("q", rows.astype(np.int64).tobytes())
+        self._child_rows = {}
+        self._child_names = {}
+
+    def iter_subtree(self, node):
+        """Yields every node below `node`, depth first"""
+        stack = list(reversed(self.children(node)))
+        while stack:
+            child = stack.pop()
+            yield child
+            if self.child_count[child]:
+                stack.extend(reversed(self.children(child)))
+
+    def memory_usage(self) -> int:
+        """Approximate number of bytes used by the node columns and name table"""
+        columns = (
+            self.parent, self.first_child, self.last_child, self.next_sibling,
+            self.child_count, self.row, self.name_id, self.size, self.time,
+        )
+        return (
+            sum(c.itemsize * len(c) for c in columns)
+            + sys.getsizeof(self.payload)
+            + sys.getsizeof(self.names)
+            + sys.getsizeof(self._name_ids or {})
+            + sum(sys.getsizeof(n) for n in self.names)
+        )
+
+
 class PathArchiveTreeItem:
-    _cached_properties_ = ["info", "icon", "suffix", "path"]
+    """Lightweight facade over a node of a `PathArchiveTreeModel`. Items are created by the model on demand, use
+    `PathArchiveTreeModel.itemForNode` rather than constructing them directly."""
 
-    def __init__(self, path, model, parent=None):
-        self._path = path
-        self.name = path.rsplit("/", maxsplit=1)[-1]
-        self.model = model
-        self.parent = parent
-        self.children = []
-        self.children_by_name = {}
+    _cached_properties_ = ["info", "icon", "suffix", "path", "_path", "name"]
 
-        if parent is not None:
-            parent.appendChild(self)
+    def __init__(self, model, node):
+        self.model = model
+        self.node = node
 
     def __repr__(self):
-        return f"<PathArchiveTreeItem {self.path} children:{len(self.children)}>"
+        return f"<PathArchiveTreeItem {self.path} children:{self.childCount()}>"
 
     def clear_cache(self):
         """Clear cached property values, triggering them to be recalculated"""
@@ -193,6 +901,14 @@ class PathArchiveTreeItem:
     def archive(self):
         return self.model.archive
 
+    @cached_property
+    def name(self):
+        return self.model.nodes.name(self.node)
+
+    @cached_property
+    def _path(self):
+        return self.model.nodes.path(self.node)
+
     @cached_property
     def path(self):
         return Path(self._path)
@@ -211,31 +927,39 @@ class PathArchiveTreeItem:
     def icon(self):
         return icon_for_path(self.name) or icon_provider.icon(icon_provider.IconType.Folder)
 
-    def has_children(self):
-        return bool(self.children)
+    @property
+    def parent(self):
+        if self.node <= ROOT_NODE:
+            return None
+        return self.model.itemForNode(self.model.nodes.parent[self.node])
 
-    def appendChild(self, child):
-        child.parent = self
-        self.children.append(child)
-        self.children_by_name[child.name] = child
+    @property
+    def children(self):
+        return [self.model.itemForNode(_) for _ in self.model.childNodes(self.node)]
 
-    def appendChildren(self, children):
-        for child in children:
-            self.appendChild(child)
+    def has_children(self):
+        return self.node >= ROOT_NODE and self.model.nodes.child_count[self.node] > 0
 
     def child(self, row):
-        return self.children[row]
+        if self.node < ROOT_NODE:
+            return None
+        return self.model.itemForNode(self.model.childNode(self.node, row))
+
+    def childForName(self, name):
+        return self.model.itemForNode(self.model.nodes.child_named(self.node, name))
 
     def row(self):
-        if self.parent is not None:
-            return self.parent.children.index(self)
-        return 0
+        if self.node <= ROOT_NODE:
+            return 0
+        return self.model.nodes.row[self.node]
 
     def index(self):
         return self.model.createIndex(self.row(), 0, self)
 
     def childCount(self):
-        return len(self.children)
+        if self.node < ROOT_NODE:
+            return 0
+        return self.model.nodes.child_count[self.node]
 
     def parentItem(self):
         return self.parent
@@ -260,16 +984,54 @@ class PathArchiveTreeModel(qtc.QAbstractItemModel):
         self.columns = columns or ["Name", "Type"]
         self._item_cls = item_cls or PathArchiveTreeItem
         self.root_item = None
-        self._parent_cache = {".": self.root_item}
+        self.nodes = PathArchiveTreeNodes()
+        self._items = {}
+        self._parent_cache = {".": ROOT_NODE}
+        # `PathSearchIndex` over the nodes, set by the loader once the model is complete
+        self.search_index = None
+        self._sort_ranks = {}
         self._setup_root()
 
     def _setup_root(self):
-        self.root_item = self._item_cls("root", model=self)
+        self.root_item = self.itemForNode(ROOT_NODE)
 
     def clear(self):
         self.archive = None
+        self.nodes = PathArchiveTreeNodes()
+        self._items = {}
+        self._parent_cache = {".": ROOT_NODE}
+        self.search_index = None
+        self._sort_ranks = {}
         self._setup_root()
-        self._parent_cache = {".": self.root_item}
+
+    def itemForNode(self, node):
+        """Returns the `PathArchiveTreeItem` for the node index `node`, creating it if necessary"""
+        if node < ROOT_NODE:
+            return None
+        if (item := self._items.get(node)) is None:
+            item = self._items[node] = self._item_cls(self, node)
+        return item
+
+    def indexForNode(self, node, column=0):
+        if node <= ROOT_NODE:
+            return qtc.QModelIndex()
+        return self.createIndex(self.nodes.row[node], column, self.itemForNode(node))
+
+    def childNodes(self, node):
+        """Returns the child nodes of the node index `node` in row order"""
+        return self.nodes.children(node)
+
+    def childNode(self, node, row) -> int:
+        """Returns the child node at `row` of the node index `node`, or `NO_NODE`"""
+        return self.nodes.child(node, row)
+
+    def appendNode(self, parent, name, **columns) -> int:
+        """Append a new node to the node index `parent`, see `PathArchiveTreeNodes.append`"""
+        return self.nodes.append(parent, name, **columns)
+
+    def appendNodes(self, parent, names, **columns) -> range:
+        """Append a run of new nodes to the node index `parent`, see `PathArchiveTreeNodes.extend`"""
+        return self.nodes.extend(parent, names, **columns)
 
     def index(self, row, column, parent=None):
         if not self.hasIndex(row, column, parent):
@@ -321,42 +1083,150 @@ class PathArchiveTreeModel(qtc.QAbstractItemModel):
             return qtc.Qt.NoItemFlags
         return super().flags(index)
 
-    def parentForPath(self, path):
+    def sortKeys(self, column):
+        """Returns the arrays over the node indices that rows are sorted by for `column`, most significant first, or
+        `None` if the column is sorted by comparing its data. Only called once the model has a `search_index`."""
+        if column == 0:
+            return [self.search_index.name_rank]
+        return None
+
+    def sortRanks(self, column, folders_first=False):
+        """Returns an array with the position of every node when sorted by `column`, with directories first if
+        `folders_first` is set, or `None` if the column can't be ranked. Computed once per load, column and order."""
+        if self.search_index is None:
+            return None
+        if (ranks := self._sort_ranks.get((column, folders_first))) is None:
+            if (keys := self.sortKeys(column)) is None:
+                return None
+            if folders_first:
+                keys = [~self.search_index.has_children] + keys
+            ranks = self._sort_ranks[(column, folders_first)] = self.search_index.sort_ranks(keys)
+        return ranks
+
+    def sort(self, column, order=qtc.Qt.AscendingOrder):
+        """Sort the children of every node in place by `column`. Rows are renumbered as part of the sort, so
+        `row()`/`parent()` lookups remain constant-time afterwards."""
+        nodes = self.nodes
+        ranks = self.sortRanks(column)
+        if column == 0:
+            def _key(node):
+                return nodes.name(node).casefold()
+        else:
+            def _key(node):
+                value = self.itemForNode(node).data(column, qtc.Qt.DisplayRole)
+                return "" if value is None else str(value)
+
+        self.layoutAboutToBeChanged.emit()
+        persistent = self.persistentIndexList()
+        if ranks is not None:
+            nodes.set_sibling_order(
+                *self.search_index.sibling_order(ranks, descending=order == qtc.Qt.DescendingOrder)
+            )
+        else:
+            for parent in range(len(nodes)):
+                if nodes.child_count[parent] > 1:
+                    nodes.sort_children(
+                        parent, key=_key, reverse=order == qtc.Qt.DescendingOrder
+                    )
+        self.changePersistentIndexList(
+            persistent,
+            [
+                self.createIndex(_.internalPointer().row(), _.column(), _.internalPointer())
+                for _ in persistent
+            ],
+        )
+        self.layoutChanged.emit()
+
+    def parentNodeForPath(self, path) -> int:
+        """Returns the node index of the directory that contains `path`, creating any missing directories"""
         if not path:
-            return self.root_item
+            return ROOT_NODE
         parent_path, name = path.rsplit("/", maxsplit=1) if "/" in path else ("", path)
         if "." in name:
-            return self.parentForPath(parent_path)
+            return self.parentNodeForPath(parent_path)
         lower_path = path.lower()
-        if lower_path not in self._parent_cache:
-            parent = self.parentForPath(parent_path)
-            self._parent_cache[lower_path] = self._item_cls(
-                path, model=self, parent=parent
+        if (node := self._parent_cache.get(lower_path)) is None:
+            node = self._parent_cache[lower_path] = self.appendNode(
+                self.parentNodeForPath(parent_path), name
             )
-        return self._parent_cache[lower_path]
+        return node
+
+    def parentForPath(self, path):
+        return self.itemForNode(self.parentNodeForPath(path))
 
     def indexForPath(self, path):
         if (item := self.itemForPath(path)) is not None:
-            return self.createIndex(item.parent.children.index(item), 0, item)
+            return self.createIndex(item.row(), 0, item)
         return qtc.QModelIndex()
 
-    def itemForPath(self, path):
+    def nodeForPath(self, path) -> int:
         if isinstance(path, Path):
             path = path.as_posix()
         if "/" in path:
             parent_path, name = (
                 path.rsplit("/", maxsplit=1) if "/" in path else ("", path)
             )
-            if parent := self._parent_cache.get(parent_path.lower()):
-                return parent.children_by_name.get(name)
-        return self._parent_cache.get(path.lower())
+            if (parent := self._parent_cache.get(parent_path.lower())) is not None:
+                return self.nodes.child_named(parent, name)
+        return self._parent_cache.get(path.lower(), NO_NODE)
+
+    def itemForPath(self, path):
+        return self.itemForNode(self.nodeForPath(path))
+
 
-    def appendChildrenToPath(self, path, rows):
-        if parent := self.parentForPath(path):
-            parent.appendChildren(rows)
+class PathTreeBuilder:
+    """Resolves directory paths to nodes of a `PathArchiveTreeModel`, creating missing directories the same way as
+    `PathArchiveTreeModel.parentNodeForPath`.
+
+    The builder remembers the chain of directories for the last path it resolved. When paths are visited in sorted
+    order, a path in the same directory as the previous one is a single comparison and any other path only walks the
+    components that differ from the previous one, so the whole directory tree is built in one linear pass.
+    """
+
+    def __init__(self, model):
+        self.model = model
+        self._path = None
+        self._node = ROOT_NODE
+        self._parts = []
+        self._nodes = [ROOT_NODE]
+
+    def parent_node(self, path) -> int:
+        if path == self._path:
+            return self._node
+
+        names = path.split("/") if path else []
+        parts = path.lower().split("/") if path else []
+        common = 0
+        for part, previous in zip(parts, self._parts):
+            if part != previous:
+                break
+            common += 1
+        del self._parts[common:]
+        del self._nodes[common + 1:]
+
+        parent_cache = self.model._parent_cache
+        node = self._nodes[-1]
+        for i in range(common, len(parts)):
+            if "." not in names[i] and (i or names[i]):
+                lower_path = "/".join(parts[: i + 1])
+                if (child := parent_cache.get(lower_path)) is None:
+                    child = parent_cache[lower_path] = self.model.appendNode(node, names[i])
+                node = child
+            self._parts.append(parts[i])
+            self._nodes.append(node)
+
+        self._path = path
+        self._node = node
+        return node
 
 
 class PathArchiveTreeModelLoader(qtc.QRunnable):
+    # name of the on-disk cache entry for this loader's model, see `starfab.models.model_cache`. Loaders without a
+    # `cache_name` always build their model from scratch
+    cache_name = ""
+    # minimum time in seconds between `nodes_available` signals while loading
+    publish_interval = 0.25
+
     def __init__(
         self,
         model,
@@ -374,9 +1244,12 @@ class PathArchiveTreeModelLoader(qtc.QRunnable):
         self.signals = BackgroundRunnerSignals()
         self._item_cls = item_cls or PathArchiveTreeItem
         self._should_cancel = False
+        self._last_publish = 0
         self._load_limit = load_limit  # This is for dev/debugging purposes
         self.task_name = task_name or self.__class__.__name__
         self.task_status_message = task_status_msg
+        # status bar `Task`, only if there is a `task_status_message` to show
+        self.task = None
         self.signals.cancel.connect(
             self._handle_cancel,  # qtc.Qt.BlockingQueuedConnection
         )
@@ -389,49 +1262,172 @@ class PathArchiveTreeModelLoader(qtc.QRunnable):
         return []
 
     def load_item(self, item):
-        self._item_cls(item, model=self.model, parent=self.model.parentForPath(item))
-
-    def run(self):
-        logger.debug(f"Starting to load {self.task_name}")
-        start_time = time.time()
-
-        if self.task_status_message:
-            self.starfab.task_started.emit(
-                self.task_name, self.task_status_message, 0, 1
-            )
+        self.model.appendNode(
+            self.model.parentNodeForPath(item), item.rsplit("/", maxsplit=1)[-1]
+        )
 
-        items = self.items_to_load()
+    def _report_progress(self, i):
+        if self.task is not None:
+            self.task.progress(i)
 
-        if self.task_status_message:
-            self.starfab.update_status_progress.emit(
-                self.task_name, 0, 0, len(items), ""
-            )
+    def publish_nodes(self, force=False):
+        """Let the model know how many nodes have been completely loaded so far. This is rate limited to
+        `publish_interval` unless `force` is set, so it is cheap to call after every item."""
+        if force or (time.time() - self._last_publish) > self.publish_interval:
+            self.signals.nodes_available.emit(len(self.model.nodes))
+            self._last_publish = time.time()
 
-        t = time.time()
+    def load_items(self, items) -> bool:
+        """Load `items` into the model, returns `False` if the load was cancelled"""
         for i, f in enumerate(items):
             if self._should_cancel:
-                return  # immediately break
-
-            if (time.time() - t) > 0.5:
-                if self.task_status_message:
-                    self.starfab.update_status_progress.emit(
-                        self.task_name, i, 0, 0, ""
-                    )
-                t = time.time()
+                return False
+            self._report_progress(i)
 
             if 0 <= self._load_limit < i:
                 break
 
             self.load_item(f)
+            self.publish_nodes()
+        return True
+
+    def item_payload(self, item):
+        """Returns the payload that `load_item` stores for `item`"""
+        return item
+
+    def payload_index(self, items) -> array:
+        """Returns the index into `items` of every node's payload, or -1 for nodes without one"""
+        lookup = {id(self.item_payload(item)): i for i, item in enumerate(items)}
+        return array(
+            "q",
+            (NO_NODE if _ is None else lookup.get(id(_), NO_NODE) for _ in self.model.nodes.payload),
+        )
+
+    def restore_payloads(self, items, item_index):
+        """Reverses `payload_index` after the model has been attached to a cached tree"""
+        payloads = [self.item_payload(item) for item in items]
+        payloads.append(None)  # index -1
+        self.model.nodes.payload = [payloads[_] for _ in item_index]
+
+    def finish_model(self):
+        """Called in the loader thread once every node has been loaded, before the model is marked as loaded. Builds
+        whatever is derived from the complete tree."""
+        self.model.search_index = PathSearchIndex(
+            self.model.nodes, self.search_keys(), prefix_index=self.search_prefix_index()
+        )
+
+    def search_keys(self):
+        """Returns `(node, key)` pairs of extra strings the nodes can be searched by, see `PathSearchIndex`"""
+        return None
+
+    def search_prefix_index(self):
+        """Returns a `SortedKeyIndex` of keys the nodes can be searched by the start of, see `PathSearchIndex`"""
+        return None
+
+    def _model_cache(self):
+        if not self.cache_name or self._load_limit >= 0 or not model_cache_enabled():
+            return None
+        if not (key := model_cache_key(getattr(self.starfab, "sc", None))):
+            return None
+        return ModelCache(self.cache_name, key, model_cache_fingerprint(self))
+
+    def _load_cached(self, cache, items) -> bool:
+        if (item_index := cache.load(self.model, len(items))) is None:
+            return False
+        self.restore_payloads(items, item_index)
+        logger.debug(f"Attached {self.task_name} to cached model {cache.path}")
+        return True
+
+    def run(self):
+        with span(self.task_name or type(self).__name__, "model"):
+            self._run()
+
+    def _run(self):
+        logger.debug(f"Starting to load {self.task_name}")
+        start_time = time.time()
+
+        if self.task_status_message:
+            self.task = get_scheduler().task(self.task_status_message, lane=Lane.BACKGROUND, cancellable=False)
+
+        with span("items_to_load", "model"):
+            items = self.items_to_load()
+
+        if self.task is not None:
+            self.task.progress(0, len(items))
+
+        cache = self._model_cache()
+        loaded = False
+        if cache is not None:
+            with span("load cached", "model", items=len(items)):
+                loaded = self._load_cached(cache, items)
+        if not loaded:
+            with span("load items", "model", items=len(items)):
+                if not self.load_items(items):
+                    if self.task is not None:
+                        self.task.cancel()
+                        self.task.finish(False)
+                    return  # immediately break
+                self.model.nodes.compact()
+            if cache is not None:
+                with span("save cache", "model"):
+                    cache.save(self.model, self.payload_index(items), len(items))
+        self.publish_nodes(force=True)
+        with span("finish_model", "model"):
+            self.finish_model()
 
         logger.debug(
             f"Loaded {self.task_name} in {timedelta(seconds=time.time() - start_time)}"
         )
-        if self.task_status_message:
-            self.starfab.task_finished.emit(self.task_name, True, "")
+        if self.task is not None:
+            self.task.finish()
         self.signals.finished.emit({})
 
 
+class SortedPathArchiveTreeModelLoader(PathArchiveTreeModelLoader):
+    """Loader that builds the model in bulk rather than one item at a time.
+
+    Items are sorted on the directory they're loaded into, as returned by `item_parent_path`, so every directory's
+    items end up next to each other. The directories are then created with a `PathTreeBuilder` in a single pass and
+    each run of siblings is handed to `load_children` to be appended at once.
+    """
+
+    def item_parent_path(self, item) -> str:
+        """Returns the path of the directory that `item` is loaded into"""
+        raise NotImplementedError
+
+    def load_children(self, parent, items):
+        """Append `items`, which all belong to the directory node `parent`, to the model"""
+        raise NotImplementedError
+
+    def load_item(self, item):
+        self.load_children(
+            self.model.parentNodeForPath(self.item_parent_path(item)), [item]
+        )
+
+    def load_items(self, items) -> bool:
+        entries = sorted(
+            ((self.item_parent_path(_), _) for _ in items),
+            key=lambda _: _[0].lower(),
+        )
+        if self._load_limit >= 0:
+            del entries[self._load_limit + 1:]
+
+        builder = PathTreeBuilder(self.model)
+        i = 0
+        for parent, group in itertools.groupby(
+            entries, key=lambda _: builder.parent_node(_[0])
+        ):
+            if self._should_cancel:
+                return False
+            self._report_progress(i)
+
+            children = [item for _, item in group]
+            self.load_children(parent, children)
+            self.publish_nodes()
+            i += len(children)
+        return True
+
+
 class ContentItem:
     def __init__(self, name, path, contents=None):
         if contents is not None:
@@ -451,32 +1447,120 @@ class ContentItem:
 
 
 class CheckableModelWrapper(PathArchiveTreeModel):
+    """Adds a check box to every row of `model`.
+
+    Check state is kept per node index: whether a node is fully checked, and for every directory how many of its
+    children are fully checked and how many are checked at least partially. Checking a directory checks everything below
+    it and only the counters of its ancestors are updated, a directory is checked once all of its children are and
+    partially checked while any of them is."""
+
     def __init__(self, model: PathArchiveTreeModel, checkbox_column=0, parent=None):
         qtc.QAbstractItemModel.__init__(self, parent)
         self.archive = model.archive
         self.columns = model.columns or ["Name"]
         self.checkbox_column = checkbox_column
         self._item_cls = model._item_cls
-        self._checked = {}
         self._model = model
+        # the `PathArchiveTreeNodes` the check state belongs to, it's reset when the model is reloaded
+        self._state_nodes = None
+        self._checked = np.zeros(0, dtype=bool)
+        self._checked_children = np.zeros(0, dtype=np.int64)
+        self._marked_children = np.zeros(0, dtype=np.int64)
+
+    def _sync_state(self):
+        nodes = self.nodes
+        if nodes is not self._state_nodes:
+            self._state_nodes = nodes
+            self._checked = np.zeros(len(nodes), dtype=bool)
+            self._checked_children = np.zeros(len(nodes), dtype=np.int64)
+            self._marked_children = np.zeros(len(nodes), dtype=np.int64)
+        elif (added := len(nodes) - len(self._checked)) > 0:
+            # nodes loaded since, they're unchecked until their parent's state is set again
+            self._checked = np.concatenate((self._checked, np.zeros(added, dtype=bool)))
+            self._checked_children = np.concatenate((self._checked_children, np.zeros(added, dtype=np.int64)))
+            self._marked_children = np.concatenate((self._marked_children, np.zeros(added, dtype=np.int64)))
+
+    def _check_state(self, node):
+        if node >= len(self._checked) or self.nodes is not self._state_nodes:
+            return qtc.Qt.CheckState.Unchecked
+        if self._checked[node]:
+            return qtc.Qt.CheckState.Checked
+        if self._marked_children[node]:
+            return qtc.Qt.CheckState.PartiallyChecked
+        return qtc.Qt.CheckState.Unchecked
+
+    def _subtree(self, node):
+        """Returns `node` and all of its descendants, and the number of children of each of them"""
+        nodes = self.nodes
+        subtree = array("q", [node])
+        child_counts = array("q")
+        i = 0
+        while i < len(subtree):
+            count = 0
+            child = nodes.first_child[subtree[i]]
+            while child != NO_NODE:
+                subtree.append(child)
+                count += 1
+                child = nodes.next_sibling[child]
+            child_counts.append(count)
+            i += 1
+        return np.array(subtree, dtype=np.int64), np.array(child_counts, dtype=np.int64)
+
+    def _emit_check_state_changed(self, first, last=None):
+        """Emits `dataChanged` for the check boxes of the sibling nodes `first` to `last`"""
+        last = first if last is None else last
+        self.dataChanged.emit(
+            self.createIndex(self.nodes.row[first], self.checkbox_column, self.itemForNode(first)),
+            self.createIndex(self.nodes.row[last], self.checkbox_column, self.itemForNode(last)),
+            [qtc.Qt.ItemDataRole.CheckStateRole],
+        )
 
-    def _sync_checked(self, item, value, index):
-        self._checked[item] = value
-        self.dataChanged.emit(index, index, [qtc.Qt.EditRole])
-        for i, child in enumerate(item.children):
-            self._sync_checked(child, value, self.createIndex(i, 0, child))
+    def set_checked(self, node, checked):
+        """Check or uncheck `node` and everything below it"""
+        self._sync_state()
+        root = self.root_item.node
+        old_state = self._check_state(node)
+        subtree, child_counts = self._subtree(node)
+        self._checked[subtree] = checked
+        self._checked_children[subtree] = child_counts if checked else 0
+        self._marked_children[subtree] = child_counts if checked else 0
+
+        # one signal for the node and one for the range of its children. Views repaint their whole viewport for a range
+        # change, which covers whatever is shown further down. A signal for every directory below would make a sort
+        # proxy map and sort each of them, and flood the event loop when checking a large tree.
+        if node != root:
+            self._emit_check_state_changed(node)
+        if child_counts[0]:
+            self._emit_check_state_changed(self.nodes.first_child[node], self.nodes.last_child[node])
+        self._update_parents(node, old_state)
+
+    def _update_parents(self, node, old_state):
+        """Updates the counters of the ancestors of `node` after its state changed from `old_state`"""
+        nodes = self.nodes
+        root = self.root_item.node
+        Checked, Unchecked = qtc.Qt.CheckState.Checked, qtc.Qt.CheckState.Unchecked
+        new_state = self._check_state(node)
+        while new_state != old_state and node != root and (parent := nodes.parent[node]) != NO_NODE:
+            old_parent_state = self._check_state(parent)
+            self._checked_children[parent] += (new_state == Checked) - (old_state == Checked)
+            self._marked_children[parent] += (new_state != Unchecked) - (old_state != Unchecked)
+            self._checked[parent] = self._checked_children[parent] == nodes.child_count[parent]
+            node, old_state, new_state = parent, old_parent_state, self._check_state(parent)
+            if new_state != old_state and node != root:
+                self._emit_check_state_changed(node)
 
     def select_all(self):
-        for i, item in enumerate(self.root_item.children):
-            self._sync_checked(item, qtc.Qt.Checked, self.createIndex(i, 0, item))
+        self.set_checked(self.root_item.node, True)
 
     def deselect_all(self):
-        for i, item in enumerate(self.root_item.children):
-            self._sync_checked(item, qtc.Qt.Unchecked, self.createIndex(i, 0, item))
+        self.set_checked(self.root_item.node, False)
 
     @property
     def checked_items(self):
-        return [i for i, checked in self._checked.items() if checked]
+        """The fully checked items, including checked directories"""
+        if self.nodes is not self._state_nodes:
+            return []
+        return [self.itemForNode(_) for _ in np.flatnonzero(self._checked).tolist() if _ != self.root_item.node]
 
     @property
     def root_item(self):
@@ -486,44 +1570,51 @@ class CheckableModelWrapper(PathArchiveTreeModel):
     def _parent_cache(self):
         return self._model._parent_cache
 
+    @property
+    def nodes(self):
+        return self._model.nodes
+
+    @property
+    def search_index(self):
+        return self._model.search_index
+
+    def sortRanks(self, column, folders_first=False):
+        return self._model.sortRanks(column, folders_first)
+
+    def childNodes(self, node):
+        return self._model.childNodes(node)
+
+    def childNode(self, node, row) -> int:
+        return self._model.childNode(node, row)
+
+    def itemForNode(self, node):
+        return self._model.itemForNode(node)
+
     def flags(self, index):
         if not index.isValid():
             return qtc.Qt.NoItemFlags
         return super().flags(index) | qtc.Qt.ItemIsUserCheckable
 
-    def _update_parent(self, item):
-        if item == self.root_item:
-            return
-
-        state = qtc.Qt.CheckState.Unchecked
-        all = True
-        for child in item.children:
-            if (cstate := self._checked.get(child, qtc.Qt.CheckState.Unchecked)) != qtc.Qt.CheckState.Checked:
-                all = False
-            if cstate in [qtc.Qt.CheckState.PartiallyChecked, qtc.Qt.CheckState.Checked]:
-                state = qtc.Qt.CheckState.PartiallyChecked
-        if all:
-            state = qtc.Qt.CheckState.Checked
-        self._checked[item] = state
-        index = self.createIndex(item.parent.children.index(item), 0, item)
-        self.dataChanged.emit(index, index, [qtc.Qt.ItemDataRole.EditRole])
-        self._update_parent(item.parent)
-
     def setData(self, index, value, role=qtc.Qt.ItemDataRole.EditRole):
         if role == qtc.Qt.ItemDataRole.CheckStateRole and index.column() == self.checkbox_column:
-            item = index.internalPointer()
-            self._sync_checked(item, value, index)
-            self._update_parent(item.parent)
+            self.set_checked(index.internalPointer().node, qtc.Qt.CheckState(value) != qtc.Qt.CheckState.Unchecked)
         return True
 
     def data(self, index: qtc.QModelIndex, role: int):
         if role == qtc.Qt.ItemDataRole.CheckStateRole:
-            item = index.internalPointer()
-            return self._checked.get(item, qtc.Qt.CheckState.Unchecked)
+            return self._check_state(index.internalPointer().node)
         return super().data(index, role)
 
 
 class ThreadLoadedPathArchiveTreeModel(PathArchiveTreeModel):
+    """A `PathArchiveTreeModel` that is built by a `PathArchiveTreeModelLoader` in the thread pool.
+
+    Views can be attached as soon as `loading` is emitted. While the loader runs, it periodically reports how many
+    nodes are complete and the model publishes the new rows to its views with `beginInsertRows`/`endInsertRows` on the
+    GUI thread. Until then, `rowCount` only reports rows that have been published.
+    """
+
+    loading = qtc.Signal()
     loaded = qtc.Signal()
     unloading = qtc.Signal()
     cancel_loading = qtc.Signal()
@@ -546,22 +1637,115 @@ class ThreadLoadedPathArchiveTreeModel(PathArchiveTreeModel):
         self._loader_cls = loader_cls
         self.loader_task_name = loader_task_name
         self.loader_task_status_msg = loader_task_status_msg
+        # number of published rows for each node while loading, `None` once everything is published
+        self._row_counts = None
+        self._published = 0
+        # children of published nodes by parent while loading, kept apart from the node store's own row lookup, which
+        # belongs to the loader thread until the model is loaded
+        self._published_children = {}
+
+    def rowCount(self, parent: qtc.QModelIndex = qtc.QModelIndex()):
+        if self._row_counts is None:
+            return super().rowCount(parent)
+        if parent.column() > 0:
+            return 0
+        node = parent.internalPointer().node if parent.isValid() else ROOT_NODE
+        return self._row_counts[node] if node < len(self._row_counts) else 0
+
+    def childNodes(self, node):
+        if self._row_counts is None:
+            return super().childNodes(node)
+        if node >= len(self._row_counts):
+            return array("q")
+        if (children := self._published_children.get(node)) is None:
+            # only published nodes are complete, the loader may be linking newer siblings in as we go
+            children = self._published_children[node] = array(
+                "q", (_ for _ in self.nodes.iter_children(node) if _ < self._published)
+            )
+        return children
+
+    def childNode(self, node, row) -> int:
+        if self._row_counts is None:
+            return super().childNode(node, row)
+        if 0 <= row < (self._row_counts[node] if node < len(self._row_counts) else 0):
+            return self.childNodes(node)[row]
+        return NO_NODE
+
+    def publishNodes(self, count):
+        """Publish the rows of every node below the node index `count` to attached views"""
+        if self._row_counts is None:
+            return
+        count = min(count, len(self.nodes))
+        if count <= self._published:
+            return
+
+        published = self._published
+        new_parents = self.nodes.parent[published:count]
+        new_rows = Counter(new_parents)
+        if published <= ROOT_NODE + 1:
+            # nothing is visible yet, a reset is much cheaper than inserting every directory
+            self.beginResetModel()
+            self._published = count
+            self._published_children = {}
+            self._row_counts.extend(array("q", [0]) * (count - len(self._row_counts)))
+            for parent, rows in new_rows.items():
+                self._row_counts[parent] += rows
+            self.endResetModel()
+            return
+
+        # before any insert signal, so children looked up by the views from here on include the new nodes. Siblings
+        # are appended in node order while loading, so the new nodes follow the published children.
+        for node, parent in enumerate(new_parents, start=published):
+            if (children := self._published_children.get(parent)) is not None:
+                children.append(node)
+        self._published = count
+        self._row_counts.extend(array("q", [0]) * (count - len(self._row_counts)))
+        # the rows of nodes that are new in this batch become visible along with the node itself, so only parents that
+        # were already published need insert signals
+        inserted = []
+        for parent, rows in new_rows.items():
+            if parent >= published:
+                self._row_counts[parent] += rows
+            else:
+                inserted.append(parent)
+        for parent in sorted(inserted):
+            first = self._row_counts[parent]
+            self.beginInsertRows(self.indexForNode(parent), first, first + new_rows[parent] - 1)
+            self._row_counts[parent] += new_rows[parent]
+            self.endInsertRows()
+
+    @qtc.Slot(int)
+    def _nodes_available(self, count):
+        # ignore anything still queued from a loader that has since been cancelled
+        if self._loader is not None and self.sender() is self._loader.signals:
+            self.publishNodes(count)
 
     def unload(self):
         if self._loader is not None:
             self._loader.signals.cancel.emit()
+            self._loader = None
         self.unloading.emit()
+        self.beginResetModel()
         self.clear()
+        self._row_counts = None
+        self._published = 0
+        self._published_children = {}
+        self.endResetModel()
         self.is_loaded = False
 
     def _loaded(self):
+        if self._loader is None or self.sender() is not self._loader.signals:
+            return
+        self.publishNodes(len(self.nodes))
+        self._row_counts = None
+        self._published_children = {}
         self.is_loaded = True
         del self._loader
         self._loader = None
         self.loaded.emit()
 
     def load(self, archive, task_name="", task_status_msg=""):
-        if self.is_loaded:
+        if self.is_loaded or self._loader is not None:
             self.unload()
 
         task_name = task_name or self.loader_task_name
@@ -569,12 +1753,20 @@ class ThreadLoadedPathArchiveTreeModel(PathArchiveTreeModel):
 
         logger.debug(f"Loading {self.__class__.__name__} model")
 
+        self.beginResetModel()
         self.archive = archive
+        self._row_counts = array("q", [0] * len(self.nodes))
+        self._published = len(self.nodes)
+        self._published_children = {}
+        self.endResetModel()
+
         self._loader = self._loader_cls(
             self,
             item_cls=self._item_cls,
             task_name=task_name,
             task_status_msg=task_status_msg,
         )
+        self._loader.signals.nodes_available.connect(self._nodes_available)
         self._loader.signals.finished.connect(self._loaded)
-        qtc.QThreadPool.globalInstance().start(self._loader)
+        self.loading.emit()
+        get_scheduler().start(self._loader, Lane.BACKGROUND)
@@ -0,0 +1,323 @@
+"""
+Full-text index of the values inside DataCore records.
+
+Every record is walked once, along with the structures it contains, and the strings, numbers and referenced GUIDs in
+it are broken into lowercase tokens. The tokens are kept in sorted order in a single blob, each with a posting list of
+the records it appears in, so a query term resolves to its records with a binary search over the tokens rather than by
+dumping records. Strings are indexed both whole and split into their alphanumeric parts, so a loc key like
+`@item_NameAEGS_Avenger` is found by `@item_name` as well as by `avenger`, and a term that isn't the start of any
+token is looked up by its parts instead. Numbers only match exactly.
+
+Walking a full DataCore takes a while, so the index is built in the background once the DataCore has been parsed and
+written next to the cached models, keyed on the game build, see `starfab.models.model_cache.record_index_path`. The
+same pass collects the references between records for the `starfab.models.reference_graph.ReferenceGraph`, and the
+tags of each record for the `starfab.models.tag_index.TagBitsets`.
+
+    index, graph, tags = index_records(datacore)
+    index.find_guids("anvl 1500")
+"""
+import bisect
+import math
+import os
+import re
+import typing
+
+import numpy as np
+
+from scdatatools.forge import dftypes
+from starfab.log import getLogger
+from starfab.models.model_cache import (
+    enforce_model_cache_size_limit,
+    model_cache_enabled,
+    model_cache_key,
+    record_index_path,
+)
+from starfab.models.reference_graph import REFERENCE_GRAPH_CACHE_NAME, ReferenceGraph
+
+RECORD_TAGS_CACHE_NAME = "datacore_tags"
+
+logger = getLogger(__name__)
+
+CONTENT_INDEX_CACHE_NAME = "datacore_contents"
+CONTENT_INDEX_VERSION = 1
+# longer strings are only indexed by their parts
+MAX_TOKEN_LENGTH = 128
+# structures nested deeper than this inside a record aren't indexed
+MAX_DEPTH = 32
+NULL_GUID = "00000000-0000-0000-0000-000000000000"
+
+_PARTS_RE = re.compile(r"[^\W_]+")
+_NUMBER_RE = re.compile(r"[-+]?(\d+\.?\d*|\.\d+)(e[-+]?\d+)?")
+
+
+def number_token(value) -> str:
+    """Returns the token numbers equal to `value` are indexed as"""
+    value = float(value)
+    if not math.isfinite(value):
+        return str(value)
+    if value.is_integer():
+        return str(int(value))
+    return f"{value:.6g}"
+
+
+def string_tokens(value: str) -> typing.Set[str]:
+    """Returns the tokens the string `value` is indexed as, the whole string and its alphanumeric parts"""
+    value = value.strip().lower()
+    tokens = set(_PARTS_RE.findall(value))
+    if value and len(value) <= MAX_TOKEN_LENGTH:
+        tokens.add(value)
+    return tokens
+
+
+def record_tokens(record, references: typing.Set[str] = None, tags: typing.Set[str] = None) -> typing.Set[str]:
+    """Returns the tokens of the values inside the DataCore `record`. The GUIDs it contains, e.g. of the records it
+    references, are also added to the set `references` if one is given, and those in its own `tags` to the set
+    `tags`."""
+    tokens = set()
+    seen = set()
+
+    def _walk(value, depth, guids):
+        if isinstance(value, (list, tuple)):
+            for _ in value:
+                _walk(_, depth, guids)
+        elif isinstance(value, dftypes.StructureInstance):
+            if depth > MAX_DEPTH or (key := (value.structure_definition.name, value.dcb_offset)) in seen:
+                return
+            seen.add(key)
+            for name, _ in value.properties.items():
+                _walk(_, depth + 1, guids + (tags,) if depth == 0 and name == "tags" and tags is not None else guids)
+        elif isinstance(value, dftypes.StrongPointer):
+            # owned by the record, unlike weak pointers which point back into it
+            if value.reference is not None:
+                _walk(value.reference, depth, guids)
+        elif isinstance(value, dftypes.WeakPointer):
+            return
+        elif isinstance(value, dftypes.Reference):
+            _walk(value.value, depth, guids)
+        elif isinstance(value, dftypes.GUID):
+            if (guid := value.value) != NULL_GUID:
+                tokens.add(guid)
+                for _ in guids:
+                    _.add(guid)
+        elif isinstance(value, bool):
+            return
+        elif isinstance(value, (int, float)):
+            tokens.add(number_token(value))
+        elif isinstance(value, str):
+            tokens.update(string_tokens(value))
+        elif hasattr(value, "value"):
+            # string references, enum choices and the ctypes values of simple arrays
+            _walk(value.value, depth, guids)
+
+    if record.reference is not None:
+        _walk(record.reference, 0, () if references is None else (references,))
+    return tokens
+
+
+class _Tokens(typing.Sequence):
+    """The sorted tokens of a `RecordContentIndex`, as a sequence of bytes for `bisect`"""
+
+    def __init__(self, blob, offsets):
+        self.blob = blob
+        self.offsets = offsets
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, i):
+        return self.blob[self.offsets[i]:self.offsets[i + 1]]
+
+
+class RecordContentIndex:
+    def __init__(self, guids, token_blob, token_offsets, posting_offsets, postings):
+        """Index over the records `guids`. Token `i` is `token_blob[token_offsets[i]:token_offsets[i + 1]]` in UTF-8,
+        the records it appears in are the indices into `guids` at `postings[posting_offsets[i]:posting_offsets[i + 1]]`.
+        Use `index_records` or `load` rather than creating one directly."""
+        self.guids = guids
+        self.posting_offsets = posting_offsets
+        self.postings = postings
+        self._token_blob = bytes(token_blob)
+        self._token_offsets = token_offsets
+        self._tokens = _Tokens(self._token_blob, token_offsets.tolist())
+
+    def __len__(self):
+        return len(self.guids)
+
+    @property
+    def token_count(self) -> int:
+        return len(self._tokens)
+
+    @classmethod
+    def from_postings(cls, guids, postings):
+        """Builds the index over `guids` from `postings`, a dict of each token to the ascending indices into `guids`
+        of the records it appears in"""
+        tokens = sorted(_.encode("utf-8", errors="surrogatepass") for _ in postings)
+        token_offsets = np.zeros(len(tokens) + 1, dtype=np.int64)
+        np.cumsum([len(_) for _ in tokens], out=token_offsets[1:])
+        lists = [postings[_.decode("utf-8", errors="surrogatepass")] for _ in tokens]
+        posting_offsets = np.zeros(len(tokens) + 1, dtype=np.int64)
+        np.cumsum([len(_) for _ in lists], out=posting_offsets[1:])
+        return cls(
+            guids=guids,
+            token_blob=b"".join(tokens),
+            token_offsets=token_offsets,
+            posting_offsets=posting_offsets,
+            postings=np.fromiter((i for _ in lists for i in _), dtype=np.int32, count=int(posting_offsets[-1])),
+        )
+
+    def _prefix_range(self, prefix: bytes):
+        return (
+            bisect.bisect_left(self._tokens, prefix),
+            bisect.bisect_left(self._tokens, prefix + b"\xff"),
+        )
+
+    def _postings(self, start, end) -> np.ndarray:
+        if end <= start:
+            return np.zeros(0, dtype=np.int32)
+        postings = self.postings[self.posting_offsets[start]:self.posting_offsets[end]]
+        return postings if end - start == 1 else np.unique(postings)
+
+    def token_records(self, token: str) -> np.ndarray:
+        """Returns the sorted indices into `guids` of the records containing exactly `token`"""
+        token = token.encode("utf-8", errors="surrogatepass")
+        start = bisect.bisect_left(self._tokens, token)
+        if start < len(self._tokens) and self._tokens[start] == token:
+            return self._postings(start, start + 1)
+        return self._postings(0, 0)
+
+    def prefix_records(self, prefix: str) -> np.ndarray:
+        """Returns the sorted indices into `guids` of the records containing a token starting with `prefix`"""
+        return self._postings(*self._prefix_range(prefix.encode("utf-8", errors="surrogatepass")))
+
+    def _term_records(self, term):
+        if _NUMBER_RE.fullmatch(term):
+            return self.token_records(number_token(term))
+        records = self.prefix_records(term)
+        parts = _PARTS_RE.findall(term)
+        if not len(records) and parts and parts != [term]:
+            # otherwise found by its parts, e.g. `aegs_avenger` in `@item_nameaegs_avenger`
+            records = self.prefix_records(parts[0])
+            for part in parts[1:]:
+                records = np.intersect1d(records, self.prefix_records(part), assume_unique=True)
+        return records
+
+    def find(self, text: str) -> np.ndarray:
+        """Returns the sorted indices into `guids` of the records that contain every whitespace separated term of
+        `text`, case-insensitively. Terms match the start of a token, numbers match exactly."""
+        terms = text.lower().split()
+        if not terms:
+            return self._postings(0, 0)
+        records = self._term_records(terms[0])
+        for term in terms[1:]:
+            if not len(records):
+                break
+            records = np.intersect1d(records, self._term_records(term), assume_unique=True)
+        return records
+
+    def find_guids(self, text: str) -> typing.List[str]:
+        """Returns the GUIDs of the records that contain every term of `text`, see `find`"""
+        return [_.decode("ascii") for _ in self.guids[self.find(text)]]
+
+    def save(self, path):
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "wb") as f:
+            np.savez(
+                f,
+                version=np.array(CONTENT_INDEX_VERSION),
+                guids=self.guids,
+                token_blob=np.frombuffer(self._token_blob, dtype=np.uint8),
+                token_offsets=self._token_offsets,
+                posting_offsets=self.posting_offsets,
+                postings=self.postings,
+            )
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path, record_count=None):
+        """Loads an index written by `save`, returns `None` if it's unusable or wasn't built from `record_count`
+        records"""
+        try:
+            with np.load(path, allow_pickle=False) as data:
+                if int(data["version"]) != CONTENT_INDEX_VERSION:
+                    return None
+                if record_count is not None and len(data["guids"]) != record_count:
+                    return None
+                return cls(
+                    guids=data["guids"],
+                    token_blob=data["token_blob"].tobytes(),
+                    token_offsets=data["token_offsets"],
+                    posting_offsets=data["posting_offsets"],
+                    postings=data["postings"],
+                )
+        except (OSError, ValueError, KeyError) as e:
+            logger.warning(f"Could not read the record content index {path}: {e}")
+            return None
+
+
+def index_records(datacore, cancelled=None, progress=None):
+    """Walks every record of `datacore` once and returns its `RecordContentIndex`, the `ReferenceGraph` of the
+    references between records, and a `ReferenceGraph` of the records to their tags. `cancelled` is an optional
+    callable polled between records, if it returns `True` the result is `None`. `progress` is an optional callable
+    given the number of records indexed so far."""
+    records = sorted(datacore.records, key=lambda _: _.id.value)
+    postings = {}
+    edges = ([], [])
+    tag_edges = ([], [])
+    for i, record in enumerate(records):
+        if cancelled is not None and cancelled():
+            return None
+        if progress is not None and i % 100 == 0:
+            progress(i)
+        references = set()
+        tags = set()
+        try:
+            tokens = record_tokens(record, references, tags)
+        except Exception as e:
+            logger.warning(f"Could not index the contents of {record.filename}: {e!r}")
+            continue
+        for token in tokens:
+            postings.setdefault(token, []).append(i)
+        for (sources, targets), guids in ((edges, references), (tag_edges, tags)):
+            sources.extend(i for _ in guids)
+            targets.extend(_.encode("ascii", errors="replace") for _ in guids)
+
+    guids = np.array([_.id.value for _ in records], dtype="S36")
+    return (
+        RecordContentIndex.from_postings(guids, postings),
+        ReferenceGraph.from_edges(guids, *edges),
+        ReferenceGraph.from_edges(guids, *tag_edges),
+    )
+
+
+def load_record_indexes(sc, cancelled=None, progress=None):
+    """Returns the indexes of the DataCore of `sc` from `index_records`, from the model cache if it has them for the
+    build, otherwise built and then cached. Returns `None` if `cancelled` returned `True` while building."""
+    datacore = sc.datacore
+    paths = None
+    if model_cache_enabled() and (key := model_cache_key(sc)):
+        paths = tuple(
+            record_index_path(_, key)
+            for _ in (CONTENT_INDEX_CACHE_NAME, REFERENCE_GRAPH_CACHE_NAME, RECORD_TAGS_CACHE_NAME)
+        )
+        if all(_.is_file() for _ in paths):
+            indexes = tuple(
+                cls.load(path, len(datacore.records))
+                for cls, path in zip((RecordContentIndex, ReferenceGraph, ReferenceGraph), paths)
+            )
+            if all(_ is not None for _ in indexes):
+                for path in paths:
+                    os.utime(path)
+                logger.debug(f"Loaded the record indexes from {paths[0].parent}")
+                return indexes
+
+    indexes = index_records(datacore, cancelled=cancelled, progress=progress)
+    if indexes is None or paths is None:
+        return indexes
+    for index, path in zip(indexes, paths):
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            index.save(path)
+        except OSError as e:
+            logger.warning(f"Could not write the record index {path}: {e}")
+    enforce_model_cache_size_limit(paths[0].parent)
+    return indexes
@@ -1,88 +1,155 @@
 import io
 from functools import cached_property
 
+import numpy as np
+
 from starfab import get_starfab
 from starfab.gui import qtc
 from starfab.gui.utils import icon_provider
 from starfab.log import getLogger
 from starfab.models.common import (
     PathArchiveTreeSortFilterProxyModel,
-    PathArchiveTreeModelLoader,
+    SortedPathArchiveTreeModelLoader,
     ThreadLoadedPathArchiveTreeModel,
     PathArchiveTreeItem,
     ContentItem,
+    NO_NODE,
     SKIP_MODELS,
 )
+from starfab.models.record_cache import serialized_record
+from starfab.models.search_index import SortedKeyIndex
+from starfab.models.tag_index import TagBitsets
+from starfab.models.type_index import record_type_index
 
 logger = getLogger(__name__)
 DCBVIEW_COLUMNS = ["Name", "Type"]
 RECORDS_ROOT_PATH = "libs/foundry/records/"
+# filters starting with this find records by their contents, see `RecordContentIndex`
+CONTENTS_QUERY_PREFIX = "contents:"
 
 
 class DCBSortFilterProxyModel(PathArchiveTreeSortFilterProxyModel):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # find records by their contents rather than their path
+        self.search_contents = False
+        # `(filter, guids)` of the records found for the last contents filter that was checked row by row
+        self._contents_guids = ("", set())
+
+    def filterQuery(self, text) -> str:
+        if self.search_contents and text and not text.startswith(CONTENTS_QUERY_PREFIX):
+            return f"{CONTENTS_QUERY_PREFIX}{text}"
+        return text
+
+    def searchMask(self, search_index, text, case_sensitive, cancelled):
+        if not text.startswith(CONTENTS_QUERY_PREFIX):
+            return super().searchMask(search_index, text, case_sensitive, cancelled)
+        matched = np.zeros(len(search_index), dtype=bool)
+        if (nodes := self.sourceModel().contentNodes(text[len(CONTENTS_QUERY_PREFIX):])) is not None:
+            matched[nodes] = True
+        return search_index.expand(matched, descendants=False, cancelled=cancelled)
+
+    def _acceptsContents(self, item):
+        if self._contents_guids[0] != self._filter:
+            index = self.sourceModel().content_index
+            self._contents_guids = (
+                self._filter,
+                set(index.find_guids(self._filter[len(CONTENTS_QUERY_PREFIX):])) if index is not None else set(),
+            )
+        return item.guid in self._contents_guids[1]
+
     def filterAcceptsRow(self, source_row, source_parent: qtc.QModelIndex) -> bool:
         if not self._filter and not self.additional_filters:
             return True
+        if (accepted := self.acceptsNode(source_row, source_parent)) is not None:
+            return accepted
 
-        if (parent := source_parent.internalPointer()) is None:
-            parent = getattr(self.sourceModel(), 'root_item')
-        if parent:
-            try:
-                item = parent.children[source_row]
-            except IndexError:
-                return False
+        if (item := self.sourceItem(source_row, source_parent)) is not None:
             if not self.checkAdditionFilters(item):
                 return False
             if not self._filter and item.record is not None:
                 return True  # additional filters true and not a folder
+            if self._filter.startswith(CONTENTS_QUERY_PREFIX):
+                return self._acceptsContents(item)
             if self._filter:
                 if self.filterCaseSensitivity() == qtc.Qt.CaseInsensitive:
                     return (
                         self._filter.lower() in item._path.lower()
-                        or self._filter.lower() in item.guid
+                        or item.guid.startswith(self._filter.lower())
                     )
                 else:
-                    return self._filter in item._path or self._filter in item.guid
+                    return self._filter in item._path or item.guid.startswith(self._filter)
         return False
 
 
-class DCBLoader(PathArchiveTreeModelLoader):
+class DCBLoader(SortedPathArchiveTreeModelLoader):
+    cache_name = "datacore"
+
     def items_to_load(self):
-        # trigger datacore to load here
-        # TODO: there is probably a better place to trigger the ac_manager to load, but meh
-        self.model.archive.attachable_component_manager.load_attachable_components()
+        # the datacore is usually parsed by the `StarCitizenManager` before the tree is loaded
         self.model.archive = self.model.archive.datacore
         if 'datacore' in SKIP_MODELS:
             logger.debug(f'Skipping loading the datacore model')
             return []
         return self.model.archive.records
 
-    def load_item(self, item):
+    def item_parent_path(self, item):
         path = item.filename.replace(RECORDS_ROOT_PATH, "")
-        parent_path, _ = path.rsplit("/", maxsplit=1) if "/" in path else ("", path)
-        parent = self.model.parentForPath(parent_path)
+        return path.rsplit("/", maxsplit=1)[0] if "/" in path else ""
+
+    def load_children(self, parent, records):
+        names = []
+        for record in records:
+            # name = name.replace(".xml", "")
+            name = record.name
+            if (parent, name) in self._loaded_names:
+                name = f"{name}.{record.id.value}"
+            self._loaded_names.add((parent, name))
+            names.append(name)
+
+        self._record_nodes.extend(self.model.appendNodes(parent, names, payloads=records))
 
-        # name = name.replace(".xml", "")
-        name = item.name
-        if name in parent.children_by_name:
-            name = f"{name}.{item.id.value}"
+    def restore_payloads(self, items, item_index):
+        super().restore_payloads(items, item_index)
+        self._record_nodes = [node for node, record in enumerate(self.model.nodes.payload) if record is not None]
 
-        new_item = self._item_cls(
-            f"{parent_path}/{name}", model=self.model, record=item, parent=parent
+    def finish_model(self):
+        payloads = self.model.nodes.payload
+        self.model.guid_index = SortedKeyIndex(
+            [payloads[_].id.value for _ in self._record_nodes], self._record_nodes
         )
-        self.model._guid_cache[new_item.guid] = new_item
+        # the node of each of the datacore's records, by their index in its record table
+        records = self.model.archive.records
+        self.model.record_nodes = self.model.guid_index.get_many(
+            np.array([_.id.value.lower().encode("ascii", errors="replace") for _ in records], dtype=bytes)
+        )
+        self.model.type_index = record_type_index(self.model.archive)
+        super().finish_model()
+
+    def search_prefix_index(self):
+        # records are found by the start of their GUID
+        return self.model.guid_index
+
+    def run(self):
+        self._loaded_names = set()
+        self._record_nodes = []
+        try:
+            super().run()
+        finally:
+            del self._loaded_names
+            del self._record_nodes
 
 
 class DCBItem(PathArchiveTreeItem, ContentItem):
     _cached_properties_ = PathArchiveTreeItem._cached_properties_ + ["guid", "type"]
 
-    def __init__(self, path, model, record=None, parent=None):
-        super().__init__(path, model, parent)
-        self.record = record
+    @property
+    def record(self):
+        return self.model.nodes.payload[self.node]
 
     @cached_property
     def icon(self):
-        if self.children:
+        if self.has_children():
             return icon_provider.icon(icon_provider.IconType.Folder)
         return icon_provider.icon(icon_provider.IconType.File)
 
@@ -105,16 +172,8 @@ class DCBItem(PathArchiveTreeItem, ContentItem):
                 if mode is not None
                 else get_starfab().settings.value("convert/datacore_fmt", "xml")
             )
-            if mode == "xml":
-                return io.BytesIO(
-                    self.model.archive.dump_record_xml(
-                        self.model.archive.records_by_guid[self.guid]
-                    ).encode("utf-8")
-                )
             return io.BytesIO(
-                self.model.archive.dump_record_json(
-                    self.model.archive.records_by_guid[self.guid]
-                ).encode("utf-8")
+                serialized_record(self.model.archive, self.model.archive.records_by_guid[self.guid], mode)
             )
         return io.BytesIO(b"")
 
@@ -128,6 +187,9 @@ class DCBItem(PathArchiveTreeItem, ContentItem):
                 return self.guid
             else:
                 return ""
+        elif role == qtc.Qt.ToolTipRole and column == 1 and self.type:
+            if (type_index := self.model.type_index) is not None:
+                return f"{self.type}: {type_index.count(self.type):,} records in the DataCore"
         return super().data(column, role)
 
     def __repr__(self):
@@ -135,6 +197,9 @@ class DCBItem(PathArchiveTreeItem, ContentItem):
 
 
 class DCBModel(ThreadLoadedPathArchiveTreeModel):
+    # emitted once the `content_index` and `reference_graph` have been loaded or built
+    record_indexes_loaded = qtc.Signal()
+
     def __init__(self, sc_manager, loader_cls=DCBLoader):
         self._sc_manager = sc_manager
         super().__init__(
@@ -146,7 +211,81 @@ class DCBModel(ThreadLoadedPathArchiveTreeModel):
             loader_task_name="load_datacore_model",
             loader_task_status_msg="Processing DataCore",
         )
-        self._guid_cache = {}
+        # `SortedKeyIndex` of the records' GUIDs, set by the loader once the model is complete
+        self.guid_index = None
+        # `RecordTypeIndex` of the datacore's records and the node of each of them, set along with the `guid_index`
+        self.type_index = None
+        self.record_nodes = None
+        # `RecordContentIndex` of the values inside the records, set once it's built in the background
+        self.content_index = None
+        # `ReferenceGraph` of the references between records, set along with the `content_index`
+        self.reference_graph = None
+        # `ReferenceGraph` of the records to their tags, set along with the `content_index`
+        self.record_tags = None
+        # `(TagBitsets, node of each row)` of the `record_tags`, by whether they include the tags' ancestors
+        self._tag_bitsets = {}
+
+    def clear(self):
+        super().clear()
+        self.guid_index = None
+        self.type_index = None
+        self.record_nodes = None
+        self.content_index = None
+        self.reference_graph = None
+        self.record_tags = None
+        self._tag_bitsets = {}
+
+    def sortKeys(self, column):
+        if column == 1:
+            if self.type_index is None or self.record_nodes is None:
+                return None
+            # folders have no type and sort before every record
+            type_rank = np.zeros(len(self.nodes), dtype=np.int64)
+            for rank, record_type in enumerate(sorted(self.type_index.types, key=str.casefold), start=1):
+                nodes = self.record_nodes[self.type_index.record_indices([record_type])]
+                type_rank[nodes[nodes > NO_NODE]] = rank
+            return [type_rank, self.search_index.name_rank]
+        return super().sortKeys(column)
 
     def itemForGUID(self, guid):
-        return self._guid_cache.get(guid)
+        if self.guid_index is not None and (node := self.guid_index.get(guid)) is not None:
+            return self.itemForNode(node)
+        return None
+
+    def contentNodes(self, text):
+        """Returns the nodes of the records that contain every term of `text`, see `RecordContentIndex.find`, or
+        `None` if the records haven't been indexed yet"""
+        if self.content_index is None or self.guid_index is None:
+            return None
+        nodes = self.guid_index.get_many(np.char.lower(self.content_index.guids[self.content_index.find(text)]))
+        return nodes[nodes > NO_NODE]
+
+    def tagMask(self, tags, match_all=False, include_ancestors=False):
+        """Returns a boolean mask over the nodes of the records that have any of `tags`, or all of them if
+        `match_all` is set, see `TagBitsets`. Returns `None` if the records haven't been indexed yet."""
+        if self.record_tags is None or self.guid_index is None:
+            return None
+        if include_ancestors not in self._tag_bitsets:
+            bitsets = TagBitsets(self.record_tags, self._sc_manager.sc.tag_database, include_ancestors=include_ancestors)
+            self._tag_bitsets[include_ancestors] = (bitsets, self.guid_index.get_many(np.char.lower(bitsets.guids)))
+        bitsets, row_nodes = self._tag_bitsets[include_ancestors]
+        nodes = row_nodes[bitsets.rows_with(tags, match_all=match_all)]
+        mask = np.zeros(len(self.nodes), dtype=bool)
+        mask[nodes[nodes > NO_NODE]] = True
+        return mask
+
+    def typeMask(self, types):
+        """Returns a boolean mask over the nodes of the records of any of `types`, see `RecordTypeIndex`. Returns
+        `None` if the model hasn't finished loading."""
+        if self.type_index is None or self.record_nodes is None:
+            return None
+        nodes = self.record_nodes[self.type_index.record_indices(types)]
+        mask = np.zeros(len(self.nodes), dtype=bool)
+        mask[nodes[nodes > NO_NODE]] = True
+        return mask
+
+    def typeCounts(self) -> dict:
+        """Returns the number of records of each type"""
+        if self.type_index is None:
+            return {}
+        return self.type_index.counts()
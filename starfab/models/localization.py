@@ -17,14 +17,12 @@ class LocalizationModel(qtc.QAbstractTableModel):
         self.languages = None
         self.names = []
 
-        self._sc_manager.p4k_model.loaded.connect(self._on_p4k_loaded)
         self._sc_manager.p4k_model.unloading.connect(
             self._on_p4k_unloading,  # qtc.Qt.BlockingQueuedConnection
         )
 
-    @qtc.Slot()
-    def _on_p4k_loaded(self):
-        self.localization = self._sc_manager.sc.localization
+    def load(self, sc):
+        self.localization = sc.localization
         self.languages = list(sorted(self.localization.languages))
         self.languages.remove(self.localization.default_language)
         self.languages.insert(0, self.localization.default_language)
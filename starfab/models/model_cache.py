@@ -0,0 +1,282 @@
+"""
+On-disk cache of built `PathArchiveTreeModel` trees.
+
+Building the P4K and DataCore trees is the longest wait after opening an install, and the result only changes when the
+game build does. After a model has been built its node columns, name table, directory lookup and a per-node index into
+the loader's items are written to a single file under the cache directory. The file is keyed on the build's
+`version_label` plus the size and mtime of the p4k, so any patch invalidates it. The header also holds a fingerprint
+of the loader that built the tree, see `model_cache_fingerprint`, so an entry is rebuilt rather than attached to a
+loader that builds its tree differently.
+
+Each file is a small JSON header followed by the raw, 8 byte aligned column data, so it is memory mapped and the
+columns are attached with a single copy per column rather than being parsed.
+
+The DataCore's record indexes, see `starfab.models.content_index`, are kept in the same directory under the same key,
+as numpy archives with their own suffix, see `record_index_path`. Both kinds of file count towards the cache's size
+limit and are removed when the cache is cleared.
+"""
+import hashlib
+import json
+import mmap
+import os
+import sys
+from array import array
+from pathlib import Path
+
+from scdatatools.utils import parse_bool
+from starfab.gui import qtc
+from starfab.log import getLogger
+from starfab.settings import settings
+
+logger = getLogger(__name__)
+
+MODEL_CACHE_VERSION = 2
+MODEL_CACHE_MAGIC = b"SFMC"
+MODEL_CACHE_SUFFIX = ".sfmc"
+RECORD_INDEX_SUFFIX = ".sfri.npz"
+# every kind of file kept in the cache directory
+CACHE_SUFFIXES = (MODEL_CACHE_SUFFIX, RECORD_INDEX_SUFFIX)
+
+_NODE_COLUMNS = (
+    "parent", "first_child", "last_child", "next_sibling", "child_count", "row", "name_id", "size", "time",
+)
+_ALIGNMENT = 8
+
+
+def model_cache_dir() -> Path:
+    return Path(
+        qtc.QStandardPaths.writableLocation(qtc.QStandardPaths.CacheLocation)
+    ) / "models"
+
+
+def model_cache_enabled() -> bool:
+    return parse_bool(settings.value("model_cache/enabled"))
+
+
+def model_cache_max_size() -> int:
+    """Maximum size of the model cache directory in bytes"""
+    try:
+        return int(settings.value("model_cache/max_size_mb")) * 1024 * 1024
+    except (TypeError, ValueError):
+        return 0
+
+
+def _cache_files(cache_dir) -> list:
+    """Returns the cached models and record indexes in `cache_dir`"""
+    return [cache_file for suffix in CACHE_SUFFIXES for cache_file in Path(cache_dir).glob(f"*{suffix}")]
+
+
+def model_cache_size(cache_dir=None) -> int:
+    cache_dir = Path(cache_dir or model_cache_dir())
+    if not cache_dir.is_dir():
+        return 0
+    return sum(_.stat().st_size for _ in _cache_files(cache_dir))
+
+
+def clear_model_cache(cache_dir=None) -> int:
+    """Remove every cached model and record index, returns the number of bytes freed"""
+    cache_dir = Path(cache_dir or model_cache_dir())
+    freed = 0
+    for cache_file in _cache_files(cache_dir):
+        try:
+            size = cache_file.stat().st_size
+            cache_file.unlink()
+            freed += size
+        except OSError as e:
+            logger.warning(f"Could not remove cached model {cache_file}: {e}")
+    return freed
+
+
+def model_cache_key(sc) -> str:
+    """Returns the cache key for the StarCitizen install `sc`, or an empty string if it can't be identified"""
+    try:
+        stat = Path(sc.p4k_file).stat()
+    except (AttributeError, TypeError, OSError):
+        return ""
+    key = f"{sc.version_label}|{stat.st_size}|{stat.st_mtime_ns}"
+    return hashlib.sha1(key.encode("utf-8")).hexdigest()[:16]
+
+
+def model_cache_fingerprint(loader) -> str:
+    """Returns the fingerprint of the tree built by `loader`, from its class and `cache_name`"""
+    loader_cls = type(loader)
+    key = f"{loader_cls.__module__}.{loader_cls.__qualname__}|{loader.cache_name}"
+    return hashlib.sha1(key.encode("utf-8")).hexdigest()[:16]
+
+
+def record_index_path(name, key, cache_dir=None) -> Path:
+    """Returns the path of the cached record index `name` of the game build `key`"""
+    return Path(cache_dir or model_cache_dir()) / f"{name}-{key}{RECORD_INDEX_SUFFIX}"
+
+
+def enforce_model_cache_size_limit(cache_dir=None, max_size=None):
+    """Evict the least recently used cached models and record indexes until `cache_dir` is within `max_size`, by
+    default `model_cache_max_size()`"""
+    cache_dir = Path(cache_dir or model_cache_dir())
+    max_size = model_cache_max_size() if max_size is None else max_size
+    if not max_size:
+        return
+    entries = []
+    for cache_file in _cache_files(cache_dir):
+        try:
+            stat = cache_file.stat()
+        except OSError:
+            continue
+        entries.append((stat.st_mtime, stat.st_size, cache_file))
+
+    total = sum(_[1] for _ in entries)
+    for _, size, cache_file in sorted(entries, key=lambda _: _[0]):
+        if total <= max_size:
+            break
+        try:
+            cache_file.unlink()
+            total -= size
+        except OSError:
+            pass
+
+
+def _pack_strings(strings) -> bytes:
+    return "\0".join(strings).encode("utf-8", errors="surrogatepass")
+
+
+def _unpack_strings(data) -> list:
+    if not data:
+        return []
+    return bytes(data).decode("utf-8", errors="surrogatepass").split("\0")
+
+
+class ModelCache:
+    """Reads and writes the cached tree for one model (`name`) of one game build (`key`). `fingerprint` identifies how
+    the tree is built, see `model_cache_fingerprint`."""
+
+    def __init__(self, name, key, fingerprint="", cache_dir=None, max_size=None):
+        self.name = name
+        self.key = key
+        self.fingerprint = fingerprint
+        self.cache_dir = Path(cache_dir or model_cache_dir())
+        self.max_size = model_cache_max_size() if max_size is None else max_size
+
+    @property
+    def path(self) -> Path:
+        return self.cache_dir / f"{self.name}-{self.key}{MODEL_CACHE_SUFFIX}"
+
+    def load(self, model, item_count):
+        """Attach the cached tree to `model`. Returns the per-node item index column, or `None` if there is no usable
+        cache entry. `item_count` is the number of items the loader would build from, a cache entry that was built
+        from a different number of items or with a different fingerprint is treated as stale."""
+        if not self.key or not self.path.is_file():
+            return None
+
+        try:
+            with self.path.open("rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                header, sections = self._read_header(mm)
+                if header.get("item_count") != item_count or header.get("fingerprint") != self.fingerprint:
+                    logger.debug(f"Cached {self.name} model is stale, rebuilding")
+                    return None
+
+                def _section(name):
+                    offset, length = sections[name]
+                    return memoryview(mm)[offset:offset + length]
+
+                def _column(name):
+                    column = array("q")
+                    with _section(name) as data:
+                        column.frombytes(data)
+                    return column
+
+                columns = {column: _column(column) for column in _NODE_COLUMNS}
+                with _section("names") as data:
+                    names = _unpack_strings(data)
+                with _section("parent_cache_keys") as data:
+                    parent_cache = dict(zip(_unpack_strings(data), _column("parent_cache_nodes")))
+                item_index = _column("item_index")
+        except (OSError, ValueError, KeyError) as e:
+            logger.warning(f"Could not read cached {self.name} model {self.path}: {e}")
+            return None
+
+        nodes = model.nodes
+        for column, values in columns.items():
+            setattr(nodes, column, values)
+        nodes.names = names
+        nodes._name_ids = None
+        nodes._child_rows = {}
+        nodes._child_names = {}
+        model._parent_cache = parent_cache
+
+        # keep recently used entries from being evicted first
+        os.utime(self.path)
+        return item_index
+
+    def save(self, model, item_index, item_count):
+        """Write the tree of `model` to the cache, `item_index` is the per-node index into the loader's items (-1 for
+        nodes without an item)."""
+        if not self.key:
+            return
+
+        nodes = model.nodes
+        parent_cache_keys = list(model._parent_cache.keys())
+        sections = [(column, getattr(nodes, column).tobytes()) for column in _NODE_COLUMNS]
+        sections += [
+            ("names", _pack_strings(nodes.names)),
+            ("parent_cache_keys", _pack_strings(parent_cache_keys)),
+            ("parent_cache_nodes", array("q", model._parent_cache.values()).tobytes()),
+            ("item_index", array("q", item_index).tobytes()),
+        ]
+
+        header = {
+            "version": MODEL_CACHE_VERSION,
+            "byteorder": sys.byteorder,
+            "name": self.name,
+            "key": self.key,
+            "fingerprint": self.fingerprint,
+            "item_count": item_count,
+            "sections": {},
+        }
+        size = sum(len(data) + _ALIGNMENT for _, data in sections)
+        if self.max_size and size > self.max_size:
+            logger.debug(f"Not caching {self.name} model, {size} bytes is over the cache limit")
+            return
+
+        # section offsets are relative to the end of the header, which is padded to the alignment
+        offset = 0
+        for name, data in sections:
+            header["sections"][name] = [offset, len(data)]
+            offset += len(data) + (-len(data) % _ALIGNMENT)
+        header_bytes = json.dumps(header).encode("utf-8")
+        header_bytes += b" " * (-(len(header_bytes) + 8) % _ALIGNMENT)
+
+        try:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.path.with_suffix(".tmp")
+            with tmp_path.open("wb") as f:
+                f.write(MODEL_CACHE_MAGIC)
+                f.write(len(header_bytes).to_bytes(4, "little"))
+                f.write(header_bytes)
+                for _, data in sections:
+                    f.write(data)
+                    f.write(b"\0" * (-len(data) % _ALIGNMENT))
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            logger.warning(f"Could not write cached {self.name} model {self.path}: {e}")
+            return
+
+        self.enforce_size_limit()
+
+    def _read_header(self, mm):
+        if mm[:4] != MODEL_CACHE_MAGIC:
+            raise ValueError("not a model cache file")
+        header_length = int.from_bytes(mm[4:8], "little")
+        header = json.loads(mm[8:8 + header_length])
+        if header.get("version") != MODEL_CACHE_VERSION or header.get("byteorder") != sys.byteorder:
+            raise ValueError("unsupported model cache version")
+        if header.get("key") != self.key or header.get("name") != self.name:
+            raise ValueError("model cache key mismatch")
+        start = 8 + header_length
+        sections = {
+            name: (start + offset, length) for name, (offset, length) in header["sections"].items()
+        }
+        return header, sections
+
+    def enforce_size_limit(self):
+        """Evict the least recently used entries until the cache directory is within `max_size`"""
+        enforce_model_cache_size_limit(self.cache_dir, self.max_size)
@@ -1,6 +1,9 @@
 import io
 import os
-from functools import cached_property
+import shlex
+from functools import cache, cached_property, lru_cache
+
+import numpy as np
 
 from scdatatools.engine.cryxml import (
     pprint_xml_tree,
@@ -13,31 +16,90 @@ from starfab.models.common import (
     PathArchiveTreeSortFilterProxyModel,
     PathArchiveTreeItem,
     ContentItem,
-    PathArchiveTreeModelLoader,
+    SortedPathArchiveTreeModelLoader,
     ThreadLoadedPathArchiveTreeModel,
 )
+from starfab.models.query import PathQuery
 
 logger = getLogger(__name__)
 P4K_MODEL_COLUMNS = ["Name", "Size", "Kind", "Date Modified"]
 
 
+def pack_date_time(date_time) -> int:
+    """Packs a `ZipInfo.date_time` tuple into a sortable integer (`YYYYMMDDhhmmss`) for the node time column"""
+    year, month, day, hour, minute, second = date_time
+    return ((((year * 100 + month) * 100 + day) * 100 + hour) * 100 + minute) * 100 + second
+
+
+def unpack_date_time(packed) -> tuple:
+    """Reverses `pack_date_time`"""
+    packed, second = divmod(packed, 100)
+    packed, minute = divmod(packed, 100)
+    packed, hour = divmod(packed, 100)
+    packed, day = divmod(packed, 100)
+    year, month = divmod(packed, 100)
+    return year, month, day, hour, minute, second
+
+
+@cache
+def _locale():
+    return qtc.QLocale()
+
+
+@lru_cache(maxsize=65536)
+def format_data_size(size) -> str:
+    """Returns `size` formatted for display with the shared locale"""
+    return _locale().formattedDataSize(size)
+
+
+@lru_cache(maxsize=65536)
+def date_time(packed) -> qtc.QDateTime:
+    """Returns the `QDateTime` of a time packed with `pack_date_time`"""
+    return qtc.QDateTime(*unpack_date_time(packed))
+
+
 class P4KSortFilterProxyModelArchive(PathArchiveTreeSortFilterProxyModel):
-    def lessThan(self, source_left, source_right):
+    """Filters the P4K tree with a fielded `PathQuery`, e.g. `ext:dds size>8MB path:objects/spaceships`"""
+
+    # query that is always combined with the filter text, e.g. to only show one type of file
+    base_query = ""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._query = PathQuery("")
+
+    def filterQuery(self, text):
+        if self.base_query and text and not PathQuery.is_fielded(text):
+            # the base query makes the whole query fielded, so plain text is kept as a single literal term
+            text = f"path:{shlex.quote(text)}"
+        return f"{self.base_query} {text}".strip()
+
+    def searchMask(self, search_index, text, case_sensitive, cancelled):
+        return PathQuery(text).mask(search_index, case_sensitive=case_sensitive, cancelled=cancelled)
+
+    def filterAcceptsRow(self, source_row, source_parent: qtc.QModelIndex) -> bool:
+        if not self._filter and not self.additional_filters:
+            return True
+        if (accepted := self.acceptsNode(source_row, source_parent)) is not None:
+            return accepted
+
+        if (item := self.sourceItem(source_row, source_parent)) is None or not self.checkAdditionFilters(item):
+            return False
+        if self._query.text != self._filter:
+            self._query = PathQuery(self._filter)
+        return self._query.accepts(
+            item.model.nodes, item.node, item._path, self.filterCaseSensitivity() == qtc.Qt.CaseSensitive
+        )
+
+    def dataLessThan(self, source_left, source_right):
         if self.sortColumn() in [1, 3]:
-            return self.sourceModel().data(
-                source_left, qtc.Qt.UserRole
-            ) < self.sourceModel().data(source_right, qtc.Qt.UserRole)
-        return super().lessThan(source_left, source_right)
+            left, right = source_left.data(qtc.Qt.UserRole), source_right.data(qtc.Qt.UserRole)
+            # directory totals aren't known until the model has finished loading
+            return (left is not None, left or 0) < (right is not None, right or 0)
+        return super().dataLessThan(source_left, source_right)
 
 
 class P4KItem(PathArchiveTreeItem, ContentItem):
-    _cached_properties_ = PathArchiveTreeItem._cached_properties_ + [
-        "raw_size",
-        "raw_time",
-        "size",
-        "date_modified",
-    ]
-
     def _read_cryxml(self, f):
         try:
             c = pprint_xml_tree(etree_from_cryxml_file(f))
@@ -56,44 +118,44 @@ class P4KItem(PathArchiveTreeItem, ContentItem):
 
     @cached_property
     def info(self):
-        return self.model.archive.NameToInfo.get(self._path)
+        return self.model.nodes.payload[self.node]
 
     @cached_property
-    def raw_size(self):
+    def _path(self):
         if self.info is not None:
-            return self.info.file_size
-        elif self.children:
-            child_sizes = [_.raw_size for _ in self.children if _.raw_size is not None]
-            if child_sizes:
-                return sum(child_sizes)
-        return None
+            return self.info.filename
+        return self.model.nodes.path(self.node)
 
-    @cached_property
+    @property
+    def raw_size(self):
+        if (size := self.model.nodes.size[self.node]) < 0 and self.model.total_size is not None:
+            size = int(self.model.total_size[self.node])
+        return size if size >= 0 else None
+
+    @property
+    def _packed_time(self):
+        if (packed := self.model.nodes.time[self.node]) < 0 and self.model.latest_time is not None:
+            packed = int(self.model.latest_time[self.node])
+        return packed
+
+    @property
     def raw_time(self):
-        if self.info is not None:
-            return self.info.date_time
-        elif self.children:
-            child_times = [_.raw_time for _ in self.children if _.raw_time is not None]
-            if child_times:
-                return max(child_times)
-        return None
+        return unpack_date_time(packed) if (packed := self._packed_time) >= 0 else None
 
-    @cached_property
+    @property
     def size(self):
         if os.environ.get("STARFAB_QUICK"):
             return ""
-        if self.raw_size is not None:
-            return qtc.QLocale().formattedDataSize(self.raw_size)
+        if (size := self.raw_size) is not None:
+            return format_data_size(size)
         return ""
 
-    @cached_property
+    @property
     def date_modified(self):
         if os.environ.get("STARFAB_QUICK"):
             return ""
-        if self.raw_time is not None:
-            return qtc.QDateTime(
-                *self.raw_time
-            )  # .toString(qtc.Qt.DateFormat.SystemLocaleDate)
+        if (packed := self._packed_time) >= 0:
+            return date_time(packed)  # .toString(qtc.Qt.DateFormat.SystemLocaleDate)
         return ""
 
     def extract_to(self, extract_path):
@@ -130,16 +192,34 @@ class P4KItem(PathArchiveTreeItem, ContentItem):
         return f'<P4KTreeItem "{self._path}" archive:{self.model.archive}>'
 
 
-class P4KModelLoader(PathArchiveTreeModelLoader):
+class P4KModelLoader(SortedPathArchiveTreeModelLoader):
+    cache_name = "p4k"
+
     def items_to_load(self):
-        self.model.archive.expand_subarchives()
+        # the sub-archives are expanded into the `filelist` by the "p4k_subarchives" loading stage beforehand
         return self.model.archive.filelist
 
-    def load_item(self, item):
-        self._item_cls(
-            item.filename,
-            model=self.model,
-            parent=self.model.parentForPath(item.filename),
+    def item_parent_path(self, item):
+        parent_path, _, name = item.filename.rpartition("/")
+        # names without an extension are treated as directories by `parentNodeForPath`, keep that behaviour
+        return parent_path if "." in name else item.filename
+
+    def finish_model(self):
+        super().finish_model()
+        # directories show the total size and latest time of everything below them
+        index = self.model.search_index
+        has_size = index.size >= 0
+        total_size = index.aggregate(np.where(has_size, index.size, 0), np.add)
+        self.model.total_size = np.where(index.aggregate(has_size, np.logical_or), total_size, -1)
+        self.model.latest_time = index.aggregate(index.time, np.maximum)
+
+    def load_children(self, parent, items):
+        self.model.appendNodes(
+            parent,
+            [_.filename.rpartition("/")[2] for _ in items],
+            sizes=[_.file_size for _ in items],
+            times=[pack_date_time(_.date_time) for _ in items],
+            payloads=items,
         )
 
 
@@ -155,3 +235,31 @@ class P4KModel(ThreadLoadedPathArchiveTreeModel):
             loader_task_name="load_p4k_model",
             loader_task_status_msg="Processing Data.p4k",
         )
+        # size and time of every node including everything below it, set by the loader once the tree is complete
+        self.total_size = None
+        self.latest_time = None
+        self.loaded.connect(self._aggregates_loaded)
+
+    def clear(self):
+        super().clear()
+        self.total_size = None
+        self.latest_time = None
+
+    def sortKeys(self, column):
+        name_rank = self.search_index.name_rank
+        if column == 1:
+            # directories without any files sort before everything else
+            return [self.total_size, name_rank]
+        if column == 2:
+            suffixes = [("." + _.split(".", maxsplit=1)[-1]) if "." in _ else "" for _ in self.nodes.names]
+            return [self.search_index.string_ranks(suffixes)[self.search_index.name_id], name_rank]
+        if column == 3:
+            return [self.latest_time, name_rank]
+        return super().sortKeys(column)
+
+    def _aggregates_loaded(self):
+        # directories had no size or date while loading
+        if rows := self.rowCount():
+            self.dataChanged.emit(
+                self.index(0, 1, qtc.QModelIndex()), self.index(rows - 1, len(self.columns) - 1, qtc.QModelIndex())
+            )
@@ -0,0 +1,195 @@
+"""
+Dependency graph of the stages that load an opened Star Citizen install.
+
+Each `Stage` names the stages whose results it needs and starts as soon as all of them are done, rather than waiting
+for unrelated work such as building a tree model. Stages either run a function in one of the scheduler's lanes, or run
+a function in the GUI thread that starts a model loading and finish once the model's `loaded` signal fires. The time
+each stage waited and ran is recorded, so the stages that determined how long an open took (the critical path) can be
+logged once everything is done.
+"""
+import time
+import typing
+from functools import partial
+
+from starfab.gui import qtc
+from starfab.log import getLogger
+from starfab.tasks import CancellationToken, Lane, get_scheduler
+from starfab.trace import span
+
+logger = getLogger(__name__)
+
+
+class Stage:
+    def __init__(
+        self,
+        name: str,
+        fn: typing.Callable,
+        requires: typing.Iterable[str] = (),
+        lane: typing.Optional[Lane] = Lane.BACKGROUND,
+        wait_for: qtc.SignalInstance = None,
+    ):
+        """A step of a `LoadPipeline`. `fn` is called without arguments in a thread of `lane` once every stage in
+        `requires` is done, or in the GUI thread if `lane` is `None`. If `wait_for` is given, the stage is done when
+        that signal is emitted after `fn` returned, otherwise when `fn` returns."""
+        self.name = name
+        self.fn = fn
+        self.requires = tuple(requires)
+        self.lane = lane
+        self.wait_for = wait_for
+        # seconds since the pipeline started
+        self.ready = self.started = self.finished = None
+        self.error = None
+
+    def __repr__(self):
+        return f"<Stage {self.name} requires={self.requires}>"
+
+    @property
+    def is_done(self) -> bool:
+        return self.finished is not None and self.error is None
+
+    @property
+    def duration(self) -> float:
+        return self.finished - self.started
+
+
+class _StageRunnable(qtc.QRunnable):
+    def __init__(self, pipeline, stage):
+        super().__init__()
+        self.pipeline = pipeline
+        self.stage = stage
+
+    def run(self):
+        try:
+            with span(self.stage.name, "load", pipeline=self.pipeline.name):
+                self.stage.fn()
+        except Exception as e:
+            self.pipeline._stage_finished.emit(self.stage.name, e)
+        else:
+            self.pipeline._stage_finished.emit(self.stage.name, None)
+
+
+class LoadPipeline(qtc.QObject):
+    # emitted in the GUI thread with the name of a stage once it's done
+    stage_done = qtc.Signal(str)
+    stage_failed = qtc.Signal(str, object)
+    # emitted once every stage that could run has finished
+    finished = qtc.Signal()
+
+    _stage_finished = qtc.Signal(str, object)
+
+    def __init__(self, stages: typing.Iterable[Stage], name="", token: CancellationToken = None, parent=None):
+        """Runs `stages` once `start` is called. `token` is cancelled by `cancel`, e.g. for stages to poll."""
+        super().__init__(parent)
+        self.name = name
+        self.stages = {}
+        for stage in stages:
+            if stage.name in self.stages:
+                raise ValueError(f"Duplicate stage {stage.name}")
+            self.stages[stage.name] = stage
+        for stage in self.stages.values():
+            if missing := set(stage.requires) - set(self.stages):
+                raise ValueError(f"Stage {stage.name} requires unknown stages {', '.join(sorted(missing))}")
+        self.token = token or CancellationToken()
+        # `time.perf_counter()` when the pipeline was started, stage times are relative to it
+        self.start_time = None
+        self._waiting = {}
+        self._done = False
+        self._stage_finished.connect(self._handle_stage_finished)
+
+    def _now(self):
+        return time.perf_counter() - self.start_time
+
+    @property
+    def is_finished(self) -> bool:
+        return all(_.finished is not None or not self._can_run(_) for _ in self.stages.values())
+
+    def _can_run(self, stage):
+        return all(self.stages[_].error is None and self._can_run(self.stages[_]) for _ in stage.requires)
+
+    def start(self):
+        self.start_time = time.perf_counter()
+        self._start_ready()
+        if self.is_finished:
+            self._finish()
+
+    def cancel(self):
+        """Stop starting new stages, stages that are already running are left to finish"""
+        self.token.cancel()
+        for stage, signal, slot in self._waiting.values():
+            signal.disconnect(slot)
+        self._waiting = {}
+
+    def _start_ready(self):
+        for stage in self.stages.values():
+            if self.token.cancelled:
+                return
+            if stage.started is not None or not all(self.stages[_].is_done for _ in stage.requires):
+                continue
+            stage.ready = max((self.stages[_].finished for _ in stage.requires), default=0.0)
+            stage.started = self._now()
+            logger.debug(f"Starting {stage.name}")
+            if stage.lane is not None:
+                get_scheduler().start(_StageRunnable(self, stage), stage.lane)
+                continue
+            if stage.wait_for is not None:
+                slot = partial(self._handle_stage_finished, stage.name, None)
+                self._waiting[stage.name] = (stage, stage.wait_for, slot)
+                stage.wait_for.connect(slot)
+            try:
+                with span(stage.name, "load", pipeline=self.name):
+                    stage.fn()
+            except Exception as e:
+                self._handle_stage_finished(stage.name, e)
+            else:
+                if stage.wait_for is None:
+                    self._handle_stage_finished(stage.name, None)
+
+    @qtc.Slot(str, object)
+    def _handle_stage_finished(self, name, error):
+        stage = self.stages[name]
+        if stage.finished is not None or self.token.cancelled:
+            return
+        if (waiting := self._waiting.pop(name, None)) is not None:
+            waiting[1].disconnect(waiting[2])
+        stage.finished = self._now()
+        if error is not None:
+            stage.error = error
+            logger.exception(f"Loading stage {name} failed", exc_info=error)
+            self.stage_failed.emit(name, error)
+        else:
+            logger.debug(f"Finished {name} in {stage.duration:.3f}s")
+            self.stage_done.emit(name)
+        self._start_ready()
+        if self.is_finished:
+            self._finish()
+
+    def critical_path(self) -> typing.List[Stage]:
+        """Returns the chain of stages that ended last, each preceded by the requirement it waited on the longest"""
+        finished = [_ for _ in self.stages.values() if _.finished is not None]
+        if not finished:
+            return []
+        path = [max(finished, key=lambda _: _.finished)]
+        while path[-1].requires:
+            path.append(max((self.stages[_] for _ in path[-1].requires), key=lambda _: _.finished))
+        return path[::-1]
+
+    def _finish(self):
+        if self._done:
+            return
+        self._done = True
+        total = max((_.finished for _ in self.stages.values() if _.finished is not None), default=0.0)
+        path = " > ".join(
+            # a stage may have started after it was ready if it had to wait for a thread, or the GUI thread
+            f"{_.name} {_.duration:.2f}s" + (f" (+{_.started - _.ready:.2f}s queued)" if _.started - _.ready >= 0.01 else "")
+            for _ in self.critical_path()
+        )
+        logger.info(f"Loaded {self.name} in {total:.2f}s, critical path: {path}")
+        for stage in sorted(self.stages.values(), key=lambda _: (_.started is None, _.started or 0)):
+            if stage.finished is not None:
+                logger.debug(
+                    f"  {stage.name:<20} ready {stage.ready:7.2f}s  started {stage.started:7.2f}s  "
+                    f"finished {stage.finished:7.2f}s" + (" FAILED" if stage.error is not None else "")
+                )
+            else:
+                logger.debug(f"  {stage.name:<20} skipped")
+        self.finished.emit()
@@ -0,0 +1,217 @@
+"""
+Fielded search queries over the nodes of a `PathArchiveTreeModel`.
+
+A query is a whitespace separated list of terms that must all match, values with spaces can be quoted:
+
+    ext:dds size>8MB path:objects/spaceships date>2023-06
+
+=============================  ========================================================================================
+`text` or `path:text`          the node's path contains `text`
+`name:text`                    the node's own name contains `text`
+`ext:dds` / `ext:dds,socpak`   the node's suffix is one of the given extensions
+`size>8MB`                     the node's size compared with `>`, `>=`, `<`, `<=`, `=` or `:`. Units are B, KB, MB, GB
+                               and TB (powers of 1024)
+`date>2023-06`                 the node's modification date compared with the same operators. Dates are `YYYY`,
+                               `YYYY-MM` or `YYYY-MM-DD` and compare as the whole period, so `date>2023-06` is anything
+                               from July 2023 on and `date:2023` is anything in 2023
+`-term`                        negates `term`
+=============================  ========================================================================================
+
+The grammar only applies once the text has a fielded term, anything else is a plain search for the whole text, spaces
+and a leading `-` included. Terms with an unknown field or an invalid value are treated as plain text. A query compiles
+to array operations over a `PathSearchIndex` (`PathQuery.mask`), with a per-row fallback (`PathQuery.accepts`) for
+models without an index.
+"""
+import re
+import shlex
+from pathlib import Path
+
+import numpy as np
+
+from starfab.log import getLogger
+
+logger = getLogger(__name__)
+
+SIZE_UNITS = {"": 1, "b": 1, "k": 1024, "m": 1024 ** 2, "g": 1024 ** 3, "t": 1024 ** 4}
+
+_FIELD_RE = re.compile(r"^(?P<field>[a-z]+)(?P<op>:|>=|<=|=|>|<)(?P<value>.*)$", re.IGNORECASE)
+_SIZE_RE = re.compile(r"^(?P<number>\d+(?:\.\d*)?)\s*(?P<unit>[kmgt]?)(?:i?b)?$", re.IGNORECASE)
+_DATE_RE = re.compile(r"^(?P<year>\d{4})(?:-(?P<month>\d{1,2})(?:-(?P<day>\d{1,2}))?)?$")
+
+
+def _compare(values, op, low, high):
+    """Compares `values` against the inclusive range `low`-`high` with `op`, a single value has `low == high`"""
+    if op == ">":
+        return values > high
+    if op == ">=":
+        return values >= low
+    if op == "<":
+        return values < low
+    if op == "<=":
+        return values <= high
+    return (values >= low) & (values <= high)
+
+
+class QueryTerm:
+    negated = False
+
+    def mask(self, index, case_sensitive) -> np.ndarray:
+        """Returns the boolean mask of nodes in the `PathSearchIndex` `index` that match this term"""
+        raise NotImplementedError
+
+    def accepts(self, nodes, node, path, case_sensitive) -> bool:
+        """Returns whether `node` of the `PathArchiveTreeNodes` `nodes`, with the full path `path`, matches this term"""
+        raise NotImplementedError
+
+
+class PathTerm(QueryTerm):
+    def __init__(self, text):
+        self.text = text
+
+    def mask(self, index, case_sensitive):
+        # the path of everything below a matching node contains the text as well
+        return index.descendants(index.match(self.text, case_sensitive=case_sensitive))
+
+    def accepts(self, nodes, node, path, case_sensitive):
+        if case_sensitive:
+            return self.text in path
+        return self.text.lower() in path.lower()
+
+
+class NameTerm(QueryTerm):
+    def __init__(self, text):
+        self.text = text
+
+    def mask(self, index, case_sensitive):
+        if "/" in self.text:
+            return np.zeros(len(index), dtype=bool)
+        return index.match(self.text, case_sensitive=case_sensitive)
+
+    def accepts(self, nodes, node, path, case_sensitive):
+        if case_sensitive:
+            return self.text in nodes.name(node)
+        return self.text.lower() in nodes.name(node).lower()
+
+
+class ExtensionTerm(QueryTerm):
+    def __init__(self, extensions):
+        self.extensions = {_.lower().lstrip(".") for _ in extensions} - {""}
+
+    def mask(self, index, case_sensitive):
+        return index.suffix_matching(self.extensions)
+
+    def accepts(self, nodes, node, path, case_sensitive):
+        return Path(nodes.name(node)).suffix.lower()[1:] in self.extensions
+
+
+class ColumnTerm(QueryTerm):
+    """Compares the `size` or `time` column, nodes without a value (directories) never match"""
+
+    def __init__(self, column, op, low, high):
+        self.column = column
+        self.op = op
+        self.low = low
+        self.high = high
+
+    def mask(self, index, case_sensitive):
+        values = getattr(index, self.column)
+        return (values >= 0) & _compare(values, self.op, self.low, self.high)
+
+    def accepts(self, nodes, node, path, case_sensitive):
+        value = getattr(nodes, self.column)[node]
+        return value >= 0 and bool(_compare(value, self.op, self.low, self.high))
+
+
+def _size_term(op, value):
+    if (m := _SIZE_RE.match(value)) is None:
+        raise ValueError(f"invalid size {value!r}")
+    size = int(float(m["number"]) * SIZE_UNITS[m["unit"].lower()])
+    return ColumnTerm("size", op, size, size)
+
+
+def _date_term(op, value):
+    if (m := _DATE_RE.match(value)) is None:
+        raise ValueError(f"invalid date {value!r}")
+    # times are packed as YYYYMMDDhhmmss, see `starfab.models.p4k.pack_date_time`, so a period is a range of digits
+    digits = m["year"] + "".join(f"{int(_):02d}" for _ in (m["month"], m["day"]) if _ is not None)
+    return ColumnTerm("time", op, int(digits.ljust(14, "0")), int(digits.ljust(14, "9")))
+
+
+_FIELDS = {
+    "path": lambda op, value: PathTerm(value),
+    "name": lambda op, value: NameTerm(value),
+    "ext": lambda op, value: ExtensionTerm(value.split(",")),
+    "size": _size_term,
+    "date": _date_term,
+}
+# fields that only make sense as a plain match
+_TEXT_FIELDS = ("path", "name", "ext")
+
+
+class PathQuery:
+    def __init__(self, text):
+        self.text = text
+        tokens = self._split(text)
+        if any(self._is_field(_) for _ in tokens):
+            self.terms = [self._parse_term(_) for _ in tokens]
+        else:
+            self.terms = [PathTerm(text)] if text else []
+
+    def __bool__(self):
+        return bool(self.terms)
+
+    @staticmethod
+    def _split(text):
+        try:
+            return shlex.split(text)
+        except ValueError:
+            # unbalanced quotes
+            return text.split()
+
+    @staticmethod
+    def is_fielded(text) -> bool:
+        """Returns whether `text` has a fielded term, otherwise it's searched for as a plain text"""
+        return any(PathQuery._is_field(_) for _ in PathQuery._split(text))
+
+    @staticmethod
+    def _is_field(token) -> bool:
+        if token.startswith("-"):
+            token = token[1:]
+        return (m := _FIELD_RE.match(token)) is not None and m["field"].lower() in _FIELDS
+
+    @staticmethod
+    def _parse_term(token) -> QueryTerm:
+        negated = token.startswith("-") and len(token) > 1
+        if negated:
+            token = token[1:]
+        term = None
+        if (m := _FIELD_RE.match(token)) is not None and (field := m["field"].lower()) in _FIELDS:
+            if field in _TEXT_FIELDS and m["op"] != ":":
+                logger.debug(f"Unsupported operator in query term {token!r}, searching for it as text")
+            else:
+                try:
+                    term = _FIELDS[field](m["op"], m["value"])
+                except ValueError as e:
+                    logger.debug(f"Invalid query term {token!r}, searching for it as text: {e}")
+        if term is None:
+            term = PathTerm(token)
+        term.negated = negated
+        return term
+
+    def mask(self, index, case_sensitive=False, cancelled=None):
+        """Returns the mask of nodes in the `PathSearchIndex` `index` that match the query, plus their ancestors, or
+        `None` if `cancelled` returned `True`"""
+        matched = np.ones(len(index), dtype=bool)
+        for term in self.terms:
+            if cancelled is not None and cancelled():
+                return None
+            term_mask = term.mask(index, case_sensitive)
+            matched &= ~term_mask if term.negated else term_mask
+        matched[0] = False
+        return index.expand(matched, descendants=False, cancelled=cancelled)
+
+    def accepts(self, nodes, node, path, case_sensitive=False) -> bool:
+        """Returns whether `node` of `nodes`, with the full path `path`, matches every term of the query"""
+        return all(
+            term.accepts(nodes, node, path, case_sensitive) != term.negated for term in self.terms
+        )
@@ -0,0 +1,144 @@
+"""
+Cache of DataCore records serialized as XML or JSON.
+
+Serializing a large record, such as a ship's entity, takes long enough to notice, and the same records are serialized
+again each time they're previewed, viewed, extracted or filtered. `SerializedRecordCache` keeps the most recently used
+serializations, keyed by the record's GUID and the format, up to a budget of bytes set by
+`datacore/record_cache_max_size_mb`. The cache is shared, see `serialized_record`, and is cleared when an install is
+unloaded. Its size and hit rate are recorded as counters in the trace, see `starfab.trace`.
+
+    from starfab.models.record_cache import serialized_record
+
+    xml = serialized_record(sc.datacore, record, "xml")
+"""
+import threading
+import typing
+from collections import OrderedDict
+
+from scdatatools.forge import dftypes
+from starfab.settings import settings
+from starfab.trace import counter
+
+RECORD_FORMATS = ("xml", "json")
+
+
+def record_cache_max_size() -> int:
+    """Maximum size of the serialized records kept in the cache in bytes"""
+    try:
+        return int(settings.value("datacore/record_cache_max_size_mb")) * 1024 * 1024
+    except (TypeError, ValueError):
+        return 0
+
+
+class SerializedRecordCache:
+    def __init__(self, max_size=None):
+        """LRU of serialized records of up to `max_size` bytes, by default `record_cache_max_size()`"""
+        self._max_size = max_size
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def max_size(self) -> int:
+        return self._max_size if self._max_size is not None else record_cache_max_size()
+
+    def __len__(self):
+        return len(self._entries)
+
+    @property
+    def hit_rate(self) -> float:
+        return self.hits / (self.hits + self.misses) if self.hits + self.misses else 0.0
+
+    def cached(self, key, fmt) -> typing.Optional[bytes]:
+        """Returns the serialization of `key` as `fmt` if it's cached, otherwise `None`. Only a hit is counted, a
+        miss is counted once it's serialized with `get`."""
+        with self._lock:
+            if (data := self._entries.get((key, fmt))) is not None:
+                self._entries.move_to_end((key, fmt))
+                self.hits += 1
+            return data
+
+    def get(self, key, fmt, serialize: typing.Callable[[], bytes], store=True) -> bytes:
+        """Returns the serialization of `key` as `fmt`, from the cache or from `serialize()`. If it wasn't cached, it's
+        only added if `store` is set, so that going through every record once doesn't evict everything else."""
+        with self._lock:
+            if (data := self._entries.get((key, fmt))) is not None:
+                self._entries.move_to_end((key, fmt))
+                self.hits += 1
+                return data
+            self.misses += 1
+        data = serialize()
+        if store:
+            self.put(key, fmt, data)
+        return data
+
+    def put(self, key, fmt, data: bytes):
+        max_size = self.max_size
+        if len(data) > max_size:
+            return
+        with self._lock:
+            if (previous := self._entries.pop((key, fmt), None)) is not None:
+                self.size -= len(previous)
+            self._entries[(key, fmt)] = data
+            self.size += len(data)
+            while self.size > max_size:
+                _, evicted = self._entries.popitem(last=False)
+                self.size -= len(evicted)
+        self._trace()
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.size = 0
+        self._trace()
+
+    def stats(self) -> dict:
+        return {
+            "entries": len(self),
+            "bytes": self.size,
+            "max_bytes": self.max_size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hit_rate,
+        }
+
+    def _trace(self):
+        counter("record cache", "cache", bytes=self.size, entries=len(self), hit_rate=self.hit_rate)
+
+
+record_cache = SerializedRecordCache()
+
+
+def serialize_record(datacore, obj, fmt, depth=None) -> bytes:
+    """Serializes the record or structure instance `obj` of `datacore` as `fmt` without the cache"""
+    kwargs = {} if depth is None else {"depth": depth}
+    if fmt == "xml":
+        return datacore.dump_record_xml(obj, **kwargs).encode("utf-8")
+    elif fmt == "json":
+        return datacore.dump_record_json(obj, **kwargs).encode("utf-8")
+    raise ValueError(f"Unknown record format {fmt}, expected one of {RECORD_FORMATS}")
+
+
+def _cache_key(obj) -> typing.Optional[str]:
+    """The GUID of a record, or the offset of a structure instance in the datacore"""
+    if isinstance(obj, dftypes.Record):
+        return obj.id.value
+    obj = getattr(obj, "reference", obj)
+    if (offset := getattr(obj, "dcb_offset", None)) is not None:
+        return f"@{offset}"
+    return None
+
+
+def serialized_record(datacore, obj, fmt, depth=None, store=True) -> bytes:
+    """Returns the record or structure instance `obj` of `datacore` serialized as `fmt` through the `record_cache`,
+    following references `depth` levels deep, see `SerializedRecordCache.get` for `store`"""
+    if (key := _cache_key(obj)) is None:
+        return serialize_record(datacore, obj, fmt, depth)
+    return record_cache.get(
+        key,
+        fmt if depth is None else f"{fmt}:{depth}",
+        lambda: serialize_record(datacore, obj, fmt, depth),
+        store=store,
+    )
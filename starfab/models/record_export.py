@@ -0,0 +1,237 @@
+"""
+Exports DataCore records to XML or JSON files in worker processes.
+
+Serializing a record is pure Python and holds the GIL, so exporting every record from threads is no faster than from
+one. `export_records` instead shards the records across a pool of worker processes. Each worker opens its own copy of
+the datacore once, from a temporary copy of `Game.dcb`, then serializes and writes the records it's sent one at a time,
+so nothing but the counts of what was written comes back. Small exports are done in the calling thread, where starting
+the workers would cost more than it saves.
+
+The output paths are all decided up front in the calling thread, a record whose path is already taken, by a file on
+disk or by another record of the export, is written next to it with its GUID in the name.
+"""
+import concurrent.futures
+import multiprocessing
+import os
+import tempfile
+import time
+import typing
+from concurrent.futures.process import BrokenProcessPool
+from functools import partial
+from pathlib import Path
+
+from scdatatools.forge import DataCoreBinary
+from starfab.gui import qtc
+from starfab.log import getLogger
+from starfab.models.common import BackgroundRunnerSignals
+from starfab.models.record_cache import RECORD_FORMATS, serialize_record, serialized_record
+from starfab.tasks import Lane, get_scheduler
+from starfab.trace import span
+from starfab.utils import show_file_in_filemanager
+
+logger = getLogger(__name__)
+
+# records sent to a worker at a time, small enough for progress and cancelling to stay responsive
+RECORDS_PER_JOB = 64
+# exports of fewer records than this are done in the calling thread
+MIN_PARALLEL_RECORDS = 5_000
+# jobs queued per worker ahead of the ones running
+QUEUED_JOBS_PER_WORKER = 2
+
+# the datacore of a worker process, see `_init_worker`
+_worker_datacore = None
+
+
+class RecordExportStats:
+    def __init__(self, total):
+        self.total = total
+        self.records = 0
+        self.bytes = 0
+        self.errors = []
+        self.started = time.perf_counter()
+        self.elapsed = 0.0
+
+    def update(self, records, written, errors):
+        self.records += records
+        self.bytes += written
+        self.errors.extend(errors)
+        self.elapsed = time.perf_counter() - self.started
+
+    @property
+    def rate(self) -> float:
+        """Records exported per second"""
+        return self.records / self.elapsed if self.elapsed > 0 else 0.0
+
+    def __str__(self):
+        return (
+            f"{self.records:,}/{self.total:,} records, {self.bytes / 1024 / 1024:,.1f} MB in {self.elapsed:.1f}s "
+            f"({self.rate:,.0f} records/s, {self.bytes / 1024 / 1024 / max(self.elapsed, 1e-9):,.1f} MB/s)"
+        )
+
+
+def record_export_paths(records, outdir: Path, fmt) -> typing.List[typing.Tuple[str, Path]]:
+    """Returns the `(guid, output path)` of each of `records`, `(guid, path)` pairs of paths relative to `outdir`"""
+    taken = set()
+    paths = []
+    for guid, path in records:
+        outfile = (outdir / path).with_suffix(f".{fmt}")
+        if outfile in taken or outfile.is_file():
+            outfile = outfile.parent / f"{outfile.stem}.{guid}{outfile.suffix}"
+        taken.add(outfile)
+        paths.append((guid, outfile))
+    return paths
+
+
+def _export(datacore, fmt, jobs, serialize=serialize_record):
+    """Writes each of `jobs`, `(guid, output path)` pairs, serialized with `serialize`. Returns the number of records,
+    the bytes written and the `(guid, error)` of each record that couldn't be written."""
+    written = 0
+    errors = []
+    for guid, outfile in jobs:
+        try:
+            data = serialize(datacore, datacore.records_by_guid[guid], fmt)
+            outfile.parent.mkdir(parents=True, exist_ok=True)
+            with outfile.open("wb") as o:
+                o.write(data)
+            written += len(data)
+        except Exception as e:
+            errors.append((guid, repr(e)))
+    return len(jobs), written, errors
+
+
+def _init_worker(dcb_path):
+    global _worker_datacore
+    _worker_datacore = DataCoreBinary(dcb_path)
+
+
+def _export_job(fmt, jobs):
+    return _export(_worker_datacore, fmt, jobs)
+
+
+def _export_parallel(datacore, fmt, jobs, workers, stats, finished, cancelled, progress):
+    """Exports `jobs` in a pool of `workers` processes, adding the index of each job that's done to `finished`.
+    Returns `False` if cancelled."""
+    fd, dcb_path = tempfile.mkstemp(prefix="starfab-", suffix=".dcb")
+    try:
+        with span("copy datacore", "export"), os.fdopen(fd, "wb") as f:
+            f.write(datacore.raw_data)
+        with concurrent.futures.ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+            initargs=(dcb_path,),
+        ) as pool:
+            jobs = iter(enumerate(jobs))
+            pending = {}
+            try:
+                while True:
+                    while len(pending) < workers * (QUEUED_JOBS_PER_WORKER + 1):
+                        if (job := next(jobs, None)) is None:
+                            break
+                        pending[pool.submit(_export_job, fmt, job[1])] = job[0]
+                    if not pending:
+                        break
+                    done, _ = concurrent.futures.wait(
+                        pending, timeout=0.5, return_when=concurrent.futures.FIRST_COMPLETED
+                    )
+                    for future in done:
+                        stats.update(*future.result())
+                        finished.add(pending.pop(future))
+                    if progress is not None:
+                        progress(stats)
+                    if cancelled is not None and cancelled():
+                        return False
+            finally:
+                for future in pending:
+                    future.cancel()
+        return True
+    finally:
+        os.remove(dcb_path)
+
+
+def export_records(datacore, records, outdir, fmt="xml", workers=None, cancelled=None, progress=None):
+    """Exports `records` of `datacore`, `(guid, path)` pairs of paths relative to `outdir`, as `fmt` files. They're
+    written by `workers` processes, by default one per CPU, or in the calling thread for small exports or if `workers`
+    is 1 or less. `cancelled` is an optional callable polled while exporting, `progress` is an optional callable given
+    the `RecordExportStats` as records are written. Returns the `RecordExportStats`, or `None` if cancelled."""
+    if fmt not in RECORD_FORMATS:
+        raise ValueError(f"Unknown record format {fmt}, expected one of {RECORD_FORMATS}")
+    outdir = Path(outdir)
+    stats = RecordExportStats(len(records))
+    with span("export records", "export", records=len(records), outdir=outdir, format=fmt):
+        with span("plan paths", "export"):
+            paths = record_export_paths(records, outdir, fmt)
+        jobs = [paths[i : i + RECORDS_PER_JOB] for i in range(0, len(paths), RECORDS_PER_JOB)]
+        if workers is None:
+            workers = os.cpu_count() or 1
+        workers = min(workers, len(jobs))
+
+        if workers > 1 and len(records) >= MIN_PARALLEL_RECORDS:
+            finished = set()
+            try:
+                if not _export_parallel(datacore, fmt, jobs, workers, stats, finished, cancelled, progress):
+                    return None
+                return stats
+            except BrokenProcessPool as e:
+                # e.g. the interpreter couldn't be started again, finish the export in this thread instead
+                logger.warning(f"Record export workers failed, exporting in one thread: {e}")
+                jobs = [job for i, job in enumerate(jobs) if i not in finished]
+
+        for job in jobs:
+            if cancelled is not None and cancelled():
+                return None
+            # records that were already serialized are reused, but the export doesn't fill the cache
+            stats.update(*_export(datacore, fmt, job, serialize=partial(serialized_record, store=False)))
+            if progress is not None:
+                progress(stats)
+    return stats
+
+
+class RecordExportRunner(qtc.QRunnable):
+    """Exports DataCore records with `export_records` as a tracked task, see `DCBTreeWidget.extract_items`"""
+
+    def __init__(self, datacore, records, outdir: typing.Union[Path, str], fmt="xml", workers=None):
+        super().__init__()
+        self.signals = BackgroundRunnerSignals()
+        self.datacore = datacore
+        self.records = records
+        self.outdir = Path(outdir)
+        self.fmt = fmt
+        self.workers = workers
+        self.task = get_scheduler().task(f"Extracting to {self.outdir.name}", total=len(records), lane=Lane.BULK)
+        self.task.progress(message=f"Extracting records to {self.outdir.name}")
+
+    def _progress(self, stats):
+        self.task.progress(stats.records, message=f"{stats.rate:,.0f} records/s")
+
+    def run(self):
+        try:
+            stats = export_records(
+                self.datacore,
+                self.records,
+                self.outdir,
+                fmt=self.fmt,
+                workers=self.workers,
+                cancelled=lambda: self.task.cancelled,
+                progress=self._progress,
+            )
+        except Exception as e:
+            logger.exception(f"Record export failed", exc_info=e)
+            self.signals.finished.emit({"error": str(e)})
+            self.task.finish(False, f"Error during export: {e}")
+            return
+
+        if stats is None:
+            logger.info(f"Record export to {self.outdir} cancelled")
+            self.signals.finished.emit({"error": "cancelled"})
+            self.task.finish(False)
+            return
+        for guid, error in stats.errors:
+            logger.error(f"Exception extracting record {guid}: {error}")
+        logger.info(f"Extracted {stats} to {self.outdir}")
+        self.signals.finished.emit({"error": "", "stats": stats})
+        if stats.errors:
+            self.task.finish(False, f"{len(stats.errors):,} of {stats.total:,} records could not be extracted")
+        else:
+            self.task.finish(True, f"Extracted {stats.records:,} records to {self.outdir}")
+        show_file_in_filemanager(self.outdir)
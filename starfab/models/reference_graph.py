@@ -0,0 +1,110 @@
+"""
+Graph of the references between DataCore records.
+
+A record can follow a `Reference` or `GUID` forward to the record it points at, but not the other way around. The
+edges of every record-to-record reference are collected in the same single pass over the records that builds the
+`starfab.models.content_index.RecordContentIndex`, and kept as pairs of int32 arrays of indices into the sorted record
+GUIDs, once sorted by the referenced record and once by the referencing one. Both directions resolve with binary
+searches, `referenced_by` answers which records point at a given one.
+
+    graph = starfab.sc_manager.datacore_model.reference_graph
+    graph.referenced_by("0a1b2c3d-...")
+"""
+import os
+import typing
+
+import numpy as np
+
+from starfab.log import getLogger
+
+logger = getLogger(__name__)
+
+REFERENCE_GRAPH_CACHE_NAME = "datacore_references"
+REFERENCE_GRAPH_VERSION = 1
+
+
+class ReferenceGraph:
+    def __init__(self, guids, sources, targets):
+        """Graph over the records `guids`, a sorted array of GUIDs as bytes. Edge `i` is a reference from record
+        `sources[i]` to record `targets[i]`, the edges are sorted by target and then by source. Use `from_edges` or
+        `load` rather than creating one directly."""
+        self.guids = guids
+        self.sources = sources
+        self.targets = targets
+        order = np.lexsort((targets, sources))
+        self._forward_sources = sources[order]
+        self._forward_targets = targets[order]
+
+    def __len__(self):
+        """The number of edges"""
+        return len(self.sources)
+
+    @classmethod
+    def from_edges(cls, guids, sources, target_guids):
+        """Builds the graph over `guids` from the references of records `sources`, indices into `guids`, to the GUIDs
+        `target_guids`. References to GUIDs that aren't records, duplicates and references of a record to itself are
+        left out."""
+        sources = np.asarray(sources, dtype=np.int64)
+        target_guids = np.asarray(target_guids, dtype=guids.dtype)
+        if not len(guids) or not len(sources):
+            return cls(guids, np.zeros(0, dtype=np.int32), np.zeros(0, dtype=np.int32))
+        targets = np.minimum(np.searchsorted(guids, target_guids), len(guids) - 1)
+        valid = (guids[targets] == target_guids) & (targets != sources)
+        # unique (target, source) pairs, in target order
+        edges = np.unique((targets[valid] << 32) | sources[valid])
+        return cls(guids, (edges & 0xFFFFFFFF).astype(np.int32), (edges >> 32).astype(np.int32))
+
+    def _record(self, guid) -> typing.Optional[int]:
+        guid = guid.lower().encode("ascii", errors="replace")
+        i = int(np.searchsorted(self.guids, guid))
+        if i < len(self.guids) and self.guids[i] == guid:
+            return i
+        return None
+
+    def _guids(self, records) -> typing.List[str]:
+        return [_.decode("ascii") for _ in self.guids[records]]
+
+    def referenced_by(self, guid: str) -> typing.List[str]:
+        """Returns the GUIDs of the records that reference the record `guid`"""
+        if (record := self._record(guid)) is None:
+            return []
+        start, end = np.searchsorted(self.targets, [record, record + 1])
+        return self._guids(self.sources[start:end])
+
+    def references(self, guid: str) -> typing.List[str]:
+        """Returns the GUIDs of the records that the record `guid` references"""
+        if (record := self._record(guid)) is None:
+            return []
+        start, end = np.searchsorted(self._forward_sources, [record, record + 1])
+        return self._guids(self._forward_targets[start:end])
+
+    def reference_counts(self) -> np.ndarray:
+        """Returns the number of records referencing each record, in the order of `guids`"""
+        return np.bincount(self.targets, minlength=len(self.guids))
+
+    def save(self, path):
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "wb") as f:
+            np.savez(
+                f,
+                version=np.array(REFERENCE_GRAPH_VERSION),
+                guids=self.guids,
+                sources=self.sources,
+                targets=self.targets,
+            )
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path, record_count=None):
+        """Loads a graph written by `save`, returns `None` if it's unusable or wasn't built from `record_count`
+        records"""
+        try:
+            with np.load(path, allow_pickle=False) as data:
+                if int(data["version"]) != REFERENCE_GRAPH_VERSION:
+                    return None
+                if record_count is not None and len(data["guids"]) != record_count:
+                    return None
+                return cls(guids=data["guids"], sources=data["sources"], targets=data["targets"])
+        except (OSError, ValueError, KeyError) as e:
+            logger.warning(f"Could not read the record reference graph {path}: {e}")
+            return None
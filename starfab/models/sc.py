@@ -1,62 +1,37 @@
-import time
 import typing
+from functools import partial
 from pathlib import Path
 
 import sentry_sdk
 
 from scdatatools.sc import StarCitizen
-from scdatatools.utils import log_time
 from starfab.gui import qtc
 from starfab.log import getLogger
-from .audio import AudioTreeModel
+from starfab.tasks import CancellationToken, Lane, get_scheduler
+from .audio import AudioTreeModel, preload_game_audio
+from .common import SKIP_MODELS
+from .content_index import load_record_indexes
 from .datacore import DCBModel
 from .localization import LocalizationModel
 from .p4k import P4KModel
+from .pipeline import LoadPipeline, Stage
+from .record_cache import record_cache
 from .tag_database import TagDatabaseModel
 
 logger = getLogger(__name__)
 
 
-class _LoaderSignals(qtc.QObject):
-    started = qtc.Signal()
-    finished = qtc.Signal()
+def _open_p4k(sc):
+    task = get_scheduler().task("Loading P4K", total=1, lane=Lane.BACKGROUND, cancellable=False)
 
-    task_started = qtc.Signal(str, str, int, int)
-    update_status_progress = qtc.Signal(str, int, int, int, str)
-    task_finished = qtc.Signal(str, bool, str)
+    def p4k_load_monitor(msg, progress, total):
+        task.progress(int(progress // 1024 // 1024), int(total // 1024 // 1024))
 
-
-class _SCLoader(qtc.QRunnable):
-    def __init__(self, sc, *args, **kwargs):
-        super().__init__(*args, **kwargs)
-        self.signals = _LoaderSignals()
-        self.sc = sc
-
-    def run(self):
-        with log_time(
-            f"Loading {self.sc.game_folder} ({self.sc.version_label})", logger.info
-        ):
-            t = time.time()
-
-            def p4k_load_monitor(msg, progress, total):
-                nonlocal t
-                if (time.time() - t) > 1:
-                    self.signals.update_status_progress.emit(
-                        "load_p4k",
-                        progress / 1024 // 1024,
-                        None,
-                        total / 1024 // 1024,
-                        None,
-                    )
-                    t = time.time()
-
-            with log_time("Loading P4K", logger.debug):
-                self.signals.task_started.emit("load_p4k", "Loading P4K", 0, 1)
-                self.sc._p4k_load_monitor = p4k_load_monitor
-                assert self.sc.p4k is not None
-                self.signals.task_finished.emit("load_p4k", True, "")
-
-            self.signals.finished.emit()
+    sc._p4k_load_monitor = p4k_load_monitor
+    try:
+        assert sc.p4k is not None
+    finally:
+        task.finish()
 
 
 class StarCitizenManager(qtc.QObject):
@@ -74,6 +49,7 @@ class StarCitizenManager(qtc.QObject):
         super().__init__(parent=starfab)
         self._starfab = starfab
         self.sc = None
+        self.pipeline = None
 
         sentry_sdk.set_context("sc", {})
         sentry_sdk.set_tag('sc.version', None)
@@ -95,8 +71,12 @@ class StarCitizenManager(qtc.QObject):
         logger.debug(f"Unloading {self.sc.game_folder}")
         if self.sc is not None:
             self.preparing_to_unload.emit()
+        if self.pipeline is not None:
+            self.pipeline.cancel()
+            self.pipeline = None
         self.p4k_model.unload()
         self.datacore_model.unload()
+        record_cache.clear()
         sentry_sdk.set_context("sc", {})
         sentry_sdk.set_tag('sc.version', None)
         sentry_sdk.set_tag('sc.mode', None)
@@ -104,13 +84,89 @@ class StarCitizenManager(qtc.QObject):
         del self.sc
         self.sc = None
 
-    @qtc.Slot()
-    def _loaded(self):
-        self.loaded.emit()
-        self.p4k_model.load(self.sc.p4k)
-        self.datacore_model.load(
-            self.sc
-        )  # datacore loader expects the StarCitizen object
+    @staticmethod
+    def _preload_game_audio(sc, token):
+        if "audio" in SKIP_MODELS:
+            logger.debug(f"Skipping preloading the game audio")
+            return
+        preload_game_audio(sc, lambda: token.cancelled)
+
+    def _load_stages(self, sc, token):
+        """Returns the `Stage`s that load `sc`, each only requires the stages that produce what it actually uses"""
+        stages = [
+            Stage("p4k", partial(_open_p4k, sc)),
+            # adds the files of the sub-archives to the p4k, everything that searches its files must wait for this
+            Stage("p4k_subarchives", lambda: sc.p4k.expand_subarchives(), ["p4k"]),
+            Stage(
+                "p4k_tree",
+                lambda: self.p4k_model.load(sc.p4k),
+                ["p4k_subarchives"],
+                lane=None,
+                wait_for=self.p4k_model.loaded,
+            ),
+            Stage("datacore", lambda: sc.datacore, ["p4k"]),
+            # the datacore tree expects the StarCitizen object
+            Stage(
+                "datacore_tree",
+                lambda: self.datacore_model.load(sc),
+                ["datacore"],
+                lane=None,
+                wait_for=self.datacore_model.loaded,
+            ),
+            Stage("localization", lambda: sc.localization, ["p4k_subarchives"]),
+            Stage("localization_model", lambda: self.localization_model.load(sc), ["localization"], lane=None),
+        ]
+        # checked on the class, as the property would load the manager
+        if hasattr(type(sc), "attachable_component_manager"):
+            stages.append(
+                Stage(
+                    "attachable_components",
+                    lambda: sc.attachable_component_manager.load_attachable_components(),
+                    ["datacore"],
+                )
+            )
+        if "tag_database" not in SKIP_MODELS:
+            stages += [
+                Stage("tag_database", lambda: sc.tag_database, ["datacore"]),
+                Stage(
+                    "tag_database_tree",
+                    lambda: self.tag_database_model.load(sc),
+                    ["tag_database"],
+                    lane=None,
+                    wait_for=self.tag_database_model.loaded,
+                ),
+            ]
+        stages += [
+            Stage("wwise", partial(self._preload_game_audio, sc, token), ["p4k_subarchives"]),
+            Stage("audio_tree", lambda: self.audio_model.load(sc), ["wwise"], lane=None, wait_for=self.audio_model.loaded),
+        ]
+        return stages
+
+    def _load_record_indexes(self, task, sc, token):
+        task.progress(0, len(sc.datacore.records))
+        indexes = load_record_indexes(
+            sc, cancelled=lambda: token.cancelled or task.cancelled, progress=lambda _: task.progress(_)
+        )
+        if indexes is not None and not token.cancelled:
+            (
+                self.datacore_model.content_index,
+                self.datacore_model.reference_graph,
+                self.datacore_model.record_tags,
+            ) = indexes
+            self.datacore_model.record_indexes_loaded.emit()
+            logger.debug(
+                f"Indexed {len(indexes[0])} records, {indexes[0].token_count} tokens and {len(indexes[1])} references"
+            )
+
+    @qtc.Slot(str)
+    def _stage_done(self, name):
+        if name == "p4k":
+            self.loaded.emit()
+        elif name == "datacore" and "datacore" not in SKIP_MODELS:
+            # not a stage of the pipeline, the install is usable long before every record has been indexed
+            get_scheduler().run(
+                "Indexing DataCore records", self._load_record_indexes, self.sc, self.pipeline.token, lane=Lane.BULK
+            )
 
     @qtc.Slot(str)
     def _load_sc(self, game_folder: typing.Union[str, Path], p4k_file="Data.p4k"):
@@ -135,14 +191,13 @@ class StarCitizenManager(qtc.QObject):
         sentry_sdk.set_tag('sc.mode', mode)
 
         self.preparing_to_load.emit(self.sc.game_folder)
-        loader = _SCLoader(self.sc)
-
-        loader.signals.task_started.connect(self._starfab.task_started)
-        loader.signals.task_finished.connect(self._starfab.task_finished)
-        loader.signals.update_status_progress.connect(
-            self._starfab.update_status_progress
+        token = CancellationToken()
+        self.pipeline = LoadPipeline(
+            self._load_stages(self.sc, token),
+            name=f"{self.sc.game_folder} ({self.sc.version_label})",
+            token=token,
+            parent=self,
         )
-        loader.signals.finished.connect(self._loaded)
-
-        qtc.QThreadPool.globalInstance().start(loader)
+        self.pipeline.stage_done.connect(self._stage_done)
+        self.pipeline.start()
         self.opened.emit()
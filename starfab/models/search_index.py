@@ -0,0 +1,262 @@
+"""
+Precomputed search index over the paths of a `PathArchiveTreeModel`.
+
+Every lowercased name in the model's name table is stored once in a newline separated text blob, so a substring query
+is resolved by scanning the blob in C rather than testing each row's path in Python. A match against a name matches
+every node with that name and, since a directory's name is part of the path of everything below it, all of their
+descendants. Queries containing `/` are matched against consecutive names along the parent chain. The result of a query
+is a boolean mask over the node indices that also includes every ancestor of a match, so a proxy model can filter each
+row with a single lookup and without recursing into rejected directories.
+
+Keys such as record GUIDs can also be looked up by prefix through a `SortedKeyIndex`, which keeps them in a sorted
+array so an exact key or a prefix resolves to its nodes with a binary search.
+
+The size and time columns and the position of each name's suffix are captured as well, so fielded queries (see
+`starfab.models.query.PathQuery`) can be evaluated over the whole tree with array operations, and the case-insensitive
+order of the names is ranked once so the rows of a proxy model can be sorted with a single argsort over the ranks.
+"""
+import re
+
+import numpy as np
+
+
+class SortedKeyIndex:
+    def __init__(self, keys, nodes):
+        """Index the ASCII strings `keys`, e.g. GUIDs, of the matching `nodes` for case-insensitive exact and prefix
+        lookups. The keys are stored in a fixed width array, so they should be of similar length."""
+        keys = np.array([_.lower().encode("ascii", errors="replace") for _ in keys], dtype=bytes)
+        order = np.argsort(keys, kind="stable")
+        self.keys = keys[order]
+        self.nodes = np.array(nodes, dtype=np.int64)[order]
+
+    def __len__(self):
+        return len(self.keys)
+
+    def _range(self, prefix):
+        prefix = prefix.lower().encode("ascii", errors="replace")
+        # every key starting with `prefix` sorts before `prefix` followed by the highest byte
+        return (
+            int(np.searchsorted(self.keys, prefix, side="left")),
+            int(np.searchsorted(self.keys, prefix + b"\xff", side="left")),
+        )
+
+    def get(self, key):
+        """Returns the node of `key`, or `None`"""
+        start, end = self._range(key)
+        if start < end and self.keys[start] == key.lower().encode("ascii", errors="replace"):
+            return int(self.nodes[start])
+        return None
+
+    def get_many(self, keys) -> np.ndarray:
+        """Returns the node of each of `keys`, an array of lowercase bytes, or -1 for keys that aren't in the index"""
+        if not len(self.keys):
+            return np.full(len(keys), -1, dtype=np.int64)
+        positions = np.minimum(np.searchsorted(self.keys, keys), len(self.keys) - 1)
+        return np.where(self.keys[positions] == keys, self.nodes[positions], -1)
+
+    def prefixed(self, prefix) -> np.ndarray:
+        """Returns the nodes of every key that starts with `prefix`, in key order"""
+        start, end = self._range(prefix)
+        return self.nodes[start:end]
+
+
+class PathSearchIndex:
+    def __init__(self, nodes, extra_keys=None, prefix_index: SortedKeyIndex = None):
+        """Index the names of `nodes`, a `PathArchiveTreeNodes`. `extra_keys` is an optional iterable of `(node, key)`
+        pairs of additional strings that a node (but not its descendants) should be found by. A node is also found by
+        the start of its keys in `prefix_index`, e.g. a record by the start of its GUID."""
+        self.parent = np.array(nodes.parent, dtype=np.int64)
+        self.name_id = np.array(nodes.name_id, dtype=np.int64)
+        self.size = np.array(nodes.size, dtype=np.int64)
+        self.time = np.array(nodes.time, dtype=np.int64)
+        extra_nodes, extra_keys = zip(*extra_keys) if extra_keys else ((), ())
+        self._extra_nodes = np.array(extra_nodes, dtype=np.int64)
+        self._strings = {"names": nodes.names, "extra": extra_keys}
+        self.prefix_index = prefix_index
+        # text blobs keyed on (strings, case_sensitive), the case-sensitive ones are only built when first searched
+        self._blobs = {}
+        for strings in self._strings:
+            self._blob(strings, False)
+        self._suffixes = self._name_suffixes()
+        # position of every node's name when sorted case-insensitively, see `sort_ranks`
+        self.name_rank = self.string_ranks(nodes.names)[self.name_id]
+        self.has_children = np.bincount(self.parent[1:], minlength=len(self.parent)) > 0
+
+        # nodes grouped by their depth below the top level, so each level can be propagated in one vectorized step
+        depth = np.zeros(len(self.parent), dtype=np.int64)
+        ancestor = self.parent.copy()
+        while (has_ancestor := ancestor > 0).any():
+            depth += has_ancestor
+            ancestor[has_ancestor] = self.parent[ancestor[has_ancestor]]
+        order = np.argsort(depth, kind="stable")
+        bounds = np.searchsorted(depth[order], np.arange(depth.max(initial=0) + 2))
+        self._levels = [order[bounds[d]:bounds[d + 1]] for d in range(1, len(bounds) - 1)]
+
+    def __len__(self):
+        return len(self.parent)
+
+    def _blob(self, strings, case_sensitive):
+        if (blob := self._blobs.get((strings, case_sensitive))) is None:
+            values = self._strings[strings]
+            if not case_sensitive:
+                values = [_.lower() for _ in values]
+            data = ("\n" + "\n".join(values) + "\n").encode("utf-8", errors="surrogatepass")
+            # byte offset of the start of every string, plus the end of the blob
+            starts = np.flatnonzero(np.frombuffer(data, dtype=np.uint8) == ord("\n")) + 1
+            blob = self._blobs[(strings, case_sensitive)] = (data, starts)
+        return blob
+
+    def _find(self, strings, pattern, case_sensitive) -> np.ndarray:
+        """Returns a boolean mask over `strings` for the strings that contain `pattern`"""
+        blob, starts = self._blob(strings, case_sensitive)
+        found = np.zeros(len(starts) - 1, dtype=bool)
+        pattern = pattern.encode("utf-8", errors="surrogatepass")
+        # consume the rest of the string, so each string is matched at most once
+        regex = re.escape(pattern) + (b"" if pattern.endswith(b"\n") else b"[^\n]*")
+        offsets = np.fromiter(map(re.Match.start, re.finditer(regex, blob)), dtype=np.int64)
+        if len(offsets):
+            # the pattern may start with the separator, which belongs to the following string
+            ids = np.searchsorted(starts, offsets + pattern.startswith(b"\n"), side="right") - 1
+            found[ids[(ids >= 0) & (ids < len(found))]] = True
+        return found
+
+    def _name_suffixes(self):
+        """Returns the byte offset and length of the suffix (as in `Path.suffix`, without the dot) of every name in the
+        lowercased names blob, names without a suffix have a length of -1"""
+        blob, starts = self._blob("names", False)
+        dots = np.concatenate(([-1], np.flatnonzero(np.frombuffer(blob, dtype=np.uint8) == ord("."))))
+        ends = starts[1:] - 1
+        last_dot = dots[np.searchsorted(dots, ends) - 1]
+        has_suffix = (last_dot > starts[:-1]) & (last_dot < ends - 1)
+        return last_dot + 1, np.where(has_suffix, ends - last_dot - 1, -1)
+
+    @staticmethod
+    def string_ranks(values) -> np.ndarray:
+        """Returns the position of each of `values` when sorted case-insensitively, equal values share a position"""
+        folded = [_.casefold() for _ in values]
+        positions = {value: i for i, value in enumerate(sorted(set(folded)))}
+        return np.fromiter(map(positions.__getitem__, folded), dtype=np.int64, count=len(folded))
+
+    def sort_ranks(self, keys) -> np.ndarray:
+        """Returns the position of every node when sorted by `keys`, a list of arrays over the node indices with the
+        most significant first. Nodes with equal keys keep their index order."""
+        order = np.lexsort(keys[::-1])
+        ranks = np.empty(len(order), dtype=np.int64)
+        ranks[order] = np.arange(len(order))
+        return ranks
+
+    def sibling_order(self, ranks, descending=False):
+        """Returns the children of every node sorted by `ranks`, from `sort_ranks`, with a single stable argsort: the
+        nodes below the root grouped by their parent in rank order, the position in it of every node's first child (-1
+        for nodes without any) and the row of every node among its siblings."""
+        by_rank = np.empty(len(ranks), dtype=np.int64)
+        by_rank[ranks] = np.arange(len(ranks))
+        if descending:
+            by_rank = by_rank[::-1]
+        by_rank = by_rank[by_rank > 0]
+        order = by_rank[np.argsort(self.parent[by_rank], kind="stable")]
+        parents = self.parent[order]
+        positions = np.arange(len(order))
+        first = np.ones(len(order), dtype=bool)
+        first[1:] = parents[1:] != parents[:-1]
+        first_child = np.full(len(self.parent), -1, dtype=np.int64)
+        first_child[parents[first]] = positions[first]
+        rows = np.zeros(len(self.parent), dtype=np.int64)
+        rows[order] = positions - first_child[parents]
+        return order, first_child, rows
+
+    def suffix_matching(self, suffixes) -> np.ndarray:
+        """Returns a boolean mask over the node indices for the nodes whose name has one of the lowercase `suffixes`
+        (without the dot)"""
+        blob, _ = self._blob("names", False)
+        data = np.frombuffer(blob, dtype=np.uint8)
+        suffix_start, suffix_length = self._suffixes
+        found = np.zeros(len(suffix_start), dtype=bool)
+        for suffix in suffixes:
+            suffix = suffix.encode("utf-8", errors="surrogatepass")
+            candidates = np.flatnonzero(suffix_length == len(suffix))
+            for i, byte in enumerate(suffix):
+                candidates = candidates[data[suffix_start[candidates] + i] == byte]
+            found[candidates] = True
+        return found[self.name_id]
+
+    def names_matching(self, pattern, case_sensitive=False) -> np.ndarray:
+        """Returns a boolean mask over the node indices for the nodes whose name contains `pattern`. Names are
+        separated by newlines, so a leading or trailing newline in `pattern` anchors it to the start or end of the name.
+        Unless `case_sensitive` is set, `pattern` must be lowercase."""
+        return self._find("names", pattern, case_sensitive)[self.name_id]
+
+    def match(self, text, case_sensitive=False) -> np.ndarray:
+        """Returns a boolean mask over the node indices for the nodes that match `text` themselves, without their
+        descendants or ancestors. Queries with a `/` match across the names leading up to a node."""
+        if not case_sensitive:
+            text = text.lower()
+        parts = text.split("/")
+        if len(parts) == 1:
+            matched = self.names_matching(text, case_sensitive)
+        else:
+            # `a/b/c` matches a name ending in `a`, followed by a child named `b` and a grandchild starting with `c`
+            if parts[-1]:
+                matched = self.names_matching(f"\n{parts[-1]}", case_sensitive)
+            else:
+                matched = np.ones(len(self), dtype=bool)
+            candidates = np.flatnonzero(matched)
+            ancestors = candidates
+            for i, part in reversed(list(enumerate(parts[:-1]))):
+                ancestors = self.parent[ancestors]
+                keep = ancestors > 0
+                if i > 0:
+                    keep[keep] &= self.names_matching(f"\n{part}\n", case_sensitive)[ancestors[keep]]
+                elif part:
+                    keep[keep] &= self.names_matching(f"{part}\n", case_sensitive)[ancestors[keep]]
+                candidates, ancestors = candidates[keep], ancestors[keep]
+            matched = np.zeros(len(self), dtype=bool)
+            matched[candidates] = True
+
+        if len(self._extra_nodes) and "/" not in text:
+            matched[self._extra_nodes[self._find("extra", text, case_sensitive)]] = True
+        if self.prefix_index is not None and "/" not in text:
+            matched[self.prefix_index.prefixed(text)] = True
+        matched[0] = False
+        return matched
+
+    def descendants(self, matched, cancelled=None):
+        """Returns `matched` with the descendants of every matched node added, or `None` if `cancelled`, see
+        `expand`"""
+        matched = matched.copy()
+        for level in self._levels:
+            if cancelled is not None and cancelled():
+                return None
+            matched[level] |= matched[self.parent[level]]
+        return matched
+
+    def aggregate(self, values, ufunc) -> np.ndarray:
+        """Returns `values`, an array over the node indices, with the values of each node's descendants folded into it
+        with the numpy `ufunc`, e.g. `np.add` for subtree totals. Done in a single pass from the deepest level up."""
+        values = values.copy()
+        for level in reversed(self._levels):
+            ufunc.at(values, self.parent[level], values[level])
+        return values
+
+    def expand(self, matched, descendants=True, cancelled=None):
+        """Adds the ancestors of every node in the `matched` mask, and their descendants if `descendants` is set.
+        `cancelled` is an optional callable that is polled between levels, if it returns `True` the result is `None`."""
+        if descendants:
+            matched = self.descendants(matched, cancelled)
+            if matched is None:
+                return None
+        else:
+            matched = matched.copy()
+
+        # everything above a match has to be visible for the match to be shown
+        for level in reversed(self._levels):
+            if cancelled is not None and cancelled():
+                return None
+            matched[self.parent[level[matched[level]]]] = True
+        matched[0] = True
+        return matched
+
+    def search(self, text, case_sensitive=False, cancelled=None):
+        """Returns a boolean mask over the node indices for the nodes whose path contains `text`, their descendants and
+        their ancestors, or `None` if the search was `cancelled`, see `expand`."""
+        return self.expand(self.match(text, case_sensitive), cancelled=cancelled)
@@ -8,6 +8,7 @@ from starfab.models.common import (
     PathArchiveTreeModelLoader,
     SKIP_MODELS,
 )
+from starfab.tasks import Lane, get_scheduler
 
 logger = getLogger(__name__)
 TAG_DATABASE_COLUMNS = ["Name"]
@@ -21,9 +22,14 @@ class TagDatabaseLoader(PathArchiveTreeModelLoader):
     def load_item(self, tag):
         if tag.guid not in self.model._guid_cache:
             self.model._guid_cache[tag.guid] = self._item_cls(tag, self.model)
+        for row, child in enumerate(tag.children):
+            self.model._row_cache[child.guid] = row
 
 
 class TagDatabaseSortFilterProxyModel(PathArchiveTreeSortFilterProxyModel):
+    # tags are matched by their own name and GUID rather than their path
+    use_search_index = False
+
     def filterAcceptsRow(self, source_row, source_parent: qtc.QModelIndex) -> bool:
         if self._filter:
             if parent := source_parent.internalPointer():
@@ -63,16 +69,14 @@ class TagDatabaseTreeItem:
         return None
 
     def row(self):
-        if self.parent is not None:
-            return self.parent.tag.children.index(self.tag)
-        return 0
+        return self.model._row_cache.get(self.tag.guid, 0)
 
     def has_children(self):
         return bool(self.tag.children)
 
     @property
     def children(self):
-        return self.model.itemForGUID(self.tag.chilren)
+        return [self.model.itemForGUID(_.guid) for _ in self.tag.children]
 
     def child(self, row):
         try:
@@ -109,6 +113,7 @@ class TagDatabaseModel(PathArchiveTreeModel):
 
     def __init__(self, sc_manager):
         self._guid_cache = {}
+        self._row_cache = {}
         self._sc_manager = sc_manager
         self._loader = None
         self.is_loaded = False
@@ -123,15 +128,10 @@ class TagDatabaseModel(PathArchiveTreeModel):
         if 'tag_database' in SKIP_MODELS:
             logger.debug(f'Skipping loading the tag_database model')
         else:
-            self._sc_manager.datacore_model.loaded.connect(self._on_datacore_loaded)
             self._sc_manager.datacore_model.unloading.connect(
                 self._on_datacore_unloading,  # qtc.Qt.BlockingQueuedConnection
             )
 
-    @qtc.Slot()
-    def _on_datacore_loaded(self):
-        self.load(self._sc_manager.sc)
-
     @qtc.Slot()
     def _on_datacore_unloading(self):
         self.unload()
@@ -143,6 +143,10 @@ class TagDatabaseModel(PathArchiveTreeModel):
         else:
             super()._setup_root()
 
+    def sortRanks(self, column, folders_first=False):
+        # the rows are tags rather than nodes
+        return None
+
     def itemForName(self, tag_name):
         tag = self.archive.tag(tag_name)
         if tag is not None:
@@ -159,6 +163,8 @@ class TagDatabaseModel(PathArchiveTreeModel):
         if self._loader is not None:
             self._loader.cancel.emit()
         self.clear()
+        self._guid_cache = {}
+        self._row_cache = {}
         self.is_loaded = False
 
     def _loaded(self):
@@ -179,4 +185,4 @@ class TagDatabaseModel(PathArchiveTreeModel):
             task_status_msg="Processing Tag Database",
         )
         self._loader.signals.finished.connect(self._loaded)
-        qtc.QThreadPool.globalInstance().start(self._loader)
+        get_scheduler().start(self._loader, Lane.BACKGROUND)
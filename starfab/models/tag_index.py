@@ -0,0 +1,77 @@
+"""
+Bitsets of the tags of DataCore records, for filtering records by their tags.
+
+The tags in each record's `tags` are collected while the records are indexed, see
+`starfab.models.content_index.index_records`. `TagBitsets` gives every tag that's in use a bit and packs the tags of each
+tagged record into a row of 64 bit words, optionally along with the ancestors of its tags, so a record tagged
+`TagDatabase.Weapon.Gun` also has the bit of `TagDatabase.Weapon`. "Has any" and "has all" filters then become a
+bitwise and over every row at once rather than resolving each record's tags.
+
+    bitsets = TagBitsets(tag_graph, sc.tag_database, include_ancestors=True)
+    bitsets.rows_with(["TagDatabase.Weapon"], match_all=False)
+"""
+import typing
+
+import numpy as np
+
+
+class TagBitsets:
+    def __init__(self, tag_graph, tag_database, include_ancestors=False):
+        """Bitsets of the tags of the records in `tag_graph`, a `ReferenceGraph` of records to their tags. Tags are
+        named as in `tag_database`, a `scdatatools.forge.tags.TagDatabase`."""
+        self.include_ancestors = include_ancestors
+        tag_records, tag_of_edge = np.unique(tag_graph.targets, return_inverse=True)
+
+        # the columns of each tag in use, including those of its ancestors
+        self.columns = {}
+        tag_columns = []
+        for guid in tag_graph.guids[tag_records]:
+            tag = tag_database.tags_by_guid.get(guid.decode("ascii"))
+            columns = []
+            while tag is not None and tag is not tag_database.root_tag:
+                columns.append(self.columns.setdefault(str(tag), len(self.columns)))
+                if not include_ancestors:
+                    break
+                tag = tag.parent
+            tag_columns.append(columns)
+
+        # the (row, column) of every bit to set, each edge sets the columns of its tag
+        self.records, row_of_edge = np.unique(tag_graph.sources, return_inverse=True)
+        counts = np.array([len(_) for _ in tag_columns], dtype=np.int64)[tag_of_edge]
+        starts = np.zeros(len(tag_columns) + 1, dtype=np.int64)
+        np.cumsum([len(_) for _ in tag_columns], out=starts[1:])
+        flat_columns = np.array([c for _ in tag_columns for c in _], dtype=np.int64)
+        rows = np.repeat(row_of_edge, counts)
+        # position of each bit within its edge's columns
+        offsets = np.arange(len(rows)) - np.repeat(np.cumsum(counts) - counts, counts)
+        columns = flat_columns[np.repeat(starts[:-1][tag_of_edge], counts) + offsets]
+
+        self.words = max(1, -(-len(self.columns) // 64))
+        self.bits = np.zeros((len(self.records), self.words), dtype=np.uint64)
+        np.bitwise_or.at(self.bits, (rows, columns >> 6), np.left_shift(np.uint64(1), (columns & 63).astype(np.uint64)))
+        # the GUIDs of the rows' records
+        self.guids = tag_graph.guids[self.records]
+
+    def __len__(self):
+        """The number of tagged records"""
+        return len(self.records)
+
+    def query(self, tags: typing.Iterable[str]):
+        """Returns the bitset of `tags` and whether every tag is in use"""
+        query = np.zeros(self.words, dtype=np.uint64)
+        known = True
+        for tag in tags:
+            if (column := self.columns.get(tag)) is None:
+                known = False
+                continue
+            query[column >> 6] |= np.uint64(1) << np.uint64(column & 63)
+        return query, known
+
+    def rows_with(self, tags: typing.Iterable[str], match_all=False) -> np.ndarray:
+        """Returns the mask of rows whose records have any of `tags`, or all of them if `match_all` is set"""
+        query, known = self.query(tags)
+        if match_all:
+            if not known:
+                return np.zeros(len(self.records), dtype=bool)
+            return ((self.bits & query) == query).all(axis=1)
+        return (self.bits & query).any(axis=1)
@@ -0,0 +1,73 @@
+"""
+Posting lists of DataCore records by their type, for faceting and filtering records by type.
+
+A record's type is the name of the structure it's an instance of. `RecordTypeIndex` reads the structure index of every
+record straight out of the datacore's record table and groups the record indices by type, so the records of a type,
+or of any of several types, are slices of one array rather than a check of every record, and the number of records of
+each type is known up front. The index is built once per datacore and shared, see `record_type_index`.
+
+    index = record_type_index(sc.datacore)
+    index.counts()["EntityClassDefinition"]
+    records = [sc.datacore.records[_] for _ in index.record_indices(["EntityClassDefinition"])]
+"""
+import threading
+import typing
+import weakref
+
+import numpy as np
+
+_indexes = weakref.WeakKeyDictionary()
+_indexes_lock = threading.Lock()
+
+
+class RecordTypeIndex:
+    def __init__(self, datacore):
+        """Index of the records of `datacore`, a `scdatatools.forge.DataCoreBinary`, by type. Use
+        `record_type_index` rather than creating one directly."""
+        structures = np.ctypeslib.as_array(datacore.records)["structure_index"] if len(datacore.records) else []
+        # record indices grouped by structure, in record order within each structure
+        self.records = np.argsort(structures, kind="stable").astype(np.int32)
+        structure_ids, starts, counts = np.unique(
+            np.asarray(structures)[self.records], return_index=True, return_counts=True
+        )
+        self._postings = {}
+        for structure, start, count in zip(structure_ids, starts, counts):
+            name = datacore.structure_definitions[int(structure)].name
+            self._postings.setdefault(name, []).append((int(start), int(start + count)))
+        self._counts = {
+            name: sum(end - start for start, end in postings) for name, postings in self._postings.items()
+        }
+        self.types = sorted(self._postings)
+
+    def __len__(self):
+        """The number of types"""
+        return len(self.types)
+
+    def __contains__(self, record_type):
+        return record_type in self._postings
+
+    def count(self, record_type) -> int:
+        """Returns the number of records of `record_type`"""
+        return self._counts.get(record_type, 0)
+
+    def counts(self) -> typing.Dict[str, int]:
+        """Returns the number of records of each type"""
+        return dict(self._counts)
+
+    def record_indices(self, types: typing.Iterable[str]) -> np.ndarray:
+        """Returns the indices into the datacore's `records` of the records of any of `types`, in record order"""
+        if isinstance(types, str):
+            types = [types]
+        slices = [self.records[start:end] for _ in set(types) for start, end in self._postings.get(_, [])]
+        if not slices:
+            return np.zeros(0, dtype=np.int32)
+        return np.sort(np.concatenate(slices))
+
+
+def record_type_index(datacore) -> RecordTypeIndex:
+    """Returns the `RecordTypeIndex` of `datacore`, building it the first time it's asked for. The index lives as long
+    as the datacore does."""
+    with _indexes_lock:
+        if (index := _indexes.get(datacore)) is None:
+            index = _indexes[datacore] = RecordTypeIndex(datacore)
+        return index
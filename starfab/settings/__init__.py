@@ -14,8 +14,16 @@ settings_defaults = {
     "enableErrorReporting": "true",
     "ignoreUpdate": "",
     "updateRemindLater": "",
+    "updateCheckCache": "",
     "autoOpenRecent": "false",
 
+    # model cache
+    "model_cache/enabled": "true",
+    "model_cache/max_size_mb": "1024",
+
+    # serialized datacore records kept in memory
+    "datacore/record_cache_max_size_mb": "256",
+
     # external tools
     "external_tools/cgf-converter": "",
     "external_tools/texconv": "",
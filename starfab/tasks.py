@@ -0,0 +1,257 @@
+"""
+Central scheduling of StarFab's background work.
+
+Work runs in one of three lanes, each with its own thread pool and concurrency limit, so a long export can't starve
+audio previews and loading a model can't starve everything else:
+
+===============  ======================================================================================================
+`INTERACTIVE`    short work the user is waiting on, e.g. tree searches and audio preview conversion
+`BACKGROUND`     loading models and housekeeping
+`BULK`           exports and batch conversions
+===============  ======================================================================================================
+
+Work that should show up in the status bar is tracked with a `Task`. Reporting progress on a task only stores the
+values, so it is cheap to do from any thread for every item. The scheduler collects the changes in the GUI thread at a
+fixed rate and announces them with its `task_added`, `tasks_updated` and `task_finished` signals. Tasks carry a
+`CancellationToken` that the work is expected to check between items.
+"""
+import enum
+import itertools
+import threading
+import time
+
+from starfab.gui import qtc
+from starfab.log import getLogger
+
+logger = getLogger(__name__)
+
+# how often task progress is passed on to the GUI, in milliseconds
+UPDATE_INTERVAL = 100
+
+
+class Lane(enum.Enum):
+    INTERACTIVE = "interactive"
+    BACKGROUND = "background"
+    BULK = "bulk"
+
+
+def lane_thread_counts():
+    """Returns the maximum number of threads of each `Lane`"""
+    cores = max(1, qtc.QThread.idealThreadCount())
+    return {
+        Lane.INTERACTIVE: max(2, cores // 2),
+        Lane.BACKGROUND: max(2, cores // 2),
+        Lane.BULK: max(1, cores // 2),
+    }
+
+
+class TaskCancelled(Exception):
+    pass
+
+
+class CancellationToken:
+    """Cooperative cancellation flag shared between whoever starts some work and the work itself"""
+
+    def __init__(self):
+        self._event = threading.Event()
+
+    def cancel(self):
+        self._event.set()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._event.is_set()
+
+    def check(self):
+        """Raises `TaskCancelled` if the token has been cancelled"""
+        if self._event.is_set():
+            raise TaskCancelled()
+
+
+class Task:
+    """Progress of a unit of work shown in the status bar, see `TaskScheduler.task`. Can be updated from any thread."""
+
+    _ids = itertools.count(1)
+
+    def __init__(self, title, total=0, lane=Lane.BULK, cancellable=True):
+        self.id = next(self._ids)
+        self.title = title
+        self.lane = lane
+        self.cancellable = cancellable
+        self.token = CancellationToken()
+        self.value = 0
+        self.total = total
+        self.message = ""
+        self.started = time.monotonic()
+        self.success = None
+        self.result_message = ""
+        self._finished = False
+        self._announced = False
+        self._dirty = True
+
+    def __repr__(self):
+        return f"<Task {self.id} {self.title!r} {self.value}/{self.total}>"
+
+    def progress(self, value=None, total=None, message=None):
+        """Report the number of items done, and optionally a new `total` or `message`"""
+        if value is not None:
+            self.value = value
+        if total is not None:
+            self.total = total
+        if message is not None:
+            self.message = message
+        self._dirty = True
+
+    def advance(self, count=1, message=None):
+        self.progress(self.value + count, message=message)
+
+    def finish(self, success=True, message=""):
+        """Mark the task as done. A `message` is shown to the user, as is the failure of a task that wasn't
+        cancelled."""
+        self.success = success
+        self.result_message = message
+        self._finished = True
+        self._dirty = True
+
+    def cancel(self):
+        self.token.cancel()
+
+    @property
+    def cancelled(self) -> bool:
+        return self.token.cancelled
+
+    @property
+    def is_finished(self) -> bool:
+        return self._finished
+
+    @property
+    def eta(self):
+        """Estimated seconds until the task is done from its rate so far, or `None` if unknown"""
+        if self.total <= 0 or self.value <= 0 or self.value >= self.total:
+            return None
+        elapsed = time.monotonic() - self.started
+        return elapsed / self.value * (self.total - self.value)
+
+
+class _TaskRunnable(qtc.QRunnable):
+    def __init__(self, task, fn, args, kwargs):
+        super().__init__()
+        self.task = task
+        self.fn = fn
+        self.args = args
+        self.kwargs = kwargs
+        self.setAutoDelete(True)
+
+    def run(self):
+        try:
+            self.fn(self.task, *self.args, **self.kwargs)
+        except TaskCancelled:
+            self.task.finish(False)
+        except Exception as e:
+            logger.exception(f"{self.task.title} failed", exc_info=e)
+            self.task.finish(False, f"{self.task.title} failed: {e}")
+        else:
+            if not self.task.is_finished:
+                self.task.finish(not self.task.cancelled)
+
+
+class TaskScheduler(qtc.QObject):
+    # emitted in the GUI thread for a new `Task`, when any tracked task changed, and when a task is done
+    task_added = qtc.Signal(object)
+    tasks_updated = qtc.Signal()
+    task_finished = qtc.Signal(object)
+
+    _wake = qtc.Signal()
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._pools = {}
+        for lane, threads in lane_thread_counts().items():
+            pool = self._pools[lane] = qtc.QThreadPool(self)
+            pool.setMaxThreadCount(threads)
+        self._tasks = {}
+        self._lock = threading.Lock()
+        self._timer = qtc.QTimer(self)
+        self._timer.setInterval(UPDATE_INTERVAL)
+        self._timer.timeout.connect(self._poll)
+        self._wake.connect(self._start_polling)
+
+    def pool(self, lane: Lane) -> qtc.QThreadPool:
+        return self._pools[lane]
+
+    def start(self, runnable: qtc.QRunnable, lane=Lane.BACKGROUND, priority=0):
+        """Run `runnable` in `lane`. Runnables with a higher `priority` are started first within a lane."""
+        self._pools[lane].start(runnable, priority)
+
+    def task(self, title, total=0, lane=Lane.BULK, cancellable=True) -> Task:
+        """Returns a new tracked `Task` for work that is run by the caller. It is shown until `Task.finish` is
+        called."""
+        task = Task(title, total=total, lane=lane, cancellable=cancellable)
+        with self._lock:
+            self._tasks[task.id] = task
+        self._wake.emit()
+        return task
+
+    def run(self, title, fn, *args, total=0, lane=Lane.BULK, priority=0, cancellable=True, **kwargs) -> Task:
+        """Run `fn(task, *args, **kwargs)` in `lane` as a tracked `Task`. The task is finished once `fn` returns, as
+        failed if it raised, or as cancelled if it raised `TaskCancelled`."""
+        task = self.task(title, total=total, lane=lane, cancellable=cancellable)
+        self.start(_TaskRunnable(task, fn, args, kwargs), lane, priority)
+        return task
+
+    @property
+    def tasks(self):
+        """The tracked tasks that haven't finished yet"""
+        with self._lock:
+            return [_ for _ in self._tasks.values() if not _.is_finished]
+
+    def cancel_all(self):
+        for task in self.tasks:
+            task.cancel()
+
+    def wait(self, timeout=-1) -> bool:
+        """Wait for the work in every lane to finish, returns `False` if it didn't within `timeout` milliseconds"""
+        return all(pool.waitForDone(timeout) for pool in self._pools.values())
+
+    @qtc.Slot()
+    def _start_polling(self):
+        if not self._timer.isActive():
+            self._timer.start()
+
+    @qtc.Slot()
+    def _poll(self):
+        with self._lock:
+            tasks = list(self._tasks.values())
+        changed = False
+        for task in tasks:
+            if not task._announced:
+                task._announced = True
+                self.task_added.emit(task)
+            if task._dirty:
+                task._dirty = False
+                changed = True
+            if task.is_finished:
+                with self._lock:
+                    self._tasks.pop(task.id, None)
+                self.task_finished.emit(task)
+        if changed:
+            self.tasks_updated.emit()
+        with self._lock:
+            if not self._tasks:
+                self._timer.stop()
+
+
+_scheduler = None
+_scheduler_lock = threading.Lock()
+
+
+def get_scheduler() -> TaskScheduler:
+    """Returns StarFab's `TaskScheduler`"""
+    global _scheduler
+    with _scheduler_lock:
+        if _scheduler is None:
+            _scheduler = TaskScheduler()
+            if (app := qtc.QCoreApplication.instance()) is not None:
+                # it has to deliver its signals from the GUI thread regardless of where it's first used
+                _scheduler.moveToThread(app.thread())
+    return _scheduler
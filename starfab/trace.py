@@ -0,0 +1,135 @@
+"""
+Spans of the time taken by loading and exporting, for finding where an open or an export spends its time.
+
+Code wraps its steps in `span`, spans nest within each other per thread. Caches and other state that changes over time
+report their current values with `counter`. Finished spans and counter values are kept in a ring buffer of the most
+recent `MAX_SPANS`, along with the thread they were recorded in, and can be saved as a Chrome trace with
+`Tracer.dump`, from Tools > Save Trace, or when StarFab exits by setting `STARFAB_TRACE` to the path to save it to.
+The trace can be opened in `chrome://tracing`, https://ui.perfetto.dev or https://www.speedscope.app.
+
+    from starfab.trace import span
+
+    with span("load datacore", "load"):
+        ...
+"""
+import atexit
+import collections
+import json
+import os
+import threading
+import time
+import typing
+from contextlib import contextmanager
+from pathlib import Path
+
+from qtpy.QtCore import QThread
+
+from starfab.log import getLogger
+
+logger = getLogger(__name__)
+
+TRACE_ENV = "STARFAB_TRACE"
+MAX_SPANS = 100_000
+
+
+class Tracer:
+    def __init__(self, max_spans=MAX_SPANS):
+        # (name, category, start ns, duration ns, thread id, args), appending to a deque is thread safe. Counter values
+        # have no duration.
+        self._spans = collections.deque(maxlen=max_spans)
+        self._thread_names = {}
+        self._origin = time.perf_counter_ns()
+
+    def _thread_id(self) -> int:
+        tid = threading.get_native_id()
+        if tid not in self._thread_names:
+            name = threading.current_thread().name
+            if name.startswith("Dummy-"):
+                # started by Qt rather than `threading`, only ask Qt about those as asking adopts the thread
+                name = QThread.currentThread().objectName() or name
+            self._thread_names[tid] = f"{name}-{tid}"
+        return tid
+
+    @contextmanager
+    def span(self, name: str, category: str = "", **args):
+        """Records how long the `with` block takes as `name`. `args` are shown with the span in the trace viewer.
+        Can also be used as a decorator."""
+        start = time.perf_counter_ns()
+        try:
+            yield
+        finally:
+            self._spans.append(
+                (name, category, start, time.perf_counter_ns() - start, self._thread_id(), args or None)
+            )
+
+    def counter(self, name: str, category: str = "", **values):
+        """Records the current `values` of the counter `name`, numbers shown as graphs over time in the trace viewer"""
+        self._spans.append((name, category, time.perf_counter_ns(), None, self._thread_id(), values))
+
+    def __len__(self):
+        return len(self._spans)
+
+    def clear(self):
+        self._spans.clear()
+
+    def chrome_trace(self) -> dict:
+        """Returns the recorded spans in the Chrome trace event format"""
+        pid = os.getpid()
+        events = [
+            {"name": "process_name", "ph": "M", "pid": pid, "tid": 0, "args": {"name": "StarFab"}},
+        ]
+        events.extend(
+            {"name": "thread_name", "ph": "M", "pid": pid, "tid": tid, "args": {"name": name}}
+            for tid, name in list(self._thread_names.items())
+        )
+        for name, category, start, duration, tid, args in list(self._spans):
+            if duration is None:
+                events.append(
+                    {
+                        "name": name,
+                        "cat": category,
+                        "ph": "C",
+                        "ts": (start - self._origin) / 1000,
+                        "pid": pid,
+                        "tid": tid,
+                        "args": args,
+                    }
+                )
+                continue
+            event = {
+                "name": name,
+                "cat": category,
+                "ph": "X",
+                "ts": (start - self._origin) / 1000,
+                "dur": duration / 1000,
+                "pid": pid,
+                "tid": tid,
+            }
+            if args:
+                event["args"] = {k: v if isinstance(v, (int, float, bool)) else str(v) for k, v in args.items()}
+            events.append(event)
+        return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+    def dump(self, path: typing.Union[Path, str]) -> Path:
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with path.open("w") as f:
+            json.dump(self.chrome_trace(), f)
+        logger.info(f"Saved {len(self)} trace spans to {path}")
+        return path
+
+
+tracer = Tracer()
+span = tracer.span
+counter = tracer.counter
+
+
+def _dump_on_exit():
+    try:
+        tracer.dump(os.environ[TRACE_ENV])
+    except Exception as e:
+        logger.exception(f"Failed to save the trace to {os.environ[TRACE_ENV]}", exc_info=e)
+
+
+if os.environ.get(TRACE_ENV):
+    atexit.register(_dump_on_exit)
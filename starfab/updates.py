@@ -1,4 +1,4 @@
-import requests
+import json
 import webbrowser
 from packaging import version
 from datetime import datetime, timedelta
@@ -9,32 +9,69 @@ from starfab import __version__
 from starfab.gui import qtc, qtw, qtg
 from starfab.settings import settings
 from starfab.log import getLogger
-from starfab.gui.widgets.markdown import MarkdownView
+from starfab.tasks import Lane, get_scheduler
 
 
 logger = getLogger(__name__)
 PROJECT_ID = 22934039
 API_URL = f'https://gitlab.com/api/v4/projects/{PROJECT_ID}/releases'
+# seconds to wait for GitLab to connect and to respond
+UPDATE_CHECK_TIMEOUT = 5
+# how long the result of a successful check is used before GitLab is asked again
+UPDATE_CHECK_TTL = timedelta(hours=12)
 
 
-def check_for_update(url=API_URL) -> (bool, str, str):
+def fetch_latest_release(url=API_URL, timeout=UPDATE_CHECK_TIMEOUT) -> dict:
+    """ Returns the `tag_name`, `_links` and `description` of the latest release from the given gitlab project url.
+    Raises if the request fails or takes longer than `timeout` seconds to connect or respond. """
+    import requests
+
+    r = requests.get(url, timeout=timeout)
+    r.raise_for_status()
+    latest = r.json()[0]
+    version.parse(latest['tag_name'])  # make sure it's valid before it's cached
+    return {k: latest[k] for k in ('tag_name', '_links', 'description') if k in latest}
+
+
+def update_info(release: dict) -> (bool, str, str):
+    """ :returns: `bool` whether `release` is newer than the running version, the `Version` of `release`, a `str` of
+        its download url and `release` """
+    latest_version = version.parse(release['tag_name'])
+    return (
+        latest_version > version.parse(__version__), latest_version, release.get('_links', {}).get('self', ''), release
+    )
+
+
+def check_for_update(url=API_URL, timeout=UPDATE_CHECK_TIMEOUT) -> (bool, str, str):
     """ Checks if there is a newer version available for download from the given gitlab project url.
 
     :returns: `bool` whether there is a newer version, `str` of the latest version and a `str` of the download url
         for the latest version
     """
-    current_version = version.parse(__version__)
     try:
-        r = requests.get(url)
-        r.raise_for_status()
-        latest = r.json()[0]
-        latest_version = version.parse(latest['tag_name'])
-
-        return latest_version > current_version, latest_version, latest.get('_links', {}).get('self', ''), latest
+        return update_info(fetch_latest_release(url, timeout))
     except Exception as e:
         logger.warning(f'Unable to check for updates: {e}')
         pass
-    return False, current_version, '', {}
+    return False, version.parse(__version__), '', {}
+
+
+def cached_release(url=API_URL, ttl=UPDATE_CHECK_TTL):
+    """ Returns the release found by the last successful check of `url`, or `None` if it's older than `ttl` """
+    try:
+        cached = json.loads(settings.value('updateCheckCache') or '{}')
+        checked = datetime.fromtimestamp(float(cached['checked']))
+    except (ValueError, TypeError, KeyError):
+        return None
+    if cached.get('url') != url or not timedelta(0) <= datetime.now() - checked < ttl:
+        return None
+    return cached.get('release')
+
+
+def cache_release(release, url=API_URL):
+    settings.setValue(
+        'updateCheckCache', json.dumps({'url': url, 'checked': datetime.now().timestamp(), 'release': release})
+    )
 
 
 class UpdateAvailableDialog(qtw.QDialog):
@@ -56,6 +93,9 @@ class UpdateAvailableDialog(qtw.QDialog):
         # description = qtw.QTextBrowser()
         # description.setOpenExternalLinks(True)
         # description.setHtml(f"<pre>{release.get('description', '')}</pre>")
+        # QtWebEngine and the markdown resources are only needed once an update is found
+        from starfab.gui.widgets.markdown import MarkdownView
+
         self.description = MarkdownView()
         self.description.setMarkdown(release.get('description', ''))
         layout.addWidget(self.description)
@@ -96,31 +136,95 @@ class UpdateAvailableDialog(qtw.QDialog):
         self.close()
 
 
-def check_and_notify():
-    if not parse_bool(settings.value('checkForUpdates', 'true')):
-        return
+class _UpdateCheckRunnable(qtc.QRunnable):
+    def __init__(self, checker):
+        super().__init__()
+        self.checker = checker
+        self.url = checker.url
+        self.timeout = checker.timeout
+
+    def run(self):
+        try:
+            release = fetch_latest_release(self.url, self.timeout)
+        except Exception as e:
+            logger.warning(f'Unable to check for updates: {e}')
+            release = None
+        self.checker._fetched.emit(release)
 
-    update_available, latest_version, update_link, release = check_for_update()
 
-    update_remind_later = settings.value('updateRemindLater', '')
-    should_remind = True
+class UpdateChecker(qtc.QObject):
+    """ Checks for a newer release in a background thread, reusing the result of the last check for `ttl`, and shows
+    the `UpdateAvailableDialog` once a newer release is found. """
 
-    if (iv := settings.value('ignoreUpdate')) and version.parse(iv) == latest_version:
-        should_remind = False
-    if should_remind and update_remind_later:
+    # emitted with the latest release, or `None` if the check failed
+    checked = qtc.Signal(object)
+
+    _fetched = qtc.Signal(object)
+
+    def __init__(self, url=API_URL, ttl=UPDATE_CHECK_TTL, timeout=UPDATE_CHECK_TIMEOUT, parent=None):
+        super().__init__(parent)
+        self.url = url
+        self.ttl = ttl
+        self.timeout = timeout
+        self.dialog = None
+        self._fetched.connect(self._handle_fetched)
+
+    def check(self) -> bool:
+        """ Starts checking, returns `True` if a request was made rather than the cached result used """
+        if (release := cached_release(self.url, self.ttl)) is not None:
+            logger.debug(f'Using the cached update check for {release.get("tag_name")}')
+            self._handle_release(release)
+            return False
+        get_scheduler().start(_UpdateCheckRunnable(self), Lane.BACKGROUND)
+        return True
+
+    @qtc.Slot(object)
+    def _handle_fetched(self, release):
+        if release is not None:
+            cache_release(release, self.url)
+            self._handle_release(release)
+        else:
+            self.checked.emit(None)
+
+    def _handle_release(self, release):
+        self.checked.emit(release)
         try:
-            remind_later_version, remind_time = update_remind_later.split('!')
-            remind_later_version = version.parse(remind_later_version)
-            remind_time = datetime.fromtimestamp(float(remind_time))
-            if remind_later_version < latest_version or remind_time < datetime.now():
-                settings.value('updateRemindLater', '')
-            else:
-                should_remind = False
-        except Exception:
-            pass
-
-    if update_available:
-        logger.debug(f'New version found {latest_version}: {update_link}')
-
-    if update_available and should_remind:
-        UpdateAvailableDialog(latest_version, update_link, release).exec_()
+            update_available, latest_version, update_link, release = update_info(release)
+        except Exception as e:
+            logger.warning(f'Unable to check for updates: {e}')
+            return
+
+        update_remind_later = settings.value('updateRemindLater', '')
+        should_remind = True
+
+        if (iv := settings.value('ignoreUpdate')) and version.parse(iv) == latest_version:
+            should_remind = False
+        if should_remind and update_remind_later:
+            try:
+                remind_later_version, remind_time = update_remind_later.split('!')
+                remind_later_version = version.parse(remind_later_version)
+                remind_time = datetime.fromtimestamp(float(remind_time))
+                if remind_later_version < latest_version or remind_time < datetime.now():
+                    settings.value('updateRemindLater', '')
+                else:
+                    should_remind = False
+            except Exception:
+                pass
+
+        if update_available:
+            logger.debug(f'New version found {latest_version}: {update_link}')
+
+        if update_available and should_remind:
+            parent = self.parent() if isinstance(self.parent(), qtw.QWidget) else None
+            self.dialog = UpdateAvailableDialog(latest_version, update_link, release, parent=parent)
+            self.dialog.show()
+
+
+def check_and_notify(parent=None):
+    """ Checks for updates without blocking, see `UpdateChecker`. Returns the checker, or `None` if update checks are
+    disabled. """
+    if not parse_bool(settings.value('checkForUpdates', 'true')):
+        return None
+    checker = UpdateChecker(parent=parent)
+    checker.check()
+    return checker